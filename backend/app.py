@@ -12,15 +12,26 @@ from data.molecules import (
     PARTICLE_TYPES,
     find_molecule
 )
-from core.synthesis import synthesize, reorganize_positions, rebond_molecule, calculate_connections
-from core.validator import validate_molecule
+from core.synthesis import (
+    synthesize,
+    check_synthesis,
+    reorganize_positions,
+    rebond_molecule,
+    calculate_connections,
+    ensure_layout,
+    ensure_result_layout,
+    LAYOUT_ENGINES,
+    LAYOUT_ENGINE_HEURISTIC
+)
+from core.validator import validate_batch, validate_molecule
 from core.generator import generate_molecules
 from core.analyzer import get_molecule_properties
 from core.molecule_analyzer import analyze_molecule_structure
-from core.molecule_comparison import are_molecules_identical
+from core.canonical import attach_canonical_key, canonical_key
+from core.jobs import set_job_listener
+from core.single_flight import SingleFlight, get_single_flight_stats
 from data.synthesis_results import (
-    get_synthesis_result,
-    save_synthesis_result,
+    get_or_compute_synthesis,
     get_all_results,
     get_stats,
     clear_cache
@@ -28,6 +39,8 @@ from data.synthesis_results import (
 from data.discovered_molecules import (
     add_discovery,
     get_all_discoveries,
+    get_discoveries_by_mass,
+    molecule_exists_in_discoveries,
     get_discovery,
     clear_discoveries,
     delete_discovery,
@@ -44,6 +57,7 @@ from data.saves import (
     update_save_stats,
     add_discovery_to_save
 )
+from data.molecule_registry import is_base_molecule
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'chemical-pharma-secret-key'
@@ -56,6 +70,31 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # ROTAS HTTP (REST API)
 # ============================================
 
+def parse_layout_engine(data):
+    """
+    Lê o motor de layout do body ('heuristic' por padrão).
+    Returns: (layout_engine, None) ou (None, mensagem de erro)
+    """
+    layout_engine = data.get('layout_engine', LAYOUT_ENGINE_HEURISTIC)
+    if layout_engine not in LAYOUT_ENGINES:
+        return None, f'layout_engine deve ser um de: {", ".join(LAYOUT_ENGINES)}'
+    return layout_engine, None
+
+def get_molecule_status(save_id, molecule):
+    """
+    Classifica uma molécula como 'Base', 'Descoberta' (no save) ou 'Desconhecida'.
+    Usa os índices de chaves canônicas em memória (sem varrer bancos/descobertas);
+    a chave é calculada aqui, uma vez - a enviada pelo cliente não é usada.
+    """
+    if not molecule or not isinstance(molecule, dict):
+        return 'Desconhecida'
+    key = canonical_key(molecule)
+    if is_base_molecule(molecule, key):
+        return 'Base'
+    if save_id and molecule_exists_in_discoveries(save_id, molecule, key):
+        return 'Descoberta'
+    return 'Desconhecida'
+
 # Rota principal - serve o HTML de teste
 @app.route('/')
 def index():
@@ -102,6 +141,53 @@ def api_validate_molecule():
         'errors': errors
     })
 
+# API: Validar várias moléculas
+@app.route('/api/molecules/validate/batch', methods=['POST'])
+def api_validate_molecules_batch():
+    """
+    Valida um lote de moléculas.
+    
+    Body: {
+        'molecules': [{...}],  # Até 20000 moléculas
+        'mode': str,  # Opcional: 'full' (padrão, todos os erros) ou 'quick' (primeira violação)
+        'workers': int  # Opcional: trechos de lotes grandes no pool dos jobs (padrão 1, máximo 8)
+    }
+    """
+    from core.validator import validate_batch, VALIDATION_MODES, VALIDATION_MODE_FULL
+    
+    data = request.json
+    molecules = data.get('molecules')
+    mode = data.get('mode', VALIDATION_MODE_FULL)
+    workers = data.get('workers', 1)
+    
+    if not isinstance(molecules, list) or len(molecules) > 20000:
+        return jsonify({
+            'success': False,
+            'error': 'molecules deve ser uma lista (até 20000 moléculas)'
+        }), 400
+    
+    if mode not in VALIDATION_MODES:
+        return jsonify({
+            'success': False,
+            'error': f'mode deve ser um de: {", ".join(VALIDATION_MODES)}'
+        }), 400
+    
+    if not isinstance(workers, int) or workers < 1 or workers > 8:
+        return jsonify({
+            'success': False,
+            'error': 'workers deve estar entre 1 e 8'
+        }), 400
+    
+    results = validate_batch(molecules, mode, workers)
+    
+    return jsonify({
+        'success': True,
+        'mode': mode,
+        'count': len(results),
+        'valid_count': sum(1 for result in results if result['valid']),
+        'results': results
+    })
+
 # API: Calcular propriedades de molécula
 @app.route('/api/molecules/properties', methods=['POST'])
 def api_calculate_properties():
@@ -119,11 +205,23 @@ def api_calculate_properties():
 
 @app.route('/api/synthesis/mix', methods=['POST'])
 def api_synthesize():
-    """Realiza síntese de duas moléculas"""
+    """
+    Realiza síntese de duas moléculas
+    
+    Body: {
+        'molecule_a_id': str,
+        'molecule_b_id': str,
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
+    }
+    """
     data = request.json
     mol_a_id = data.get('molecule_a_id')
     mol_b_id = data.get('molecule_b_id')
     
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
     if not mol_a_id or not mol_b_id:
         return jsonify({
             'success': False,
@@ -146,17 +244,14 @@ def api_synthesize():
             'error': f'Molécula B ({mol_b_id}) não encontrada'
         }), 404
     
-    # Verificar se já existe no cache
+    # Cache ou síntese (pedidos simultâneos do mesmo par calculam uma vez)
     cache_key = f"{mol_a_id}+{mol_b_id}"
-    cached = get_synthesis_result(cache_key)
-    if cached:
-        return jsonify(cached)
-    
-    # Realizar síntese
-    result = synthesize(molecule_a, molecule_b)
+    result, computed = get_or_compute_synthesis(cache_key, lambda: synthesize(molecule_a, molecule_b))
     
-    # Salvar no cache
-    save_synthesis_result(cache_key, result)
+    # Produtos serão desenhados: calcular posições
+    result = ensure_result_layout(result, layout_engine)
+    if not computed:
+        return jsonify(result)
     
     # Se síntese foi bem-sucedida, incrementar contador do save
     if result.get('success'):
@@ -166,6 +261,112 @@ def api_synthesize():
     
     return jsonify(result)
 
+@app.route('/api/synthesis/mix-many', methods=['POST'])
+def api_synthesize_many():
+    """
+    Síntese N-ária: mistura três ou mais moléculas em uma reação, na ordem
+    dada (((A + B) + C) + ...). Aceita um lote de receitas: prefixos comuns
+    são calculados uma vez e o cache de sínteses é lido e gravado uma vez.
+
+    Body: {
+        'molecule_ids': [str],  # Uma receita
+        'recipes': [[str]],  # Alternativa: lote de receitas (máximo 100)
+        'layout': bool,  # Opcional (padrão true). false = produtos sem coordenadas
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
+    }
+    """
+    from core.multi_synthesis import synthesize_recipes, MAX_RECIPE_LENGTH
+    from data.synthesis_results import get_or_compute_syntheses
+
+    data = request.json
+    recipes = data.get('recipes')
+    single = recipes is None
+    if single:
+        recipes = [data.get('molecule_ids')]
+    with_layout = data.get('layout', True)
+
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    if not isinstance(recipes, list) or not recipes or len(recipes) > 100:
+        return jsonify({
+            'success': False,
+            'error': 'molecule_ids ou recipes (até 100 receitas) é obrigatório'
+        }), 400
+
+    for recipe in recipes:
+        if not isinstance(recipe, list) or len(recipe) < 2 or len(recipe) > MAX_RECIPE_LENGTH:
+            return jsonify({
+                'success': False,
+                'error': f'Cada receita deve ter entre 2 e {MAX_RECIPE_LENGTH} IDs'
+            }), 400
+        if not all(isinstance(mol_id, str) for mol_id in recipe):
+            return jsonify({
+                'success': False,
+                'error': 'Os IDs das receitas devem ser strings'
+            }), 400
+
+    # Buscar moléculas (cada ID uma vez)
+    molecules = {}
+    for mol_id in {mol_id for recipe in recipes for mol_id in recipe}:
+        molecule = find_molecule(mol_id)
+        if not molecule:
+            return jsonify({
+                'success': False,
+                'error': f'Molécula ({mol_id}) não encontrada'
+            }), 404
+        molecules[mol_id] = molecule
+
+    # Receitas binárias compartilham as chaves de /api/synthesis/mix
+    save_id = get_active_save_id()
+    cache_keys = []
+    recipe_by_key = {}
+    for recipe in recipes:
+        key = '+'.join(recipe)
+        key = f"{save_id}:{key}" if save_id else key
+        cache_keys.append(key)
+        recipe_by_key[key] = recipe
+
+    # Lote único de receitas para as chaves que ninguém está calculando;
+    # pedidos simultâneos com receitas em comum esperam em vez de recalcular
+    stats = {'computed': 0, 'reused': 0}
+
+    def compute(missing_keys):
+        computed = synthesize_recipes([
+            [molecules[mol_id] for mol_id in recipe_by_key[key]] for key in missing_keys
+        ])
+        stats.update(computed['stats'])
+        return dict(zip(missing_keys, computed['results']))
+
+    resolved, fresh_keys = get_or_compute_syntheses(cache_keys, compute)
+
+    results = []
+    for recipe, key in zip(recipes, cache_keys):
+        result = resolved[key]
+        if with_layout:
+            ensure_result_layout(result, layout_engine)
+        results.append({
+            'molecule_ids': recipe,
+            'result': result,
+            'cached': key not in fresh_keys
+        })
+
+    # Apenas sínteses novas contam para o save (como em /api/synthesis/mix)
+    successful_count = sum(1 for key in fresh_keys if resolved[key].get('success'))
+    if successful_count > 0 and save_id:
+        update_save_stats(save_id, syntheses_increment=successful_count)
+
+    if single:
+        return jsonify(results[0]['result'])
+
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results,
+        'stats': {**stats, 'cached_recipes': len(resolved) - len(fresh_keys)}
+    })
+
 @app.route('/api/synthesis/validate', methods=['POST'])
 def api_validate_synthesis():
     """Valida se uma síntese é possível"""
@@ -179,18 +380,231 @@ def api_validate_synthesis():
             'error': 'Ambas as moléculas são obrigatórias'
         }), 400
     
-    result = synthesize(molecule_a, molecule_b)
+    # Predicado rápido (sem montar produtos nem calcular coordenadas)
+    verdict = check_synthesis(molecule_a, molecule_b)
     
     return jsonify({
         'success': True,
-        'can_synthesize': result['success'],
-        'reason': result.get('details', {}).get('reason', 'unknown')
+        'can_synthesize': verdict['can_synthesize'],
+        'reason': verdict['reason'] or 'unknown'
+    })
+
+@app.route('/api/synthesis/distribution', methods=['POST'])
+def api_synthesis_distribution():
+    """
+    Distribuição dos produtos possíveis de A + B sobre ordens alternativas
+    de anulação e rebond (a síntese normal sempre segue a ordem das listas).
+
+    Body: {
+        'molecule_a_id': str,
+        'molecule_b_id': str,
+        'mode': str,  # Opcional: 'exhaustive' (padrão) ou 'sample'
+        'samples': int,  # Opcional: amostras no modo 'sample' (padrão 1000, máximo 20000)
+        'seed': int,  # Opcional: semente da amostragem
+        'workers': int,  # Opcional: partes avaliadas no pool dos jobs (padrão 1, máximo 8)
+        'layout': bool,  # Opcional (padrão true). false = produtos sem coordenadas
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
+    }
+    """
+    from core.outcome_distribution import synthesis_outcome_distribution, MODES, MODE_EXHAUSTIVE, DEFAULT_SAMPLES
+
+    data = request.json
+    mol_a_id = data.get('molecule_a_id')
+    mol_b_id = data.get('molecule_b_id')
+    mode = data.get('mode', MODE_EXHAUSTIVE)
+    samples = data.get('samples', DEFAULT_SAMPLES)
+    seed = data.get('seed')
+    workers = data.get('workers', 1)
+    with_layout = data.get('layout', True)
+
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    if mode not in MODES:
+        return jsonify({
+            'success': False,
+            'error': f'mode deve ser um de: {", ".join(MODES)}'
+        }), 400
+
+    if not isinstance(samples, int) or samples < 1 or samples > 20000:
+        return jsonify({
+            'success': False,
+            'error': 'samples deve estar entre 1 e 20000'
+        }), 400
+
+    if not isinstance(workers, int) or workers < 1 or workers > 8:
+        return jsonify({
+            'success': False,
+            'error': 'workers deve estar entre 1 e 8'
+        }), 400
+
+    if not mol_a_id or not mol_b_id:
+        return jsonify({
+            'success': False,
+            'error': 'IDs das moléculas são obrigatórios'
+        }), 400
+
+    molecule_a = find_molecule(mol_a_id)
+    molecule_b = find_molecule(mol_b_id)
+
+    if not molecule_a:
+        return jsonify({
+            'success': False,
+            'error': f'Molécula A ({mol_a_id}) não encontrada'
+        }), 404
+
+    if not molecule_b:
+        return jsonify({
+            'success': False,
+            'error': f'Molécula B ({mol_b_id}) não encontrada'
+        }), 404
+
+    distribution = synthesis_outcome_distribution(
+        molecule_a, molecule_b, mode=mode, samples=samples, seed=seed, workers=workers
+    )
+
+    save_id = get_active_save_id()
+    for outcome in distribution['outcomes']:
+        outcome['status'] = [get_molecule_status(save_id, product) for product in outcome['products']]
+        if with_layout:
+            for product in outcome['products']:
+                ensure_layout(product, layout_engine)
+
+    return jsonify({
+        'success': True,
+        **distribution
+    })
+
+@app.route('/api/synthesis/plan', methods=['POST'])
+def api_plan_synthesis():
+    """
+    Procura a rota de sínteses mais curta que produz uma molécula alvo
+    a partir do banco base (e das descobertas do save ativo).
+    
+    Body: {
+        'target': {...},  # Molécula alvo (ex: uma desconhecida de /api/simulate)
+        'target_id': str,  # Alternativa: ID de uma molécula conhecida
+        'include_discoveries': bool,  # Opcional (padrão true)
+        'time_budget': float,  # Opcional: segundos (padrão 5, máximo 30)
+        'max_mass': int  # Opcional: massa máxima dos intermediários
+    }
+    """
+    from core.retrosynthesis import plan_synthesis_route, DEFAULT_TIME_BUDGET
+    
+    data = request.json
+    target = data.get('target')
+    target_id = data.get('target_id')
+    include_discoveries = data.get('include_discoveries', True)
+    time_budget = data.get('time_budget', DEFAULT_TIME_BUDGET)
+    max_mass = data.get('max_mass')
+    
+    if target_id and not target:
+        target = find_molecule(target_id)
+        if not target:
+            return jsonify({
+                'success': False,
+                'error': f'Molécula alvo ({target_id}) não encontrada'
+            }), 404
+    
+    if not target or not isinstance(target, dict) or not target.get('particles'):
+        return jsonify({
+            'success': False,
+            'error': 'target ou target_id é obrigatório'
+        }), 400
+    
+    if not isinstance(time_budget, (int, float)) or time_budget <= 0 or time_budget > 30:
+        return jsonify({
+            'success': False,
+            'error': 'time_budget deve estar entre 0 e 30 segundos'
+        }), 400
+    
+    if max_mass is not None and (not isinstance(max_mass, int) or max_mass < 1):
+        return jsonify({
+            'success': False,
+            'error': 'max_mass deve ser um inteiro positivo'
+        }), 400
+    
+    sources = [(molecule['id'], molecule) for molecule in get_all_molecules()]
+    save_id = get_active_save_id()
+    if include_discoveries and save_id:
+        sources.extend(
+            (discovery['id'], discovery['molecule'])
+            for discovery in get_all_discoveries(save_id)
+            if discovery.get('molecule')
+        )
+    
+    plan = plan_synthesis_route(target, sources, time_budget=time_budget, max_mass=max_mass)
+    
+    return jsonify({
+        'success': True,
+        **plan
+    })
+
+@app.route('/api/synthesis/recommendations', methods=['GET'])
+def api_recommend_synthesis_pairs():
+    """
+    Recomenda os pares (A, B) do save ativo com maior chance de gerar
+    moléculas ainda não descobertas, sem executar sínteses.
+    
+    Query: ?k=10 (máximo 100)
+    """
+    from core.pair_recommender import recommend_pairs, DEFAULT_TOP_K
+    from data.network_updater import schedule_update
+    from data.reaction_networks import get_network, save_scope
+    
+    save_id = get_active_save_id()
+    if not save_id:
+        return jsonify({
+            'success': False,
+            'error': 'Nenhum save ativo'
+        }), 400
+    
+    top_k = request.args.get('k', DEFAULT_TOP_K, type=int)
+    if top_k is None or top_k < 1 or top_k > 100:
+        return jsonify({
+            'success': False,
+            'error': 'k deve estar entre 1 e 100'
+        }), 400
+    
+    known = [(molecule['id'], molecule) for molecule in get_all_molecules()]
+    known.extend(
+        (discovery['id'], discovery['molecule'])
+        for discovery in get_all_discoveries(save_id)
+        if discovery.get('molecule')
+    )
+    
+    # Saves ainda sem rede: previsões agora, resultados exatos após o aquecimento
+    network = get_network(save_scope(save_id))
+    if network is None:
+        schedule_update(save_id)
+    
+    recommendation = recommend_pairs(known, network, top_k)
+    
+    # Identificação das moléculas para a tela de síntese
+    molecules = dict(known)
+    for item in recommendation['recommendations']:
+        for side in ('molecule_a', 'molecule_b'):
+            molecule = molecules[item[side]]
+            item[side] = {
+                'id': item[side],
+                'formula': calculate_molecule_properties(molecule).get('formula', '?'),
+                'mass': len(molecule.get('particles', []))
+            }
+    
+    return jsonify({
+        'success': True,
+        'count': len(recommendation['recommendations']),
+        'data': recommendation['recommendations'],
+        'details': recommendation['details']
     })
 
 @app.route('/api/synthesis/results', methods=['GET'])
 def api_get_synthesis_results():
     """Retorna todos os resultados de síntese armazenados"""
     results = get_all_results()
+    for result in results.values():
+        ensure_result_layout(result)
     return jsonify({
         'success': True,
         'count': len(results),
@@ -203,7 +617,8 @@ def api_get_synthesis_stats():
     stats = get_stats()
     return jsonify({
         'success': True,
-        'data': stats
+        'data': stats,
+        'single_flight': get_single_flight_stats()
     })
 
 @app.route('/api/synthesis/cache/clear', methods=['DELETE'])
@@ -223,27 +638,53 @@ def api_auto_synthesis():
     Body: {
         'molecule_a_id': str,  # ID da molécula base
         'molecule_ids': [str] | null,  # Lista de IDs ou null para filtrar por massa
-        'filter_mass': int | null  # Se fornecido, filtra moléculas por esta massa
+        'filter_mass': int | null,  # Se fornecido, filtra moléculas por esta massa
+        'layout': bool,  # Opcional (padrão true). false = produtos sem coordenadas
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
     }
     """
-    data = request.json
+    params, error, status_code = resolve_auto_synthesis_request(request.json)
+    if error:
+        return jsonify({'success': False, 'error': error}), status_code
+    
+    # Realizar todas as sínteses
+    mol_a_id = params['molecule_a_id']
+    syntheses = []
+    
+    for mol_b in params['molecules_b']:
+        mol_b_id = mol_b.get('id', 'unknown')
+        
+        # Cache ou síntese (pedidos simultâneos do mesmo par calculam uma vez)
+        cache_key = f"{mol_a_id}+{mol_b_id}"
+        result, _ = get_or_compute_synthesis(
+            cache_key,
+            lambda: synthesize(params['molecule_a'], mol_b)
+        )
+        
+        syntheses.append(result)
+    
+    return jsonify(build_auto_synthesis_response(params, syntheses, get_active_save_id()))
+
+def resolve_auto_synthesis_request(data):
+    """
+    Valida o body de uma síntese automática e busca as moléculas.
+    Returns: (parâmetros, None, None) ou (None, mensagem de erro, status HTTP)
+    """
     mol_a_id = data.get('molecule_a_id')
     molecule_ids = data.get('molecule_ids')  # Lista específica de IDs
     filter_mass = data.get('filter_mass')  # Filtrar por massa
     
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return None, error, 400
+    
     if not mol_a_id:
-        return jsonify({
-            'success': False,
-            'error': 'ID da molécula A é obrigatório'
-        }), 400
+        return None, 'ID da molécula A é obrigatório', 400
     
     # Buscar molécula A
     molecule_a = find_molecule(mol_a_id)
     if not molecule_a:
-        return jsonify({
-            'success': False,
-            'error': f'Molécula A ({mol_a_id}) não encontrada'
-        }), 404
+        return None, f'Molécula A ({mol_a_id}) não encontrada', 404
     
     # Determinar lista de moléculas B
     molecules_b = []
@@ -259,50 +700,39 @@ def api_auto_synthesis():
         molecules_by_mass = get_molecules_by_mass(filter_mass)
         molecules_b = molecules_by_mass.copy()
         
-        # Adicionar descobertas da mesma massa
+        # Adicionar descobertas da mesma massa (índice por massa do save)
         save_id = get_active_save_id()
         if save_id:
-            discoveries = get_all_discoveries(save_id)
-            for disc in discoveries:
-                mol = disc.get('molecule')
-                if mol and len(mol.get('particles', [])) == filter_mass:
-                    molecules_b.append(mol)
+            for disc in get_discoveries_by_mass(save_id, filter_mass):
+                molecules_b.append(disc['molecule'])
     else:
-        return jsonify({
-            'success': False,
-            'error': 'É necessário fornecer molecule_ids ou filter_mass'
-        }), 400
+        return None, 'É necessário fornecer molecule_ids ou filter_mass', 400
     
     if not molecules_b:
-        return jsonify({
-            'success': False,
-            'error': 'Nenhuma molécula encontrada para síntese'
-        }), 404
-    
-    # Realizar todas as sínteses
+        return None, 'Nenhuma molécula encontrada para síntese', 404
+    
+    return {
+        'molecule_a_id': mol_a_id,
+        'molecule_a': molecule_a,
+        'molecules_b': molecules_b,
+        'layout': data.get('layout', True),  # Calcular posições dos produtos
+        'layout_engine': layout_engine
+    }, None, None
+
+def build_auto_synthesis_response(params, syntheses, save_id):
+    """
+    Monta a resposta da síntese automática (layouts, status, estatísticas do save).
+    syntheses: resultados de synthesize, na ordem de params['molecules_b']
+    """
+    mol_a_id = params['molecule_a_id']
+    molecule_a = params['molecule_a']
     results = []
-    known_molecules = get_all_molecules()
-    save_id = get_active_save_id()
-    discovered_molecules = []
-    if save_id:
-        discoveries = get_all_discoveries(save_id)
-        discovered_molecules = [d.get('molecule') for d in discoveries if d.get('molecule')]
-    
-    all_known_molecules = known_molecules + discovered_molecules
     
-    for mol_b in molecules_b:
-        mol_b_id = mol_b.get('id', 'unknown')
-        
-        # Cache key para verificar resultado já calculado
-        cache_key = f"{mol_a_id}+{mol_b_id}"
-        cached = get_synthesis_result(cache_key)
-        
-        if cached:
-            result = cached
-        else:
-            # Realizar síntese
-            result = synthesize(molecule_a, mol_b)
-            save_synthesis_result(cache_key, result)
+    for mol_b, result in zip(params['molecules_b'], syntheses):
+        # Calcular posições dos produtos (a não ser que o chamador dispense).
+        # O cache não guarda coordenadas; estruturas repetidas vêm do cache de layouts
+        if params['layout']:
+            ensure_result_layout(result, params['layout_engine'])
         
         # Determinar status do resultado (se houver)
         result_status = None
@@ -318,31 +748,11 @@ def api_auto_synthesis():
                     result_status = None
                 elif not is_multiple and isinstance(result_molecule, dict):
                     # Resultado único - verificar status
-                    # Verificar se é conhecida (base)
-                    is_base = False
-                    for base_mol in known_molecules:
-                        if are_molecules_identical(result_molecule, base_mol):
-                            is_base = True
-                            break
-                    
-                    # Verificar se já foi descoberta
-                    is_discovered = False
-                    if not is_base:
-                        for disc_mol in discovered_molecules:
-                            if are_molecules_identical(result_molecule, disc_mol):
-                                is_discovered = True
-                                break
-                    
-                    if is_base:
-                        result_status = 'Base'
-                    elif is_discovered:
-                        result_status = 'Descoberta'
-                    else:
-                        result_status = 'Desconhecida'
+                    result_status = get_molecule_status(save_id, result_molecule)
         
         results.append({
             'molecule_b': {
-                'id': mol_b_id,
+                'id': mol_b.get('id', 'unknown'),
                 'formula': calculate_molecule_properties(mol_b).get('formula', '?'),
                 'mass': len(mol_b.get('particles', [])),
                 'molecule': copy.deepcopy(mol_b)  # Incluir molécula completa
@@ -353,12 +763,10 @@ def api_auto_synthesis():
     
     # Incrementar contador de sínteses bem-sucedidas
     successful_count = sum(1 for r in results if r['result'].get('success'))
-    if successful_count > 0:
-        save_id = get_active_save_id()
-        if save_id:
-            update_save_stats(save_id, syntheses_increment=successful_count)
+    if successful_count > 0 and save_id:
+        update_save_stats(save_id, syntheses_increment=successful_count)
     
-    return jsonify({
+    return {
         'success': True,
         'molecule_a': {
             'id': mol_a_id,
@@ -369,7 +777,7 @@ def api_auto_synthesis():
         'total_tested': len(results),
         'total_successful': successful_count,
         'results': results
-    })
+    }
 
 # ============================================
 # DISCOVERIES ROUTES
@@ -414,7 +822,6 @@ def api_save_discovery():
         }), 400
     
     # Verificar se já existe
-    from data.discovered_molecules import molecule_exists_in_discoveries
     if molecule_exists_in_discoveries(save_id, molecule):
         return jsonify({
             'success': False,
@@ -578,6 +985,9 @@ def api_delete_save(save_id):
 # PROPERTIES ROUTES
 # ============================================
 
+# Propriedades observáveis em andamento por (save, molécula)
+_observable_flights = SingleFlight('observable_properties')
+
 @app.route('/api/properties/profile', methods=['GET'])
 def api_get_property_profile():
     """Retorna o perfil de propriedades do save ativo (sabores, cores, efeitos)"""
@@ -655,6 +1065,7 @@ def api_regenerate_property_profile():
 def api_get_observable_properties():
     """Retorna as propriedades observáveis de uma molécula (sabor, aparência, efeitos)"""
     from core.molecule_properties import calculate_molecule_observable_properties
+    from core.molecule_features import strip_molecule_features
     from core.property_profiles import get_or_create_profile
     
     data = request.json
@@ -666,13 +1077,21 @@ def api_get_observable_properties():
             'error': 'Molécula é obrigatória'
         }), 400
     
+    # Características enviadas pelo cliente não são confiáveis: recalcular
+    molecule = strip_molecule_features(molecule)
+    
     try:
         # Obter perfil do save para calcular efeitos
         save_id = get_active_save_id()
         profile = get_or_create_profile(save_id) if save_id else None
         
-        # Calcular todas as propriedades observáveis
-        observable_props = calculate_molecule_observable_properties(molecule, profile)
+        # Calcular todas as propriedades observáveis (pedidos simultâneos
+        # da mesma molécula no mesmo save compartilham o cálculo, mesmo com
+        # partículas em outra ordem ou com outros ids)
+        observable_props, _ = _observable_flights.run(
+            (save_id, canonical_key(molecule)),
+            calculate_molecule_observable_properties, molecule, profile
+        )
         
         return jsonify({
             'success': True,
@@ -688,6 +1107,9 @@ def api_get_observable_properties():
 # SIMULATION ROUTES
 # ============================================
 
+# Gerações em andamento por (particle_type, mass)
+_simulation_flights = SingleFlight('simulate')
+
 @app.route('/api/simulate', methods=['POST'])
 def api_simulate():
     """
@@ -695,73 +1117,74 @@ def api_simulate():
     
     Body: {
         'particle_type': int (1, 2, 3, 4),
-        'mass': int
+        'mass': int,
+        'layout': bool,  # Opcional (padrão true). false = moléculas sem coordenadas
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
     }
     """
-    data = request.json
+    params, error = parse_simulate_request(request.json)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    # Gerar moléculas (pedidos simultâneos iguais compartilham a geração)
+    result, _ = _simulation_flights.run(
+        (params['particle_type'], params['mass']),
+        generate_molecules, params['particle_type'], params['mass']
+    )
+    annotate_generated_molecules(result, params['layout'], params['layout_engine'])
+    
+    return jsonify(result)
+
+def parse_simulate_request(data):
+    """
+    Valida o body de uma simulação.
+    Returns: (parâmetros, None) ou (None, mensagem de erro)
+    """
     particle_type = data.get('particle_type')
     target_mass = data.get('mass')
     
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return None, error
+    
     if particle_type is None or target_mass is None:
-        return jsonify({
-            'success': False,
-            'error': 'Parâmetros particle_type e mass são obrigatórios'
-        }), 400
+        return None, 'Parâmetros particle_type e mass são obrigatórios'
     
     # Validar inputs (0 = qualquer tipo)
     if particle_type not in [0, 1, 2, 3, 4]:
-        return jsonify({
-            'success': False,
-            'error': 'particle_type deve ser 0 (qualquer), 1, 2, 3 ou 4'
-        }), 400
+        return None, 'particle_type deve ser 0 (qualquer), 1, 2, 3 ou 4'
     
     if target_mass <= 0:
-        return jsonify({
-            'success': False,
-            'error': 'mass deve ser maior que 0'
-        }), 400
-    
-    # Gerar moléculas
-    result = generate_molecules(particle_type, target_mass)
-    
-    # Buscar todas as moléculas conhecidas do banco de dados base
-    known_molecules = get_all_molecules()
-    
-    # Buscar todas as descobertas do save ativo
+        return None, 'mass deve ser maior que 0'
+    
+    return {
+        'particle_type': particle_type,
+        'mass': target_mass,
+        'layout': data.get('layout', True),
+        'layout_engine': layout_engine
+    }, None
+
+def annotate_generated_molecules(result, with_layout, layout_engine):
+    """Adiciona posições, propriedades estruturais e status às moléculas geradas"""
     save_id = get_active_save_id()
-    discovered_molecules = []
-    if save_id:
-        discoveries = get_all_discoveries(save_id)
-        discovered_molecules = [d.get('molecule') for d in discoveries if d.get('molecule')]
     
-    # Adicionar propriedades estruturais e verificar status de cada molécula
     if result['success'] and result['molecules']:
         for molecule in result['molecules']:
+            # Posições calculadas apenas para as moléculas únicas que serão desenhadas
+            if with_layout:
+                ensure_layout(molecule, layout_engine)
+            
             props = get_molecule_properties(molecule)
             molecule['properties'] = props
             
-            # Verificar se a molécula está no banco de dados base
-            is_base = False
-            for base_mol in known_molecules:
-                if are_molecules_identical(molecule, base_mol):
-                    is_base = True
-                    break
-            
-            # Verificar se a molécula já foi descoberta pelo jogador
-            is_discovered = False
-            if not is_base:
-                for disc_mol in discovered_molecules:
-                    if are_molecules_identical(molecule, disc_mol):
-                        is_discovered = True
-                        break
-            
-            # Definir status
-            if is_base:
+            # Status: base, já descoberta pelo jogador ou desconhecida
+            status = get_molecule_status(save_id, molecule)
+            if status == 'Base':
                 molecule['status'] = 'Base'
                 molecule['is_known'] = True
                 molecule['is_base'] = True
                 molecule['is_discovered'] = False
-            elif is_discovered:
+            elif status == 'Descoberta':
                 molecule['status'] = 'Descoberta'
                 molecule['is_known'] = True
                 molecule['is_base'] = False
@@ -772,6 +1195,108 @@ def api_simulate():
                 molecule['is_base'] = False
                 molecule['is_discovered'] = False
     
+    return result
+
+@app.route('/api/simulate/constrained', methods=['POST'])
+def api_simulate_constrained():
+    """
+    Gera apenas as moléculas de uma massa que contêm padrões de ligação exigidos
+    (ex: os requisitos de um efeito do perfil do save) e nenhum dos proibidos.
+    A busca parte das ligações exigidas, então funciona em massas onde
+    /api/simulate é inviável.
+    
+    Body: {
+        'mass': int,  # Até MAX_CONSTRAINED_MASS
+        'effect': str,  # Opcional: usa os padrões deste efeito no perfil do save ativo
+        'required': [[tipo1, pol1, tipo2, pol2, mult], ...],  # Opcional: padrões exigidos
+        'forbidden': [[tipo1, pol1, tipo2, pol2, mult], ...],  # Opcional: padrões proibidos
+        'forbidden_effects': [str],  # Opcional: padrões destes efeitos ficam proibidos
+        'particle_type': int,  # Opcional (0 = qualquer, 1-4)
+        'max_results': int,  # Opcional (padrão 200)
+        'layout': bool,  # Opcional (padrão true)
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
+    }
+    """
+    from core.constrained_generator import (
+        generate_constrained_molecules, MAX_CONSTRAINED_MASS, DEFAULT_MAX_RESULTS
+    )
+    
+    data = request.json
+    target_mass = data.get('mass')
+    effect = data.get('effect')
+    required = list(data.get('required') or [])
+    forbidden = list(data.get('forbidden') or [])
+    forbidden_effects = data.get('forbidden_effects') or []
+    particle_type = data.get('particle_type', 0)
+    max_results = data.get('max_results', DEFAULT_MAX_RESULTS)
+    with_layout = data.get('layout', True)
+    
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    if not isinstance(target_mass, int) or target_mass < 2 or target_mass > MAX_CONSTRAINED_MASS:
+        return jsonify({
+            'success': False,
+            'error': f'mass deve ser um inteiro entre 2 e {MAX_CONSTRAINED_MASS}'
+        }), 400
+    
+    if particle_type not in [0, 1, 2, 3, 4]:
+        return jsonify({
+            'success': False,
+            'error': 'particle_type deve ser 0 (qualquer), 1, 2, 3 ou 4'
+        }), 400
+    
+    if not isinstance(max_results, int) or max_results < 1:
+        return jsonify({
+            'success': False,
+            'error': 'max_results deve ser um inteiro positivo'
+        }), 400
+    
+    # Padrões de efeitos vêm do perfil do save ativo
+    if effect or forbidden_effects:
+        from core.property_profiles import get_or_create_profile
+        
+        save_id = get_active_save_id()
+        if not save_id:
+            return jsonify({
+                'success': False,
+                'error': 'Nenhum save ativo'
+            }), 400
+        
+        effect_patterns = get_or_create_profile(save_id).get('effect_patterns', {})
+        for name in ([effect] if effect else []) + list(forbidden_effects):
+            if name not in effect_patterns:
+                return jsonify({
+                    'success': False,
+                    'error': f'Efeito desconhecido: {name}'
+                }), 400
+        
+        if effect:
+            required.extend(effect_patterns[effect])
+        for name in forbidden_effects:
+            forbidden.extend(effect_patterns[name])
+    
+    if not required:
+        return jsonify({
+            'success': False,
+            'error': 'Informe effect ou ao menos um padrão em required'
+        }), 400
+    
+    try:
+        result = generate_constrained_molecules(
+            target_mass, required, forbidden,
+            particle_type=particle_type,
+            max_results=max_results
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    annotate_generated_molecules(result, with_layout, layout_engine)
+    
     return jsonify(result)
 
 # ============================================
@@ -786,39 +1311,51 @@ def api_builder_validate():
     
     Body: {
         'molecule': {...},  # Molécula em JSON
-        'actions': ['validate', 'reorganize', 'analyze']  # Ações a executar
+        'actions': ['validate', 'reorganize', 'analyze'],  # Ações a executar
+        'layout_engine': str  # Opcional: 'heuristic' (padrão) ou 'stress'
     }
     """
     data = request.json
     molecule = data.get('molecule')
     actions = data.get('actions', ['validate'])
     
+    layout_engine, error = parse_layout_engine(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
     if not molecule:
         return jsonify({
             'success': False,
             'error': 'Molécula não fornecida'
         }), 400
     
+    # Entrada malformada vira erro de validação (não 500); a chave canônica
+    # só é anexada a uma cópia de uma molécula válida
+    validation = validate_batch([molecule])[0]
+    response_molecule = copy.deepcopy(molecule)
+    if validation['valid']:
+        attach_canonical_key(response_molecule)
+    
     result = {
         'success': True,
-        'molecule': molecule,
+        'molecule': response_molecule,
         'results': {}
     }
     
     # Ação: Validar
     if 'validate' in actions:
-        is_valid, errors = validate_molecule(molecule)
+        errors = validation['errors']
         result['results']['validation'] = {
-            'valid': is_valid,
+            'valid': validation['valid'],
             'reason': '; '.join(errors) if errors else 'Molécula válida',
-            'details': errors if errors else []
+            'details': errors
         }
     
     # Ação: Reorganizar posições
     if 'reorganize' in actions:
         try:
             molecule_copy = copy.deepcopy(molecule)
-            reorganize_positions(molecule_copy)
+            reorganize_positions(molecule_copy, layout_engine)
             result['results']['reorganized'] = molecule_copy
         except Exception as e:
             result['results']['reorganize_error'] = str(e)
@@ -892,7 +1429,7 @@ def api_builder_rebond():
         
         return jsonify({
             'success': True,
-            'molecule': result,
+            'molecule': attach_canonical_key(result),
             'all_stable': all_stable,
             'message': 'Ligações criadas com sucesso!' if all_stable else 'Ligações criadas, mas algumas partículas ainda instáveis'
         })
@@ -904,6 +1441,360 @@ def api_builder_rebond():
             'error': str(e)
         }), 500
 
+# ============================================
+# REACTION NETWORK ROUTES
+# ============================================
+
+# Massa máxima aceita pela API (o fecho cresce rapidamente: massa 8 ~ 450 moléculas)
+MAX_NETWORK_MASS = 8
+
+@app.route('/api/network/compute', methods=['POST'])
+def api_compute_reaction_network():
+    """
+    Calcula (e persiste) o fecho da rede de reações a partir do banco base,
+    em segundo plano: retorna o job imediatamente (202), como /api/jobs com
+    kind 'network'. O resumo e as rodadas ficam no resultado do job.
+
+    Body: {
+        'max_mass': int,  # Opcional (padrão 6, máximo MAX_NETWORK_MASS)
+        'max_rounds': int,  # Opcional: limite de rodadas
+        'workers': int,  # Opcional: processos do pool (padrão 1, máximo 8)
+        'socket_id': str  # Opcional: eventos só para este cliente Socket.IO
+    }
+    """
+    data = request.json or {}
+    params, error = parse_network_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    try:
+        job = _submit_network_job(params, data.get('socket_id'))
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+
+    return jsonify({'success': True, 'job': job}), 202
+
+def parse_network_request(data):
+    """
+    Valida o body de um cálculo da rede de reações.
+    Returns: (parâmetros, None) ou (None, mensagem de erro)
+    """
+    from core.reaction_network import DEFAULT_MAX_MASS
+
+    max_mass = data.get('max_mass', DEFAULT_MAX_MASS)
+    max_rounds = data.get('max_rounds')
+    workers = data.get('workers', 1)
+
+    if not isinstance(max_mass, int) or max_mass < 1 or max_mass > MAX_NETWORK_MASS:
+        return None, f'max_mass deve estar entre 1 e {MAX_NETWORK_MASS}'
+
+    if max_rounds is not None and (not isinstance(max_rounds, int) or max_rounds < 0):
+        return None, 'max_rounds deve ser um inteiro não negativo'
+
+    if not isinstance(workers, int) or workers < 1 or workers > 8:
+        return None, 'workers deve estar entre 1 e 8'
+
+    return {'max_mass': max_mass, 'max_rounds': max_rounds, 'workers': workers}, None
+
+@app.route('/api/network', methods=['GET'])
+def api_get_reaction_network():
+    """
+    Retorna a rede de reações persistida.
+
+    Query: ?full=true para moléculas e reações (padrão: apenas o resumo)
+    """
+    from core.reaction_network import summarize_network
+    from data.reaction_networks import get_network, BASE_NETWORK
+
+    network = get_network(BASE_NETWORK)
+    if network is None:
+        return jsonify({
+            'success': False,
+            'error': 'Rede ainda não calculada (POST /api/network/compute)'
+        }), 404
+
+    full = request.args.get('full', 'false').lower() == 'true'
+
+    return jsonify({
+        'success': True,
+        'data': summarize_network(network),
+        'rounds': network['rounds'],
+        'network': network if full else None
+    })
+
+@app.route('/api/network/save', methods=['GET'])
+def api_get_save_reaction_network():
+    """
+    Retorna a rede incremental do save ativo (atualizada em segundo plano
+    a cada descoberta) e o estado do atualizador.
+
+    Query: ?full=true para moléculas e reações (padrão: apenas o resumo)
+    """
+    from core.reaction_network import summarize_network
+    from data.network_updater import get_updater_stats
+    from data.reaction_networks import get_network, save_scope
+
+    save_id = get_active_save_id()
+    if not save_id:
+        return jsonify({
+            'success': False,
+            'error': 'Nenhum save ativo'
+        }), 400
+
+    network = get_network(save_scope(save_id))
+    full = request.args.get('full', 'false').lower() == 'true'
+
+    return jsonify({
+        'success': True,
+        'data': summarize_network(network) if network else None,
+        'rounds': network['rounds'] if network else [],
+        'network': network if full else None,
+        'updater': get_updater_stats()
+    })
+
+# ============================================
+# JOBS ROUTES (cálculos longos em segundo plano)
+# ============================================
+
+JOB_KINDS = ('simulate', 'synthesis_auto', 'network')
+
+# Pares de síntese por tarefa do pool (granularidade do progresso)
+AUTO_SYNTHESIS_CHUNK_SIZE = 25
+
+def _emit_job_event(event, job):
+    """Repassa eventos dos jobs via Socket.IO (ao cliente dono, se informado)"""
+    if job.get('owner'):
+        socketio.emit(event, job, to=job['owner'])
+    else:
+        socketio.emit(event, job)
+
+set_job_listener(_emit_job_event)
+
+def _submit_simulate_job(params, owner):
+    from core.generator import (
+        build_generation_result, check_generation_mass,
+        generate_for_type_combinations, get_type_combinations
+    )
+    from core.jobs import submit_job
+    
+    particle_type = params['particle_type']
+    mass = params['mass']
+    
+    # Uma tarefa por combinação de tipos: progresso e cancelamento por combinação
+    # (mesmo resultado de generate_molecules - ver generate_for_type_combinations)
+    error = check_generation_mass(mass)
+    type_combinations = [] if error else get_type_combinations(particle_type, mass)
+    tasks = [(generate_for_type_combinations, ([combo], mass)) for combo in type_combinations]
+    
+    def finalize(results):
+        if error:
+            return error
+        molecules = [molecule for chunk, _ in results for molecule in chunk]
+        attempted = sum(count for _, count in results)
+        result = build_generation_result(particle_type, mass, type_combinations, molecules, attempted)
+        return annotate_generated_molecules(result, params['layout'], params['layout_engine'])
+    
+    return submit_job('simulate', tasks, finalize, params=params, owner=owner)
+
+def _submit_network_job(params, owner):
+    from core.jobs import submit_job
+    from core.reaction_network import compute_reaction_network, summarize_network
+    from data.reaction_networks import save_network, BASE_NETWORK
+    
+    # Rodadas dependentes entre si: o fecho inteiro é uma tarefa (o pool
+    # próprio do cálculo, com workers > 1, é criado no processo da tarefa)
+    sources = [(molecule['id'], molecule) for molecule in get_all_molecules()]
+    tasks = [(compute_reaction_network, (
+        sources, params['max_mass'], params['max_rounds'], params['workers']
+    ))]
+    
+    def finalize(results):
+        network = results[0]
+        save_network(network, BASE_NETWORK)
+        return {'data': summarize_network(network), 'rounds': network['rounds']}
+    
+    return submit_job('network', tasks, finalize, params=params, owner=owner)
+
+def _submit_auto_synthesis_job(params, owner):
+    from core.jobs import submit_job, synthesize_pairs
+    from data.synthesis_results import (
+        get_cache_key,
+        get_synthesis_results,
+        claim_syntheses,
+        complete_syntheses,
+        release_syntheses
+    )
+    
+    # Mesmas chaves da síntese automática síncrona; pares em cache não vão ao pool
+    save_id = get_active_save_id()
+    mol_a_id = params['molecule_a_id']
+    molecule_a = params['molecule_a']
+    keys = []
+    molecule_b_by_key = {}
+    for mol_b in params['molecules_b']:
+        mol_b_id = mol_b.get('id', 'unknown')
+        key = get_cache_key(mol_a_id, mol_b_id, save_id) if save_id else f"{mol_a_id}+{mol_b_id}"
+        keys.append(key)
+        molecule_b_by_key.setdefault(key, mol_b)
+    
+    cached = get_synthesis_results(keys)
+    missing = [key for key in dict.fromkeys(keys) if not cached.get(key)]
+    chunks = [
+        missing[start:start + AUTO_SYNTHESIS_CHUNK_SIZE]
+        for start in range(0, len(missing), AUTO_SYNTHESIS_CHUNK_SIZE)
+    ]
+    tasks = [
+        (synthesize_pairs, ([(molecule_a, molecule_b_by_key[key]) for key in chunk],))
+        for chunk in chunks
+    ]
+    
+    # Chaves de cada trecho reservadas só quando a tarefa vai ao pool e
+    # publicadas quando ela termina: um pedido síncrono do mesmo par espera
+    # no máximo um trecho em execução, não o job inteiro
+    claimed = {}
+    
+    def before_task(index):
+        claimed[index] = claim_syntheses(chunks[index])
+    
+    def after_task(index, chunk_results):
+        complete_syntheses(claimed.pop(index), dict(zip(chunks[index], chunk_results)))
+    
+    def cleanup():
+        # Cancelamento ou falha: quem espera os trechos pendentes calcula de novo
+        for chunk_claimed in claimed.values():
+            release_syntheses(chunk_claimed)
+        claimed.clear()
+    
+    def finalize(results):
+        computed = {}
+        for chunk, chunk_results in zip(chunks, results):
+            computed.update(zip(chunk, chunk_results))
+        syntheses = [computed[key] if key in computed else cached[key] for key in keys]
+        return build_auto_synthesis_response(params, syntheses, save_id)
+    
+    summary = {
+        'molecule_a_id': mol_a_id,
+        'molecules_b': len(keys),
+        'cached': len(keys) - len(missing),
+        'layout': params['layout'],
+        'layout_engine': params['layout_engine']
+    }
+    return submit_job(
+        'synthesis_auto', tasks, finalize, params=summary, owner=owner,
+        cleanup=cleanup, before_task=before_task, after_task=after_task
+    )
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """
+    Inicia um cálculo longo em segundo plano e retorna imediatamente (202).
+    
+    Body: {
+        'kind': 'simulate' | 'synthesis_auto' | 'network',
+        'params': {...},  # Mesmo body de /api/simulate, /api/synthesis/auto ou /api/network/compute
+        'socket_id': str  # Opcional: eventos só para este cliente Socket.IO
+    }
+    
+    Eventos Socket.IO: 'job_progress' e 'job_finished' (sem o resultado;
+    buscar com GET /api/jobs/<job_id>)
+    
+    Progresso e cancelamento são por tarefa: simulação = uma tarefa por
+    combinação de tipos de partículas; síntese automática = até
+    AUTO_SYNTHESIS_CHUNK_SIZE pares por tarefa; rede = uma única tarefa.
+    Uma tarefa já em execução termina antes de o cancelamento liberar o pool.
+    """
+    data = request.json or {}
+    kind = data.get('kind')
+    job_params = data.get('params') or {}
+    owner = data.get('socket_id')
+    
+    if kind not in JOB_KINDS:
+        return jsonify({
+            'success': False,
+            'error': f'kind deve ser um de: {", ".join(JOB_KINDS)}'
+        }), 400
+    
+    if kind == 'simulate':
+        params, error = parse_simulate_request(job_params)
+        status_code = 400
+    elif kind == 'network':
+        params, error = parse_network_request(job_params)
+        status_code = 400
+    else:
+        params, error, status_code = resolve_auto_synthesis_request(job_params)
+    if error:
+        return jsonify({'success': False, 'error': error}), status_code
+    
+    try:
+        if kind == 'simulate':
+            job = _submit_simulate_job(params, owner)
+        elif kind == 'network':
+            job = _submit_network_job(params, owner)
+        else:
+            job = _submit_auto_synthesis_job(params, owner)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    
+    return jsonify({'success': True, 'job': job}), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def api_list_jobs():
+    """Lista os jobs retidos (sem resultados). Query: ?kind="""
+    from core.jobs import list_jobs, get_job_stats
+    
+    return jsonify({
+        'success': True,
+        'jobs': list_jobs(request.args.get('kind')),
+        'stats': get_job_stats()
+    })
+
+@app.route('/api/jobs/<string:job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """Estado de um job; inclui o resultado quando terminado"""
+    from core.jobs import get_job
+    
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job não encontrado (ou já descartado)'
+        }), 404
+    
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/jobs/<string:job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    """Cancela um job em andamento"""
+    from core.jobs import cancel_job
+    
+    cancelled = cancel_job(job_id)
+    if cancelled is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job não encontrado (ou já descartado)'
+        }), 404
+    if not cancelled:
+        return jsonify({
+            'success': False,
+            'error': 'Job já terminado'
+        }), 409
+    
+    return jsonify({'success': True, 'message': 'Job cancelado'})
+
+# ============================================
+# STORAGE ROUTES
+# ============================================
+
+@app.route('/api/storage/stats', methods=['GET'])
+def api_get_storage_stats():
+    """Retorna estatísticas de escrita dos arquivos JSON (inclui amplificação evitada)"""
+    from data.storage import get_write_stats
+    
+    return jsonify({
+        'success': True,
+        'data': get_write_stats()
+    })
+
 # ============================================
 # WEBSOCKET EVENTS
 # ============================================
@@ -916,6 +1807,7 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print('❌ Cliente desconectado!')
+    _builder_sessions.pop(request.sid, None)
 
 @socketio.on('enviar_mensagem')
 def handle_message(data):
@@ -925,6 +1817,80 @@ def handle_message(data):
     resposta = f'Servidor recebeu: "{mensagem_recebida}"'
     emit('resposta', {'message': resposta})
 
+# Sessões do construtor de moléculas (uma por conexão)
+_builder_sessions = {}
+
+@socketio.on('builder_start')
+def handle_builder_start(data=None):
+    """
+    Inicia (ou reinicia) a sessão incremental do construtor.
+    Body: {'molecule': {...}} (opcional - começa vazia)
+    Emite 'builder_state' com o estado completo de validação.
+    """
+    from core.builder_session import BuilderSession
+    
+    molecule = (data or {}).get('molecule')
+    try:
+        session = BuilderSession(molecule)
+    except (ValueError, TypeError, KeyError) as e:
+        emit('builder_error', {'error': str(e)})
+        return
+    
+    _builder_sessions[request.sid] = session
+    emit('builder_state', session.full_state())
+
+@socketio.on('builder_edit')
+def handle_builder_edit(data):
+    """
+    Aplica edições à molécula da sessão.
+    Body: {'edits': [{'op': 'add_particle' | 'remove_particle' | 'update_particle' |
+                      'add_bond' | 'remove_bond' | 'load', ...}]} ou uma única edição
+    Emite 'builder_delta' apenas com o estado de validação que mudou.
+    """
+    session = _builder_sessions.get(request.sid)
+    if session is None:
+        emit('builder_error', {'error': 'Sessão do construtor não iniciada (builder_start)'})
+        return
+    
+    data = data or {}
+    edits = data.get('edits', [data])
+    if not isinstance(edits, list):
+        emit('builder_error', {'error': 'edits deve ser uma lista'})
+        return
+    
+    emit('builder_delta', session.apply_edits(edits))
+
+@socketio.on('builder_snapshot')
+def handle_builder_snapshot(data=None):
+    """
+    Molécula completa da sessão com a validação detalhada (mesmas mensagens
+    de /api/molecule/validate). Emite 'builder_snapshot'.
+    """
+    session = _builder_sessions.get(request.sid)
+    if session is None:
+        emit('builder_error', {'error': 'Sessão do construtor não iniciada (builder_start)'})
+        return
+    
+    with session.lock:
+        molecule = session.to_molecule()
+        summary = session.summary()
+    is_valid, errors = validate_molecule(molecule)
+    attach_canonical_key(molecule)
+    emit('builder_snapshot', {
+        'molecule': molecule,
+        'summary': summary,
+        'validation': {
+            'valid': is_valid,
+            'reason': '; '.join(errors) if errors else 'Molécula válida',
+            'details': errors
+        }
+    })
+
+@socketio.on('builder_end')
+def handle_builder_end(data=None):
+    """Encerra a sessão do construtor"""
+    _builder_sessions.pop(request.sid, None)
+
 # ============================================
 # INICIAR SERVIDOR
 # ============================================
@@ -934,15 +1900,3 @@ if __name__ == '__main__':
     print('📡 WebSocket habilitado')
     print('🌐 Acesse: http://localhost:5000')
     socketio.run(app, debug=True, host='0.0.0.0', port=5000, allow_unsafe_werkzeug=True)
-
-  
- 
-   
- 
-   
- 
-   
- 
-   
- 
- 
\ No newline at end of file
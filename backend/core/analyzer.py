@@ -7,7 +7,7 @@ Detecta propriedades estruturais das moléculas:
 - Grau de ramificação
 """
 
-from collections import deque
+from .graph import build_adjacency, find_cycle
 
 
 def analyze_molecule(molecule):
@@ -30,10 +30,7 @@ def analyze_molecule(molecule):
         raise ValueError(f'Molécula inválida: deve ter pelo menos 2 partículas (atual: {len(particles)})')
     
     # Construir grafo de adjacências
-    adjacency = {p['id']: [] for p in particles}
-    for bond in bonds:
-        adjacency[bond['from']].append(bond['to'])
-        adjacency[bond['to']].append(bond['from'])
+    adjacency = build_adjacency(particles, bonds)
     
     # Calcular graus (número de conexões de cada partícula)
     degrees = {pid: len(neighbors) for pid, neighbors in adjacency.items()}
@@ -63,37 +60,9 @@ def detect_cycle_info(adjacency, particles):
     
     Returns: (has_cycle: bool, cycle_size: int or None)
     """
-    if len(particles) < 3:
-        return False, None
-    
-    visited = set()
-    parent = {}
-    
-    def dfs(node, par):
-        visited.add(node)
-        parent[node] = par
-        
-        for neighbor in adjacency[node]:
-            if neighbor not in visited:
-                result = dfs(neighbor, node)
-                if result[0]:
-                    return result
-            elif neighbor != par:
-                # Ciclo encontrado - calcular tamanho
-                cycle_nodes = [neighbor, node]
-                current = node
-                while parent[current] != neighbor and parent[current] is not None:
-                    current = parent[current]
-                    cycle_nodes.insert(1, current)
-                return True, len(cycle_nodes)
-        return False, None
-    
-    for particle in particles:
-        if particle['id'] not in visited:
-            has_cycle, size = dfs(particle['id'], None)
-            if has_cycle:
-                return has_cycle, size
-    
+    cycle = find_cycle(adjacency, particles)
+    if cycle:
+        return True, len(cycle)
     return False, None
 
 
@@ -172,12 +141,13 @@ def get_molecule_properties(molecule):
     }
     """
     from data.molecules import calculate_molecule_properties
+    from .molecule_features import get_molecule_features
     
     # Propriedades básicas
     basic_props = calculate_molecule_properties(molecule)
     
-    # Características estruturais
-    structural = analyze_molecule(molecule)
+    # Características estruturais (pré-computadas quando disponíveis)
+    structural = get_molecule_features(molecule)['analysis']
     
     # Combinar
     return {
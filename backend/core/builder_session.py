@@ -0,0 +1,469 @@
+"""
+Sessão Incremental do Construtor de Moléculas
+
+Mantém a molécula do construtor no servidor e aplica edições (adicionar/
+remover partículas e ligações, alterar tipo/polaridade) atualizando o estado
+de validação incrementalmente, em vez de revalidar tudo a cada edição:
+
+- conexões de cada partícula e estado (estável / instável / excedida)
+- polaridades por tipo (regra: mesmo tipo, mesma polaridade)
+- violações de cada ligação (mesmo tipo / mesma polaridade)
+- componentes conexos: junção do menor no maior ao ligar; ao remover uma
+  ligação, BFS apenas no componente afetado
+- conexões faltantes por (tipo, polaridade) para a regra de estabilização
+
+Cada edição devolve apenas o que mudou desde a última resposta. O estado
+'valid' coincide com validate_molecule sobre a molécula montada (to_molecule).
+"""
+
+import threading
+import time
+from data.molecules import PARTICLE_TYPES
+
+STATUS_STABLE = 'stable'
+STATUS_UNSTABLE = 'unstable'
+STATUS_EXCEEDED = 'exceeded'
+
+VIOLATION_SAME_TYPE = 'same_type'
+VIOLATION_SAME_POLARITY = 'same_polarity'
+
+
+def _bond_key(id_a, id_b):
+    return (id_a, id_b) if id_a <= id_b else (id_b, id_a)
+
+
+class BuilderSession:
+    """Molécula do construtor com estado de validação mantido a cada edição"""
+
+    def __init__(self, molecule=None):
+        self.lock = threading.Lock()
+        self._reset()
+        if molecule:
+            self.load(molecule)
+
+    def _reset(self):
+        self.particles = {}       # id -> {'type', 'polarity', ...}
+        self.bonds = {}           # (id_a, id_b) ordenado -> multiplicidade
+        self.adjacency = {}       # id -> conjunto de vizinhos
+        self.degree = {}          # id -> conexões (soma das multiplicidades)
+        self.component = {}       # id -> rótulo do componente
+        self.members = {}         # rótulo -> conjunto de ids
+        self.polarity_counts = {}  # tipo -> {'+': n, '-': n}
+        self.missing_by_class = {}  # (tipo, polaridade) -> conexões faltantes
+        self.not_stable = set()
+        self.bad_bonds = {}       # chave da ligação -> [violações]
+        self._next_label = 0
+        self._dirty_particles = set()
+        self._dirty_bonds = set()
+        self._emitted_particles = {}
+        self._emitted_bonds = {}
+        self._emitted_summary = {}
+
+    # --------------------------------------------
+    # Contribuições de cada partícula para os agregados
+    # --------------------------------------------
+
+    def _max_connections(self, pid):
+        return PARTICLE_TYPES[self.particles[pid]['type']]['connections']
+
+    def _status(self, pid):
+        connections = self.degree[pid]
+        max_connections = self._max_connections(pid)
+        if connections > max_connections:
+            return STATUS_EXCEEDED
+        if connections < max_connections:
+            return STATUS_UNSTABLE
+        return STATUS_STABLE
+
+    def _remove_contribution(self, pid):
+        particle = self.particles[pid]
+        counts = self.polarity_counts[particle['type']]
+        counts[particle['polarity']] -= 1
+        if not counts['+'] and not counts['-']:
+            del self.polarity_counts[particle['type']]
+
+        missing = self._max_connections(pid) - self.degree[pid]
+        if missing > 0:
+            cls = (particle['type'], particle['polarity'])
+            self.missing_by_class[cls] -= missing
+            if not self.missing_by_class[cls]:
+                del self.missing_by_class[cls]
+        self.not_stable.discard(pid)
+
+    def _add_contribution(self, pid):
+        particle = self.particles[pid]
+        counts = self.polarity_counts.setdefault(particle['type'], {'+': 0, '-': 0})
+        counts[particle['polarity']] += 1
+
+        missing = self._max_connections(pid) - self.degree[pid]
+        if missing > 0:
+            cls = (particle['type'], particle['polarity'])
+            self.missing_by_class[cls] = self.missing_by_class.get(cls, 0) + missing
+        if missing != 0:
+            self.not_stable.add(pid)
+        self._dirty_particles.add(pid)
+
+    def _check_bond(self, key):
+        first = self.particles[key[0]]
+        second = self.particles[key[1]]
+        violations = []
+        if first['type'] == second['type']:
+            violations.append(VIOLATION_SAME_TYPE)
+        if first['polarity'] == second['polarity']:
+            violations.append(VIOLATION_SAME_POLARITY)
+        if violations:
+            self.bad_bonds[key] = violations
+        else:
+            self.bad_bonds.pop(key, None)
+        self._dirty_bonds.add(key)
+
+    # --------------------------------------------
+    # Componentes conexos
+    # --------------------------------------------
+
+    def _new_component(self, pids):
+        label = self._next_label
+        self._next_label += 1
+        self.members[label] = set(pids)
+        for pid in pids:
+            self.component[pid] = label
+        return label
+
+    def _join(self, id_a, id_b):
+        label_a = self.component[id_a]
+        label_b = self.component[id_b]
+        if label_a == label_b:
+            return
+        if len(self.members[label_a]) < len(self.members[label_b]):
+            label_a, label_b = label_b, label_a
+        for pid in self.members.pop(label_b):
+            self.component[pid] = label_a
+            self.members[label_a].add(pid)
+
+    def _split_if_disconnected(self, id_a, id_b):
+        """Após remover a ligação a-b: separa o componente se b não é mais alcançável de a"""
+        reached = {id_a}
+        frontier = [id_a]
+        while frontier:
+            current = frontier.pop()
+            for neighbor in self.adjacency[current]:
+                if neighbor == id_b:
+                    return
+                if neighbor not in reached:
+                    reached.add(neighbor)
+                    frontier.append(neighbor)
+
+        self.members[self.component[id_a]] -= reached
+        self._new_component(reached)
+
+    # --------------------------------------------
+    # Edições
+    # --------------------------------------------
+
+    def _require_particle(self, pid):
+        if pid not in self.particles:
+            raise ValueError(f'Partícula inexistente: {pid}')
+
+    def add_particle(self, particle_type, polarity, pid=None, x=None, y=None):
+        if particle_type not in PARTICLE_TYPES:
+            raise ValueError(f'Tipo inválido: {particle_type}')
+        if polarity not in ('+', '-'):
+            raise ValueError(f'Polaridade inválida: {polarity}')
+        if pid is None:
+            index = len(self.particles)
+            while f'p{index}' in self.particles:
+                index += 1
+            pid = f'p{index}'
+        elif pid in self.particles:
+            raise ValueError(f'ID de partícula já existe: {pid}')
+
+        particle = {'type': particle_type, 'polarity': polarity}
+        if x is not None and y is not None:
+            particle['x'] = x
+            particle['y'] = y
+        self.particles[pid] = particle
+        self.adjacency[pid] = set()
+        self.degree[pid] = 0
+        self._new_component([pid])
+        self._add_contribution(pid)
+        return pid
+
+    def remove_particle(self, pid):
+        self._require_particle(pid)
+        for neighbor in list(self.adjacency[pid]):
+            self.remove_bond(pid, neighbor)
+
+        self._remove_contribution(pid)
+        label = self.component.pop(pid)
+        del self.members[label]
+        del self.particles[pid]
+        del self.adjacency[pid]
+        del self.degree[pid]
+        self._dirty_particles.add(pid)
+
+    def update_particle(self, pid, particle_type=None, polarity=None):
+        self._require_particle(pid)
+        if particle_type is not None and particle_type not in PARTICLE_TYPES:
+            raise ValueError(f'Tipo inválido: {particle_type}')
+        if polarity is not None and polarity not in ('+', '-'):
+            raise ValueError(f'Polaridade inválida: {polarity}')
+
+        self._remove_contribution(pid)
+        if particle_type is not None:
+            self.particles[pid]['type'] = particle_type
+        if polarity is not None:
+            self.particles[pid]['polarity'] = polarity
+        self._add_contribution(pid)
+
+        for neighbor in self.adjacency[pid]:
+            self._check_bond(_bond_key(pid, neighbor))
+
+    def add_bond(self, id_a, id_b, multiplicity=1):
+        self._require_particle(id_a)
+        self._require_particle(id_b)
+        if id_a == id_b:
+            raise ValueError('Uma partícula não pode se ligar a ela mesma')
+        if not isinstance(multiplicity, int) or multiplicity < 1:
+            raise ValueError(f'Multiplicidade inválida: {multiplicity}')
+
+        key = _bond_key(id_a, id_b)
+        for pid in key:
+            self._remove_contribution(pid)
+            self.degree[pid] += multiplicity
+            self._add_contribution(pid)
+
+        if key in self.bonds:
+            self.bonds[key] += multiplicity
+            self._dirty_bonds.add(key)
+        else:
+            self.bonds[key] = multiplicity
+            self.adjacency[id_a].add(id_b)
+            self.adjacency[id_b].add(id_a)
+            self._join(id_a, id_b)
+            self._check_bond(key)
+
+    def remove_bond(self, id_a, id_b, multiplicity=None):
+        """Remove a ligação (ou reduz sua multiplicidade)"""
+        key = _bond_key(id_a, id_b)
+        if key not in self.bonds:
+            raise ValueError(f'Ligação inexistente: {id_a}-{id_b}')
+        if multiplicity is not None and (not isinstance(multiplicity, int) or multiplicity < 1):
+            raise ValueError(f'Multiplicidade inválida: {multiplicity}')
+
+        removed = self.bonds[key] if multiplicity is None else min(multiplicity, self.bonds[key])
+        for pid in key:
+            self._remove_contribution(pid)
+            self.degree[pid] -= removed
+            self._add_contribution(pid)
+
+        self.bonds[key] -= removed
+        self._dirty_bonds.add(key)
+        if self.bonds[key] == 0:
+            del self.bonds[key]
+            self.bad_bonds.pop(key, None)
+            self.adjacency[key[0]].discard(key[1])
+            self.adjacency[key[1]].discard(key[0])
+            self._split_if_disconnected(key[0], key[1])
+
+    def _fill(self, molecule):
+        if not isinstance(molecule, dict):
+            raise ValueError('Molécula deve ser um objeto')
+        particles = molecule.get('particles', [])
+        bonds = molecule.get('bonds', [])
+        if not isinstance(particles, list) or not all(isinstance(p, dict) for p in particles):
+            raise ValueError('particles deve ser uma lista de objetos')
+        if not isinstance(bonds, list) or not all(isinstance(b, dict) for b in bonds):
+            raise ValueError('bonds deve ser uma lista de objetos')
+
+        for particle in particles:
+            self.add_particle(
+                particle.get('type'), particle.get('polarity'), particle.get('id'),
+                particle.get('x'), particle.get('y')
+            )
+        for bond in bonds:
+            self.add_bond(bond.get('from'), bond.get('to'), bond.get('multiplicity', 1))
+
+    def load(self, molecule):
+        """
+        Substitui a molécula inteira (início da sessão ou recarga).
+
+        A molécula é montada em uma sessão nova e só entra no lugar da atual se
+        for aceita por inteiro (uma edição inválida não apaga a sessão). A
+        próxima coleta informa as partículas e ligações antigas como removidas.
+        """
+        fresh = BuilderSession()
+        fresh._fill(molecule)
+
+        dirty_particles = self._dirty_particles | set(self._emitted_particles)
+        dirty_bonds = self._dirty_bonds | set(self._emitted_bonds)
+        emitted = (self._emitted_particles, self._emitted_bonds, self._emitted_summary)
+
+        for name, value in vars(fresh).items():
+            if name != 'lock':
+                setattr(self, name, value)
+        self._emitted_particles, self._emitted_bonds, self._emitted_summary = emitted
+        self._dirty_particles |= dirty_particles
+        self._dirty_bonds |= dirty_bonds
+
+    def apply(self, edit):
+        """
+        Aplica uma edição:
+            {'op': 'add_particle', 'type', 'polarity', 'id'?, 'x'?, 'y'?}
+            {'op': 'remove_particle', 'id'}
+            {'op': 'update_particle', 'id', 'type'?, 'polarity'?}
+            {'op': 'add_bond', 'from', 'to', 'multiplicity'?}
+            {'op': 'remove_bond', 'from', 'to', 'multiplicity'?}
+            {'op': 'load', 'molecule'}
+
+        Returns: ID da partícula criada (add_particle) ou None
+        Raises: ValueError se a edição é inválida (molécula inalterada)
+        """
+        if not isinstance(edit, dict):
+            raise ValueError('Edição deve ser um objeto')
+        op = edit.get('op')
+        if op == 'add_particle':
+            return self.add_particle(edit.get('type'), edit.get('polarity'), edit.get('id'), edit.get('x'), edit.get('y'))
+        if op == 'remove_particle':
+            self.remove_particle(edit.get('id'))
+        elif op == 'update_particle':
+            self.update_particle(edit.get('id'), edit.get('type'), edit.get('polarity'))
+        elif op == 'add_bond':
+            self.add_bond(edit.get('from'), edit.get('to'), edit.get('multiplicity', 1))
+        elif op == 'remove_bond':
+            self.remove_bond(edit.get('from'), edit.get('to'), edit.get('multiplicity'))
+        elif op == 'load':
+            self.load(edit.get('molecule') or {})
+        else:
+            raise ValueError(f'Operação desconhecida: {op}')
+        return None
+
+    def apply_edits(self, edits):
+        """
+        Aplica edições em ordem (para na primeira inválida; as anteriores ficam).
+
+        Returns: {'applied': int, 'created': [ids], 'error': str ou None,
+                  'changes': {...}, 'elapsed_us': float}
+        """
+        started = time.perf_counter()
+        applied = 0
+        created = []
+        error = None
+        with self.lock:
+            for edit in edits:
+                try:
+                    pid = self.apply(edit)
+                except (ValueError, TypeError, KeyError) as e:
+                    error = str(e)
+                    break
+                applied += 1
+                if pid is not None:
+                    created.append(pid)
+            changes = self.collect_changes()
+
+        return {
+            'applied': applied,
+            'created': created,
+            'error': error,
+            'changes': changes,
+            'elapsed_us': round((time.perf_counter() - started) * 1e6, 1)
+        }
+
+    # --------------------------------------------
+    # Estado de validação
+    # --------------------------------------------
+
+    def _particle_state(self, pid):
+        return {
+            'connections': self.degree[pid],
+            'max': self._max_connections(pid),
+            'status': self._status(pid)
+        }
+
+    def _bond_state(self, key):
+        return {
+            'from': key[0],
+            'to': key[1],
+            'multiplicity': self.bonds[key],
+            'violations': self.bad_bonds.get(key, [])
+        }
+
+    def summary(self):
+        inconsistent_types = sorted(
+            ptype for ptype, counts in self.polarity_counts.items()
+            if counts['+'] and counts['-']
+        )
+        positive_types = {ptype for (ptype, polarity) in self.missing_by_class if polarity == '+'}
+        negative_types = {ptype for (ptype, polarity) in self.missing_by_class if polarity != '+'}
+        can_stabilize = not self.missing_by_class or any(
+            pos_type != neg_type for pos_type in positive_types for neg_type in negative_types
+        )
+        mass = len(self.particles)
+        return {
+            'valid': (
+                mass >= 2
+                and not inconsistent_types
+                and not self.not_stable
+                and not self.bad_bonds
+                and len(self.members) == 1
+            ),
+            'mass': mass,
+            'components': len(self.members),
+            'unstable_particles': len(self.not_stable),
+            'invalid_bonds': len(self.bad_bonds),
+            'inconsistent_types': inconsistent_types,
+            'can_stabilize': can_stabilize
+        }
+
+    def collect_changes(self):
+        """Diferença desde a última coleta: partículas, ligações e resumo alterados"""
+        particles = {}
+        for pid in self._dirty_particles:
+            state = self._particle_state(pid) if pid in self.particles else None
+            if self._emitted_particles.get(pid) != state:
+                particles[pid] = state
+                if state is None:
+                    self._emitted_particles.pop(pid, None)
+                else:
+                    self._emitted_particles[pid] = state
+
+        bonds = []
+        for key in self._dirty_bonds:
+            state = self._bond_state(key) if key in self.bonds else None
+            if self._emitted_bonds.get(key) != state:
+                bonds.append(state or {'from': key[0], 'to': key[1], 'removed': True})
+                if state is None:
+                    self._emitted_bonds.pop(key, None)
+                else:
+                    self._emitted_bonds[key] = state
+
+        self._dirty_particles.clear()
+        self._dirty_bonds.clear()
+
+        summary = self.summary()
+        changed_summary = {
+            field: value for field, value in summary.items()
+            if self._emitted_summary.get(field) != value
+        }
+        self._emitted_summary = summary
+
+        return {'particles': particles, 'bonds': bonds, 'summary': changed_summary}
+
+    def full_state(self):
+        """Estado completo (início da sessão); zera a base das próximas diferenças"""
+        with self.lock:
+            self._dirty_particles.update(self.particles)
+            self._dirty_bonds.update(self.bonds)
+            self._emitted_particles = {}
+            self._emitted_bonds = {}
+            self._emitted_summary = {}
+            return self.collect_changes()
+
+    def to_molecule(self):
+        """Molécula no formato usual (partículas e ligações)"""
+        return {
+            'particles': [{'id': pid, **particle} for pid, particle in self.particles.items()],
+            'bonds': [
+                {'from': id_a, 'to': id_b, 'multiplicity': multiplicity}
+                for (id_a, id_b), multiplicity in self.bonds.items()
+            ]
+        }
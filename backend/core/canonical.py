@@ -0,0 +1,237 @@
+"""
+Forma Canônica de Moléculas
+
+Calcula uma rotulação canônica do grafo molecular (partículas = vértices
+rotulados por tipo+polaridade, ligações = arestas com multiplicidade):
+
+- Moléculas isomorfas (mesma estrutura, IDs/ordem diferentes) recebem a mesma
+  forma canônica.
+- Formas canônicas iguais garantem moléculas isomorfas (a forma codifica o
+  grafo completo na ordem canônica).
+
+Algoritmo: refinamento de cores (Weisfeiler-Lehman 1-dim) seguido de
+individualização-refinamento nas células empatadas, escolhendo a menor
+codificação. Vértices gêmeos (mesma vizinhança) são podados, e um orçamento
+de folhas limita casos altamente simétricos; se o orçamento se esgotar a
+forma continua válida (iguais => isomorfas), apenas pode deixar de
+coincidir para entradas isomorfas em ordens diferentes.
+"""
+
+import hashlib
+
+# Ordem dos tipos (mesma usada em fórmulas e no merge)
+TYPE_ORDER = {'circle': 0, 'square': 1, 'triangle': 2, 'pentagon': 3}
+
+# Máximo de folhas exploradas na individualização
+MAX_LEAVES = 256
+
+# Campo das moléculas servidas pela API com a chave canônica
+CANONICAL_KEY = 'canonical_key'
+
+
+def _build_graph(molecule):
+    """
+    Converte a molécula em listas indexadas.
+
+    Returns: (ids, labels, adjacency, particles) onde
+             adjacency[v] = [(u, multiplicidade), ...]
+    """
+    particles = molecule.get('particles', [])
+    ids = [p['id'] for p in particles]
+    index = {pid: i for i, pid in enumerate(ids)}
+    labels = [f"{p.get('type')}{p.get('polarity')}" for p in particles]
+
+    adjacency = [[] for _ in ids]
+    for bond in molecule.get('bonds', []):
+        a = index.get(bond.get('from'))
+        b = index.get(bond.get('to'))
+        if a is None or b is None:
+            continue
+        multiplicity = bond.get('multiplicity', 1)
+        adjacency[a].append((b, multiplicity))
+        adjacency[b].append((a, multiplicity))
+
+    return ids, labels, adjacency, particles
+
+
+def _initial_colors(particles):
+    keys = [
+        (TYPE_ORDER.get(p.get('type'), 99), str(p.get('type')), str(p.get('polarity')))
+        for p in particles
+    ]
+    ranking = {key: rank for rank, key in enumerate(sorted(set(keys)))}
+    return [ranking[key] for key in keys]
+
+
+def _refine(colors, adjacency):
+    """
+    Refina a partição até estabilizar. As novas cores são ranks das
+    assinaturas (cor atual, multiconjunto de (cor vizinha, multiplicidade)),
+    portanto a ordem entre classes é invariante a isomorfismo.
+    """
+    class_count = len(set(colors))
+    while True:
+        signatures = [
+            (colors[v], tuple(sorted((colors[u], m) for u, m in adjacency[v])))
+            for v in range(len(colors))
+        ]
+        ranking = {sig: rank for rank, sig in enumerate(sorted(set(signatures)))}
+        colors = [ranking[sig] for sig in signatures]
+        if len(ranking) == class_count:
+            return colors
+        class_count = len(ranking)
+
+
+def _encode(colors, labels, adjacency):
+    """Codifica o grafo na ordem dada por uma coloração discreta"""
+    order = sorted(range(len(colors)), key=lambda v: colors[v])
+    position = {v: i for i, v in enumerate(order)}
+
+    edges = []
+    for v in range(len(adjacency)):
+        for u, m in adjacency[v]:
+            if v <= u:
+                i, j = sorted((position[v], position[u]))
+                edges.append((i, j, m))
+    edges.sort()
+
+    return (tuple(labels[v] for v in order), tuple(edges)), order
+
+
+def _first_non_singleton_cell(colors):
+    counts = {}
+    for c in colors:
+        counts[c] = counts.get(c, 0) + 1
+    tied = [c for c, count in counts.items() if count > 1]
+    return min(tied) if tied else None
+
+
+def _canonical_order(labels, adjacency, particles):
+    """Individualização-refinamento iterativa; retorna (codificação, ordem)"""
+    colors = _refine(_initial_colors(particles), adjacency)
+
+    best = None
+    leaves = 0
+    stack = [colors]
+
+    while stack:
+        colors = stack.pop()
+        cell = _first_non_singleton_cell(colors)
+
+        if cell is None:
+            leaves += 1
+            encoding, order = _encode(colors, labels, adjacency)
+            if best is None or encoding < best[0]:
+                best = (encoding, order)
+            if leaves >= MAX_LEAVES:
+                break
+            continue
+
+        # Gêmeos (mesma vizinhança) geram a mesma codificação: explorar um só
+        seen_neighborhoods = set()
+        branches = []
+        for v in range(len(colors)):
+            if colors[v] != cell:
+                continue
+            neighborhood = tuple(sorted(adjacency[v]))
+            if neighborhood in seen_neighborhoods:
+                continue
+            seen_neighborhoods.add(neighborhood)
+
+            individualized = [
+                2 * c + (1 if c == cell and u != v else 0)
+                for u, c in enumerate(colors)
+            ]
+            branches.append(_refine(individualized, adjacency))
+
+        # Pilha: empilhar em ordem reversa para explorar na ordem dos vértices
+        stack.extend(reversed(branches))
+
+    return best
+
+
+def canonical_labeling(molecule):
+    """
+    Calcula a rotulação canônica de uma molécula.
+
+    Returns: {
+        'form': str,          # Forma canônica completa (rótulos + ligações)
+        'key': str,           # Hash curto da forma (identidade da molécula)
+        'labels': [str]       # labels[i] = ID da partícula com rótulo canônico i
+    }
+    """
+    ids, labels, adjacency, particles = _build_graph(molecule)
+
+    if not ids:
+        return {'form': '', 'key': canonical_key_from_form(''), 'labels': []}
+
+    (canon_labels, edges), order = _canonical_order(labels, adjacency, particles)
+
+    form = '.'.join(canon_labels) + '|' + ','.join(f'{i}-{j}x{m}' for i, j, m in edges)
+
+    return {
+        'form': form,
+        'key': canonical_key_from_form(form),
+        'labels': [ids[v] for v in order]
+    }
+
+
+def canonical_key_from_form(form):
+    """Hash curto e estável (independente de PYTHONHASHSEED) da forma canônica"""
+    return hashlib.sha1(form.encode('utf-8')).hexdigest()[:16]
+
+
+def canonical_form(molecule):
+    """Retorna apenas a forma canônica (str)"""
+    return canonical_labeling(molecule)['form']
+
+
+def canonical_key(molecule):
+    """Retorna apenas a chave canônica (hash curto da forma)"""
+    return canonical_labeling(molecule)['key']
+
+
+def attach_canonical_key(molecule):
+    """
+    Calcula e anexa a chave canônica à molécula (in-place), sobrescrevendo
+    qualquer valor anterior (moléculas vindas do cliente não são confiáveis).
+
+    Returns: a própria molécula
+    """
+    molecule[CANONICAL_KEY] = canonical_key(molecule)
+    return molecule
+
+
+def canonicalize_molecule(molecule):
+    """
+    Retorna uma cópia da molécula na ordem canônica: partículas ordenadas pelos
+    rótulos canônicos com IDs 'p0', 'p1', ... e ligações remapeadas e ordenadas.
+    Moléculas isomorfas resultam na mesma cópia (exceto chaves extras).
+    Coordenadas e demais campos das partículas são preservados.
+    """
+    labeling = canonical_labeling(molecule)
+    new_ids = {old_id: f'p{i}' for i, old_id in enumerate(labeling['labels'])}
+    particles_by_id = {}
+    for particle in molecule.get('particles', []):
+        particles_by_id.setdefault(particle['id'], particle)
+
+    particles = [
+        dict(particles_by_id[old_id], id=new_id)
+        for old_id, new_id in new_ids.items()
+    ]
+
+    bonds = []
+    for bond in molecule.get('bonds', []):
+        a = new_ids.get(bond.get('from'))
+        b = new_ids.get(bond.get('to'))
+        if a is None or b is None:
+            continue
+        if int(a[1:]) > int(b[1:]):
+            a, b = b, a
+        bonds.append(dict(bond, **{'from': a, 'to': b}))
+    bonds.sort(key=lambda bond: (int(bond['from'][1:]), int(bond['to'][1:])))
+
+    canonical = {key: value for key, value in molecule.items() if key not in ('particles', 'bonds')}
+    canonical['particles'] = particles
+    canonical['bonds'] = bonds
+    return canonical
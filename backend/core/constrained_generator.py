@@ -0,0 +1,354 @@
+"""
+Geração de Moléculas Restrita por Padrões de Ligação
+
+Enumera apenas as moléculas estáveis e conectadas de uma massa que contêm
+TODOS os padrões de ligação exigidos (ex: os 3 requisitos de um efeito,
+ver core.effect_patterns) e NENHUM dos proibidos - sem gerar todas as
+moléculas da massa para filtrar depois:
+
+1. Composições: os tipos dos padrões exigidos têm a polaridade fixada (regra
+   do mesmo tipo) e precisam estar presentes; composições rejeitadas pelo
+   oráculo de estabilidade são descartadas antes de qualquer ligação.
+2. Semeadura: as ligações exigidas são criadas primeiro. Partículas ainda
+   sem ligações de uma mesma classe são intercambiáveis, então só a primeira
+   é tentada.
+3. Complemento: as valências restantes são preenchidas partícula a partícula
+   (parceiros em ordem crescente), nunca criando ligação proibida e podando
+   ramos cujas valências faltantes o oráculo declara impossíveis.
+
+Duplicatas são removidas pela chave canônica.
+"""
+
+import itertools
+from data.molecules import PARTICLE_TYPES
+from .canonical import attach_canonical_key, canonical_key
+from .effect_patterns import (
+    PARTICLE_TYPES as SHAPES, POLARITIES, MULTIPLICITIES, normalize_bond_requirement
+)
+from .generator import _preferred_shape
+from .graph import build_adjacency, is_connected
+from .molecule_features import attach_molecule_features
+from .stability import MAX_BOND_MULTIPLICITY, is_residual_feasible, is_stable_bonding_feasible
+from .synthesis import mark_layout_pending
+
+# Massa máxima aceita (a busca cega do gerador para em 6)
+MAX_CONSTRAINED_MASS = 12
+
+# Limites padrão da busca
+DEFAULT_MAX_RESULTS = 200
+DEFAULT_MAX_NODES = 200000
+
+
+def normalize_patterns(patterns):
+    """
+    Valida e normaliza uma lista de padrões (tipo1, polaridade1, tipo2,
+    polaridade2, multiplicidade), removendo repetições.
+
+    Raises: ValueError se algum padrão for malformado
+    """
+    normalized = []
+    for pattern in patterns or []:
+        if not isinstance(pattern, (list, tuple)) or len(pattern) != 5:
+            raise ValueError(f'Padrão inválido (esperado 5 elementos): {pattern}')
+        type1, polarity1, type2, polarity2, multiplicity = pattern
+        if type1 not in SHAPES or type2 not in SHAPES:
+            raise ValueError(f'Tipo de partícula inválido no padrão: {pattern}')
+        if polarity1 not in POLARITIES or polarity2 not in POLARITIES:
+            raise ValueError(f'Polaridade inválida no padrão: {pattern}')
+        if multiplicity not in MULTIPLICITIES:
+            raise ValueError(f'Multiplicidade inválida no padrão: {pattern}')
+        requirement = normalize_bond_requirement(type1, polarity1, type2, polarity2, multiplicity)
+        if requirement not in normalized:
+            normalized.append(requirement)
+    return normalized
+
+
+def _is_possible_bond(requirement):
+    """Um padrão só pode existir entre tipos diferentes, polaridades opostas e valência suficiente"""
+    type1, polarity1, type2, polarity2, multiplicity = requirement
+    return (
+        type1 != type2
+        and polarity1 != polarity2
+        and multiplicity <= min(
+            PARTICLE_TYPES[type1]['connections'],
+            PARTICLE_TYPES[type2]['connections'],
+            MAX_BOND_MULTIPLICITY
+        )
+    )
+
+
+def _fixed_polarities(required):
+    """
+    Polaridade imposta a cada tipo pelos padrões exigidos.
+    Returns: {tipo: polaridade} ou None se os padrões forem incompatíveis
+    """
+    fixed = {}
+    for type1, polarity1, type2, polarity2, _ in required:
+        for ptype, polarity in ((type1, polarity1), (type2, polarity2)):
+            if fixed.setdefault(ptype, polarity) != polarity:
+                return None
+    return fixed
+
+
+def _compositions(target_mass, fixed, preferred_shape):
+    """
+    Composições viáveis: listas [(tipo, polaridade, quantidade)] na ordem de SHAPES.
+    """
+    for counts in itertools.product(range(target_mass + 1), repeat=len(SHAPES)):
+        if sum(counts) != target_mass:
+            continue
+        present = [(ptype, count) for ptype, count in zip(SHAPES, counts) if count > 0]
+        present_types = {ptype for ptype, _ in present}
+        if any(ptype not in present_types for ptype in fixed):
+            continue
+        if preferred_shape and preferred_shape not in present_types:
+            continue
+
+        polarity_options = [
+            [fixed[ptype]] if ptype in fixed else POLARITIES
+            for ptype, _ in present
+        ]
+        for polarities in itertools.product(*polarity_options):
+            composition = [
+                (ptype, polarity, count)
+                for (ptype, count), polarity in zip(present, polarities)
+            ]
+            if is_stable_bonding_feasible({(t, p): c for t, p, c in composition}):
+                yield composition
+
+
+class _Search:
+    """Estado da busca (com desfazer) para uma composição"""
+
+    def __init__(self, composition, required, forbidden, budget):
+        self.particles = []
+        for ptype, polarity, count in composition:
+            for _ in range(count):
+                self.particles.append({
+                    'id': f'p{len(self.particles)}',
+                    'type': ptype,
+                    'polarity': polarity
+                })
+        self.classes = [(p['type'], p['polarity']) for p in self.particles]
+        self.remaining = [PARTICLE_TYPES[p['type']]['connections'] for p in self.particles]
+        self.touched = [False] * len(self.particles)
+        self.bonds = {}  # (i, j) com i < j -> multiplicidade
+        self.required = required
+        self.forbidden = forbidden
+        self.budget = budget
+
+    def _pattern(self, i, j, multiplicity):
+        (type_i, polarity_i), (type_j, polarity_j) = self.classes[i], self.classes[j]
+        return normalize_bond_requirement(type_i, polarity_i, type_j, polarity_j, multiplicity)
+
+    def _compatible(self, i, j):
+        return (
+            self.classes[i][0] != self.classes[j][0]
+            and self.classes[i][1] != self.classes[j][1]
+            and (min(i, j), max(i, j)) not in self.bonds
+        )
+
+    def _add(self, i, j, multiplicity):
+        previous = (self.touched[i], self.touched[j])
+        self.bonds[(min(i, j), max(i, j))] = multiplicity
+        self.remaining[i] -= multiplicity
+        self.remaining[j] -= multiplicity
+        self.touched[i] = self.touched[j] = True
+        return previous
+
+    def _remove(self, i, j, multiplicity, previous):
+        del self.bonds[(min(i, j), max(i, j))]
+        self.remaining[i] += multiplicity
+        self.remaining[j] += multiplicity
+        self.touched[i], self.touched[j] = previous
+
+    def _tick(self):
+        self.budget['nodes'] += 1
+        if self.budget['nodes'] >= self.budget['max_nodes']:
+            self.budget['stopped'] = True
+        return not self.budget['stopped']
+
+    def _residual_feasible(self):
+        residuals = {}
+        for (ptype, polarity), missing in zip(self.classes, self.remaining):
+            if missing > 0:
+                key = (ptype, polarity, missing)
+                residuals[key] = residuals.get(key, 0) + 1
+        return is_residual_feasible(residuals)
+
+    def _seed_candidates(self, ptype, polarity, multiplicity):
+        """Partículas da classe com valência livre; só a primeira intocada (simetria)"""
+        candidates = []
+        untouched_taken = False
+        for i, cls in enumerate(self.classes):
+            if cls != (ptype, polarity) or self.remaining[i] < multiplicity:
+                continue
+            if not self.touched[i]:
+                if untouched_taken:
+                    continue
+                untouched_taken = True
+            candidates.append(i)
+        return candidates
+
+    def run(self, emit):
+        self._seed(0, emit)
+
+    def _seed(self, k, emit):
+        if not self._tick():
+            return
+        if k == len(self.required):
+            if self._residual_feasible():
+                self._complete(0, emit)
+            return
+
+        requirement = self.required[k]
+        if any(self._pattern(i, j, m) == requirement for (i, j), m in self.bonds.items()):
+            self._seed(k + 1, emit)
+            return
+
+        type1, polarity1, type2, polarity2, multiplicity = requirement
+        for a in self._seed_candidates(type1, polarity1, multiplicity):
+            for b in self._seed_candidates(type2, polarity2, multiplicity):
+                if not self._compatible(a, b):
+                    continue
+                previous = self._add(a, b, multiplicity)
+                self._seed(k + 1, emit)
+                self._remove(a, b, multiplicity, previous)
+
+    def _complete(self, i, emit):
+        n = len(self.particles)
+        while i < n and self.remaining[i] == 0:
+            i += 1
+        if i == n:
+            emit(self)
+            return
+        self._extend(i, i + 1, emit)
+
+    def _extend(self, i, start, emit):
+        if not self._tick():
+            return
+        if self.remaining[i] == 0:
+            if self._residual_feasible():
+                self._complete(i + 1, emit)
+            return
+
+        # Poda: parceiros restantes (j >= start) precisam absorver a valência de i
+        capacity = sum(
+            min(self.remaining[j], MAX_BOND_MULTIPLICITY)
+            for j in range(start, len(self.particles))
+            if self.remaining[j] > 0 and self._compatible(i, j)
+        )
+        if capacity < self.remaining[i]:
+            return
+
+        tried_untouched = set()
+        for j in range(start, len(self.particles)):
+            if self.remaining[j] == 0 or not self._compatible(i, j):
+                continue
+            # Simetria: ligar a uma intocada equivale a ligar à primeira intocada da classe
+            if not self.touched[j]:
+                if self.classes[j] in tried_untouched:
+                    continue
+                tried_untouched.add(self.classes[j])
+            for multiplicity in range(1, min(self.remaining[i], self.remaining[j], MAX_BOND_MULTIPLICITY) + 1):
+                if self._pattern(i, j, multiplicity) in self.forbidden:
+                    continue
+                previous = self._add(i, j, multiplicity)
+                self._extend(i, j + 1, emit)
+                self._remove(i, j, multiplicity, previous)
+
+    def to_molecule(self):
+        return {
+            'particles': [dict(p) for p in self.particles],
+            'bonds': [
+                {'from': self.particles[i]['id'], 'to': self.particles[j]['id'], 'multiplicity': m}
+                for (i, j), m in sorted(self.bonds.items())
+            ]
+        }
+
+
+def generate_constrained_molecules(target_mass, required, forbidden=None, particle_type=None,
+                                   max_results=DEFAULT_MAX_RESULTS, max_nodes=DEFAULT_MAX_NODES):
+    """
+    Gera as moléculas de uma massa que contêm todos os padrões exigidos e
+    nenhum dos proibidos.
+
+    Args:
+        target_mass: Massa (número de partículas), até MAX_CONSTRAINED_MASS
+        required: Lista de padrões (tipo1, polaridade1, tipo2, polaridade2, multiplicidade)
+        forbidden: Lista opcional de padrões que não podem aparecer
+        particle_type: Tipo preferido (1-4, como em generate_molecules) ou 0/None
+        max_results: Máximo de moléculas retornadas
+        max_nodes: Orçamento de nós da busca
+
+    Returns: mesmo formato de generate_molecules, com 'details' incluindo
+             'explored' (nós visitados) e 'truncated' (limite atingido)
+    Raises: ValueError se algum padrão for malformado
+    """
+    required = normalize_patterns(required)
+    forbidden = set(normalize_patterns(forbidden))
+
+    preferred_shape = _preferred_shape(particle_type)
+
+    if target_mass < 2 or target_mass > MAX_CONSTRAINED_MASS:
+        return {
+            'success': False,
+            'molecules': [],
+            'count': 0,
+            'details': {'error': f'Massa deve estar entre 2 e {MAX_CONSTRAINED_MASS}'}
+        }
+
+    details = {
+        'target_mass': target_mass,
+        'preferred_shape': preferred_shape,
+        'required': [list(r) for r in required],
+        'forbidden': [list(f) for f in sorted(forbidden)],
+        'compositions': 0,
+        'explored': 0,
+        'truncated': False
+    }
+
+    fixed = _fixed_polarities(required)
+    if (fixed is None
+            or not all(_is_possible_bond(r) for r in required)
+            or any(r in forbidden for r in required)):
+        # Padrões contraditórios: nenhuma molécula pode satisfazê-los
+        return {'success': True, 'molecules': [], 'count': 0, 'details': details}
+
+    molecules = []
+    seen_keys = set()
+    budget = {'nodes': 0, 'max_nodes': max_nodes, 'stopped': False}
+
+    def emit(search):
+        molecule = search.to_molecule()
+        adjacency = build_adjacency(molecule['particles'], molecule['bonds'])
+        if not is_connected(adjacency, molecule['particles']):
+            return
+        key = canonical_key(molecule)
+        if key in seen_keys:
+            return
+        seen_keys.add(key)
+
+        attach_molecule_features(molecule)
+        molecule['structure'] = molecule['features']['structure']
+        attach_canonical_key(molecule)
+        mark_layout_pending(molecule)
+        molecules.append(molecule)
+        if len(molecules) >= max_results:
+            budget['stopped'] = True
+
+    for composition in _compositions(target_mass, fixed, preferred_shape):
+        details['compositions'] += 1
+        _Search(composition, required, forbidden, budget).run(emit)
+        if budget['stopped']:
+            break
+
+    details['explored'] = budget['nodes']
+    details['truncated'] = budget['stopped']
+
+    return {
+        'success': True,
+        'molecules': molecules,
+        'count': len(molecules),
+        'details': details
+    }
@@ -4,8 +4,10 @@ Gera todas as moléculas possíveis com massa específica e tipos mistos
 """
 
 from data.molecules import PARTICLE_TYPES
-from .synthesis import find_connected_components, reorganize_positions
-from .molecule_analyzer import analyze_molecule_structure
+from .synthesis import find_connected_components, mark_layout_pending
+from .canonical import CANONICAL_KEY, canonical_key
+from .molecule_features import attach_molecule_features
+from .stability import is_stable_bonding_feasible, count_particles
 import itertools
 import copy
 
@@ -26,7 +28,16 @@ def generate_molecules(particle_type, target_mass):
         'details': {...}
     }
     """
+    error = check_generation_mass(target_mass)
+    if error:
+        return error
     
+    type_combinations = get_type_combinations(particle_type, target_mass)
+    molecules, attempted_count = generate_for_type_combinations(type_combinations, target_mass)
+    return build_generation_result(particle_type, target_mass, type_combinations, molecules, attempted_count)
+
+
+def _preferred_shape(particle_type):
     # Mapear tipo numérico para forma
     type_map = {
         1: 'circle',
@@ -36,8 +47,11 @@ def generate_molecules(particle_type, target_mass):
     }
     
     # 0 ou None = qualquer tipo (sem filtro)
-    preferred_shape = type_map.get(particle_type) if particle_type and particle_type > 0 else None
-    
+    return type_map.get(particle_type) if particle_type and particle_type > 0 else None
+
+
+def check_generation_mass(target_mass):
+    """Resultado de erro se a massa está fora do intervalo gerável, senão None"""
     # Todas as partículas têm massa 1
     num_particles = target_mass
     
@@ -61,12 +75,20 @@ def generate_molecules(particle_type, target_mass):
             }
         }
     
-    # PASSO 1: Gerar todas as combinações de tipos de partículas
+    return None
+
+
+def get_type_combinations(particle_type, target_mass):
+    """
+    PASSO 1: Todas as combinações de tipos de partículas (ordenadas, sem
+    repetição), apenas as que contêm o tipo preferido se houver um.
+    """
+    preferred_shape = _preferred_shape(particle_type)
     all_shapes = ['circle', 'square', 'triangle', 'pentagon']
     type_combinations = []
     
     # Gerar combinações de tipos (com repetição)
-    for combo in itertools.product(all_shapes, repeat=num_particles):
+    for combo in itertools.product(all_shapes, repeat=target_mass):
         # Se há tipo preferido, filtrar apenas combinações que o contêm
         if preferred_shape and preferred_shape not in combo:
             continue
@@ -76,8 +98,22 @@ def generate_molecules(particle_type, target_mass):
         if normalized not in type_combinations:
             type_combinations.append(normalized)
     
-    # PASSO 2: Para cada combinação de tipos, gerar polaridades e ligações
+    return type_combinations
+
+
+def generate_for_type_combinations(type_combinations, target_mass):
+    """
+    PASSO 2: Moléculas de cada combinação de tipos, na ordem das combinações.
+    
+    Combinações diferentes nunca geram moléculas isomorfas (a composição
+    difere), então gerar cada combinação separadamente (ex: uma tarefa de
+    job por combinação) e concatenar dá o mesmo resultado.
+    
+    Returns: (moléculas, candidatos avaliados)
+    """
+    num_particles = target_mass
     unique_molecules = []
+    seen_keys = set()
     attempted_count = 0
     
     for types_combo in type_combinations:
@@ -99,6 +135,10 @@ def generate_molecules(particle_type, target_mass):
                     'y': 0.0
                 })
             
+            # Oráculo: pular combinações que nunca formam molécula estável conectada
+            if not is_stable_bonding_feasible(count_particles(particles)):
+                continue
+            
             # Gerar estruturas de ligações
             bond_structures = generate_bond_structures(particles)
             
@@ -120,26 +160,37 @@ def generate_molecules(particle_type, target_mass):
                 if not is_molecule_stable(candidate):
                     continue
                 
-                # Reorganizar posições (função central)
-                reorganize_positions(candidate)
+                # Verificar se já existe (chave canônica: isomorfismo, antes de qualquer
+                # trabalho de layout/análise)
+                key = canonical_key(candidate)
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                
+                # Analisar características estruturais (pré-computadas uma vez)
+                attach_molecule_features(candidate)
+                candidate['structure'] = candidate['features']['structure']
+                candidate[CANONICAL_KEY] = key
                 
-                # Analisar características estruturais
-                structure_info = analyze_molecule_structure(candidate)
-                candidate['structure'] = structure_info
+                # Posições calculadas sob demanda (ensure_layout) quando a molécula for desenhada
+                mark_layout_pending(candidate)
                 
-                # Verificar se já existe
-                if not molecule_exists_in_list(candidate, unique_molecules):
-                    unique_molecules.append(candidate)
+                unique_molecules.append(candidate)
     
+    return unique_molecules, attempted_count
+
+
+def build_generation_result(particle_type, target_mass, type_combinations, molecules, attempted_count):
+    """Resultado de generate_molecules a partir das moléculas já geradas"""
     return {
         'success': True,
-        'molecules': unique_molecules,
-        'count': len(unique_molecules),
+        'molecules': molecules,
+        'count': len(molecules),
         'details': {
             'particle_type': particle_type,
-            'preferred_shape': preferred_shape,
+            'preferred_shape': _preferred_shape(particle_type),
             'target_mass': target_mass,
-            'num_particles': num_particles,
+            'num_particles': target_mass,
             'attempted': attempted_count,
             'type_combinations': len(type_combinations)
         }
@@ -307,56 +358,3 @@ def is_molecule_stable(molecule):
             return False
     
     return True
-
-
-def molecule_exists_in_list(molecule, molecule_list):
-    """
-    Verifica se uma molécula já existe na lista (comparação estrutural).
-    """
-    for existing in molecule_list:
-        if are_molecules_identical(molecule, existing):
-            return True
-    return False
-
-
-def are_molecules_identical(mol1, mol2):
-    """
-    Compara duas moléculas estruturalmente.
-    Duas moléculas são idênticas se têm a mesma composição e estrutura de ligações.
-    """
-    # Verificar número de partículas
-    if len(mol1['particles']) != len(mol2['particles']):
-        return False
-    
-    # Verificar número de ligações
-    if len(mol1['bonds']) != len(mol2['bonds']):
-        return False
-    
-    # Contar tipos e polaridades de partículas
-    def get_particle_signature(mol):
-        particles = mol['particles']
-        signature = {}
-        for p in particles:
-            key = (p['type'], p['polarity'])
-            signature[key] = signature.get(key, 0) + 1
-        return signature
-    
-    if get_particle_signature(mol1) != get_particle_signature(mol2):
-        return False
-    
-    # Contar estrutura de ligações (tipos de partículas + multiplicidade)
-    def get_bond_signature(mol):
-        bonds = mol['bonds']
-        particles = {p['id']: (p['type'], p['polarity']) for p in mol['particles']}
-        
-        bond_sig = []
-        for bond in bonds:
-            from_type = particles[bond['from']]
-            to_type = particles[bond['to']]
-            # Normalizar ordem
-            pair = tuple(sorted([from_type, to_type]))
-            bond_sig.append((pair, bond['multiplicity']))
-        
-        return sorted(bond_sig)
-    
-    return get_bond_signature(mol1) == get_bond_signature(mol2)
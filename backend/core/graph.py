@@ -0,0 +1,95 @@
+"""
+Algoritmos de Grafo para Moléculas
+
+Versões iterativas e lineares (O(n + m)) das travessias usadas pelos motores
+(síntese, validador, analisadores e layout). Nenhuma função é recursiva, então
+moléculas com centenas de partículas não estouram o limite de recursão.
+"""
+
+from collections import deque
+
+
+def build_adjacency(particles, bonds):
+    """
+    Constrói o grafo de adjacências {id: [ids vizinhos]}.
+    Ligações incompletas (sem 'from'/'to') são ignoradas.
+    """
+    adjacency = {p['id']: [] for p in particles}
+    for bond in bonds:
+        if 'from' in bond and 'to' in bond:
+            adjacency[bond['from']].append(bond['to'])
+            adjacency[bond['to']].append(bond['from'])
+    return adjacency
+
+
+def index_particles(particles):
+    """Mapa {id: partícula} (primeira ocorrência de cada ID)"""
+    particles_by_id = {}
+    for particle in particles:
+        particles_by_id.setdefault(particle['id'], particle)
+    return particles_by_id
+
+
+def find_cycle(adjacency, particles):
+    """
+    Encontra o primeiro ciclo visitado por uma DFS (partículas na ordem dada,
+    vizinhos na ordem da adjacência) e retorna a lista de IDs do ciclo.
+    Retorna None se não houver ciclo.
+
+    DFS iterativa com pilha explícita: visita os nós exatamente na mesma ordem
+    da DFS recursiva, portanto encontra o mesmo ciclo.
+    """
+    if len(particles) < 3:
+        return None
+
+    visited = set()
+    parent = {}
+
+    for particle in particles:
+        root = particle['id']
+        if root in visited:
+            continue
+
+        visited.add(root)
+        parent[root] = None
+        stack = [(root, iter(adjacency[root]))]
+
+        while stack:
+            node, neighbors = stack[-1]
+            for neighbor in neighbors:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    parent[neighbor] = node
+                    stack.append((neighbor, iter(adjacency[neighbor])))
+                    break
+                elif neighbor != parent[node]:
+                    # Ciclo encontrado - reconstruir caminho até o ancestral
+                    ancestors = []
+                    current = node
+                    while parent[current] != neighbor and parent[current] is not None:
+                        current = parent[current]
+                        ancestors.append(current)
+                    return [neighbor] + ancestors[::-1] + [node]
+            else:
+                stack.pop()
+
+    return None
+
+
+def is_connected(adjacency, particles):
+    """Verifica se todas as partículas estão conectadas (BFS)"""
+    if len(particles) == 0:
+        return False
+
+    start_id = particles[0]['id']
+    visited = {start_id}
+    queue = deque([start_id])
+
+    while queue:
+        current = queue.popleft()
+        for neighbor in adjacency.get(current, []):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append(neighbor)
+
+    return len(visited) == len(particles)
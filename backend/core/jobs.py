@@ -0,0 +1,353 @@
+"""
+Jobs em Segundo Plano
+
+Cálculos longos (simulações grandes, sínteses automáticas com muitas
+moléculas) rodam fora da requisição HTTP:
+
+- submit_job devolve o job imediatamente (status 'queued'); uma thread
+  coordenadora envia as tarefas ao pool de processos compartilhado - no
+  máximo JOB_WORKERS tarefas do job no pool por vez, a próxima quando uma
+  termina - e acompanha o progresso (tarefas concluídas / total)
+- before_task/after_task rodam no processo principal quando cada tarefa é
+  enviada ao pool e quando termina (ex.: reservar e publicar resultados
+  parciais enquanto o job continua)
+- finalize roda no processo principal com os resultados das tarefas, na
+  ordem em que foram enviadas (cache, layouts, status do save...)
+- cancel_job marca o job como cancelado na hora; ao sair, a thread
+  coordenadora cancela todas as tarefas ainda não iniciadas (inclusive as
+  enviadas depois do pedido de cancelamento). Uma tarefa já em execução
+  não pode ser interrompida: termina no pool e seu resultado é descartado -
+  por isso cálculos longos são divididos em várias tarefas (progresso e
+  cancelamento têm a granularidade de uma tarefa)
+- o pool usa processos 'spawn': os trabalhadores não herdam o estado do
+  processo do servidor (threads, locks, sockets) criado antes do fork.
+  Cálculos síncronos divididos em partes usam o mesmo pool (map_in_pool)
+- jobs terminados ficam disponíveis por JOB_RETENTION_SECONDS (no máximo
+  MAX_RETAINED_JOBS), depois são descartados
+- cada mudança de estado é publicada para o listener registrado
+  (set_job_listener) - o app repassa via Socket.IO
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_FINISHED = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# Eventos publicados ao listener
+EVENT_PROGRESS = 'job_progress'
+EVENT_FINISHED = 'job_finished'
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 0)) or (os.cpu_count() or 1)
+JOB_RETENTION_SECONDS = 3600
+MAX_RETAINED_JOBS = 200
+MAX_ACTIVE_JOBS = 32
+
+# Intervalo de verificação de cancelamento enquanto uma tarefa roda
+_POLL_SECONDS = 0.2
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+_listener = None
+
+
+def set_job_listener(listener):
+    """Registra listener(evento, job) para mudanças de estado (job sem resultado)"""
+    global _listener
+    _listener = listener
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=JOB_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def _discard_executor():
+    """Pool quebrado (processo morto): o próximo job cria outro"""
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _view(job, with_result=False):
+    view = {key: value for key, value in job.items() if not key.startswith('_')}
+    view['progress'] = dict(job['progress'])
+    if not with_result:
+        view.pop('result', None)
+    return view
+
+
+def _notify(event, job):
+    if _listener is None:
+        return
+    with _jobs_lock:
+        view = _view(job)
+    try:
+        _listener(event, view)
+    except Exception as e:
+        print(f'⚠️ Erro ao publicar evento {event} do job {job["id"]}: {e}')
+
+
+def _prune():
+    """Descarta jobs terminados antigos (chamada com _jobs_lock)"""
+    now = time.monotonic()
+    finished = [job_id for job_id, job in _jobs.items() if job['status'] in JOB_FINISHED]
+    excess = len(finished) - MAX_RETAINED_JOBS
+    for job_id in finished:
+        job = _jobs[job_id]
+        if excess > 0 or now - job['_finished_at'] > JOB_RETENTION_SECONDS:
+            del _jobs[job_id]
+            excess -= 1
+
+
+def _finish(job, status, result=None, error=None):
+    with _jobs_lock:
+        if job['status'] in JOB_FINISHED:
+            return False
+        job['status'] = status
+        job['result'] = result
+        job['error'] = error
+        job['phase'] = None
+        job['finished_at'] = datetime.now().isoformat()
+        job['_finished_at'] = time.monotonic()
+    _notify(EVENT_FINISHED, job)
+    return True
+
+
+def submit_job(kind, tasks, finalize=None, params=None, owner=None, cleanup=None,
+               before_task=None, after_task=None):
+    """
+    Cria e inicia um job.
+
+    Args:
+        kind: Tipo do job ('simulate', 'synthesis_auto', ...)
+        tasks: [(função, args)] - funções de módulo (enviadas ao pool de processos)
+        finalize: finalize(resultados) no processo principal; o retorno é o
+                  resultado do job (None = lista de resultados das tarefas)
+        params: Parâmetros do pedido (apenas informativo)
+        owner: Destinatário dos eventos (ex.: sid do Socket.IO) ou None
+        cleanup: cleanup() no processo principal quando o job termina (sucesso,
+                 falha ou cancelamento) - libera o que foi reservado ao criá-lo
+        before_task: before_task(índice) antes de a tarefa ir ao pool
+        after_task: after_task(índice, resultado) quando a tarefa termina
+
+    Returns: job (sem resultado)
+    Raises: RuntimeError se já há MAX_ACTIVE_JOBS jobs em andamento
+    """
+    job = {
+        'id': f'job_{uuid.uuid4().hex[:8]}',
+        'kind': kind,
+        'params': params or {},
+        'owner': owner,
+        'status': JOB_QUEUED,
+        'phase': None,
+        'progress': {'done': 0, 'total': len(tasks)},
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'error': None,
+        'result': None,
+        '_tasks': list(tasks),
+        '_finalize': finalize,
+        '_cleanup': cleanup,
+        '_before_task': before_task,
+        '_after_task': after_task,
+        '_cancel': threading.Event(),
+        '_futures': [],
+        '_finished_at': None
+    }
+
+    with _jobs_lock:
+        _prune()
+        active = sum(1 for existing in _jobs.values() if existing['status'] not in JOB_FINISHED)
+        if active >= MAX_ACTIVE_JOBS:
+            raise RuntimeError(f'Muitos jobs em andamento (máximo {MAX_ACTIVE_JOBS})')
+        _jobs[job['id']] = job
+        view = _view(job)
+
+    threading.Thread(target=_run_job, args=(job,), daemon=True).start()
+    return view
+
+
+def _run_job(job):
+    cancel = job['_cancel']
+    with _jobs_lock:
+        started = not cancel.is_set()
+        if started:
+            job['status'] = JOB_RUNNING
+            job['phase'] = 'computing'
+            job['started_at'] = datetime.now().isoformat()
+            tasks = job.pop('_tasks')
+    if not started:
+        _run_cleanup(job)
+        return
+    _notify(EVENT_PROGRESS, job)
+
+    before_task = job['_before_task']
+    after_task = job['_after_task']
+    futures = {}
+    try:
+        results = [None] * len(tasks)
+        next_index = 0
+        while (futures or next_index < len(tasks)) and not cancel.is_set():
+            # Janela de JOB_WORKERS tarefas: as demais esperam aqui, não na fila do pool
+            while next_index < len(tasks) and len(futures) < JOB_WORKERS:
+                function, args = tasks[next_index]
+                if before_task is not None:
+                    before_task(next_index)
+                futures[_get_executor().submit(function, *args)] = next_index
+                next_index += 1
+            with _jobs_lock:
+                job['_futures'] = list(futures)
+
+            done, _ = wait(futures, timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            if not done or cancel.is_set():
+                continue
+            for future in done:
+                index = futures.pop(future)
+                results[index] = future.result()
+                if after_task is not None:
+                    after_task(index, results[index])
+            with _jobs_lock:
+                job['progress']['done'] += len(done)
+            _notify(EVENT_PROGRESS, job)
+
+        if cancel.is_set():
+            return
+
+        with _jobs_lock:
+            job['phase'] = 'finalizing'
+        _notify(EVENT_PROGRESS, job)
+
+        finalize = job['_finalize']
+        result = finalize(results) if finalize is not None else results
+        if not cancel.is_set():
+            _finish(job, JOB_DONE, result=result)
+    except BrokenProcessPool as e:
+        _discard_executor()
+        _finish(job, JOB_FAILED, error=f'Pool de processos interrompido: {e}')
+    except Exception as e:
+        _finish(job, JOB_FAILED, error=str(e))
+    finally:
+        # Cancelamento (mesmo antes de _futures existir), falha ou fim: nada
+        # fica na fila do pool atrasando os próximos jobs
+        for future in futures:
+            future.cancel()
+        job['_futures'] = []
+        job['_finalize'] = None
+        job['_before_task'] = job['_after_task'] = None
+        _run_cleanup(job)
+
+
+def _run_cleanup(job):
+    cleanup = job['_cleanup']
+    job['_cleanup'] = None
+    if cleanup is None:
+        return
+    try:
+        cleanup()
+    except Exception as e:
+        print(f'⚠️ Erro ao liberar o job {job["id"]}: {e}')
+
+
+def cancel_job(job_id):
+    """
+    Cancela um job em andamento.
+    Returns: True se cancelado, False se já terminado; None se não existe
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        if job['status'] in JOB_FINISHED:
+            return False
+        job['_cancel'].set()
+        futures = list(job['_futures'])
+
+    for future in futures:
+        future.cancel()
+    return _finish(job, JOB_CANCELLED)
+
+
+def get_job(job_id, with_result=True):
+    """Estado do job (com resultado, se terminado) ou None"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return _view(job, with_result) if job is not None else None
+
+
+def list_jobs(kind=None):
+    """Jobs retidos (sem resultados), mais recentes primeiro"""
+    with _jobs_lock:
+        _prune()
+        return [
+            _view(job) for job in reversed(_jobs.values())
+            if kind is None or job['kind'] == kind
+        ]
+
+
+def wait_for_job(job_id, timeout=None):
+    """Bloqueia até o job terminar (scripts/testes). Returns: job com resultado ou None"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None or job['status'] in JOB_FINISHED:
+            return job
+        if deadline is not None and time.monotonic() >= deadline:
+            return job
+        time.sleep(0.05)
+
+
+def get_job_stats():
+    """Contagem de jobs retidos por status e configuração do pool"""
+    with _jobs_lock:
+        counts = {}
+        for job in _jobs.values():
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+    return {
+        'jobs': counts,
+        'workers': JOB_WORKERS,
+        'max_active_jobs': MAX_ACTIVE_JOBS,
+        'retention_seconds': JOB_RETENTION_SECONDS
+    }
+
+
+def map_in_pool(function, items):
+    """
+    function(item) para cada item no pool de processos dos jobs, para
+    cálculos síncronos divididos em partes (as partes dividem o pool com
+    as tarefas dos jobs em andamento).
+
+    Returns: resultados na ordem dos itens
+    Raises: a exceção da primeira parte que falhar
+    """
+    try:
+        return list(_get_executor().map(function, items))
+    except BrokenProcessPool:
+        _discard_executor()
+        raise
+
+
+def synthesize_pairs(pairs):
+    """Tarefa de pool: synthesize(A, B) para cada par, na ordem"""
+    from .synthesis import synthesize
+    return [synthesize(molecule_a, molecule_b) for molecule_a, molecule_b in pairs]
@@ -6,6 +6,8 @@ Detecta propriedades estruturais que podem ser usadas para:
 - Efeitos e propriedades químicas (ex: cadeia circular = sabor azedo)
 """
 
+from .graph import build_adjacency, find_cycle, is_connected
+
 def analyze_molecule_structure(molecule):
     """
     Analisa a estrutura de uma molécula e retorna suas características.
@@ -26,10 +28,7 @@ def analyze_molecule_structure(molecule):
         raise ValueError(f'Molécula inválida: deve ter pelo menos 2 partículas (atual: {len(particles)})')
     
     # Construir grafo de adjacências
-    adjacency = {p['id']: [] for p in particles}
-    for bond in bonds:
-        adjacency[bond['from']].append(bond['to'])
-        adjacency[bond['to']].append(bond['from'])
+    adjacency = build_adjacency(particles, bonds)
     
     # Calcular graus (número de conexões de cada partícula)
     degrees = {pid: len(neighbors) for pid, neighbors in adjacency.items()}
@@ -58,50 +57,16 @@ def analyze_molecule_structure(molecule):
 
 def _has_cycle_dfs(adjacency, particles):
     """
-    Detecta se há ciclo usando DFS.
+    Detecta se há ciclo usando DFS (iterativa).
     """
-    if len(particles) < 3:
-        return False
-    
-    visited = set()
-    
-    def dfs(node, parent):
-        visited.add(node)
-        for neighbor in adjacency[node]:
-            if neighbor not in visited:
-                if dfs(neighbor, node):
-                    return True
-            elif neighbor != parent:
-                return True  # Encontrou ciclo
-        return False
-    
-    for particle in particles:
-        if particle['id'] not in visited:
-            if dfs(particle['id'], None):
-                return True
-    
-    return False
+    return find_cycle(adjacency, particles) is not None
 
 
 def _is_fully_connected(adjacency, particles):
     """
     Verifica se o grafo é totalmente conectado (BFS).
     """
-    if len(particles) == 0:
-        return False
-    
-    visited = set()
-    queue = [particles[0]['id']]
-    visited.add(particles[0]['id'])
-    
-    while queue:
-        current = queue.pop(0)
-        for neighbor in adjacency[current]:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
-    
-    return len(visited) == len(particles)
+    return is_connected(adjacency, particles)
 
 
 def _classify_topology(adjacency, particles, degrees, has_cycle):
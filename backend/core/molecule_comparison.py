@@ -3,6 +3,9 @@ Funções para comparar moléculas considerando estrutura completa
 (partículas + ligações)
 """
 
+from .graph import index_particles
+
+
 def are_molecules_identical(mol1, mol2):
     """
     Compara duas moléculas verificando se são idênticas estruturalmente
@@ -44,10 +47,11 @@ def create_molecular_fingerprint(molecule):
     ]))
     
     # 2. Criar representação das ligações (normalizada)
+    particles_by_id = index_particles(particles)
     bonds_signature_parts = []
     for bond in bonds:
-        particle_from = next((p for p in particles if p['id'] == bond['from']), None)
-        particle_to = next((p for p in particles if p['id'] == bond['to']), None)
+        particle_from = particles_by_id.get(bond['from'])
+        particle_to = particles_by_id.get(bond['to'])
         
         if not particle_from or not particle_to:
             continue
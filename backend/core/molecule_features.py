@@ -0,0 +1,108 @@
+"""
+Características Estruturais Pré-computadas
+
+A topologia, as informações de ciclo, a sequência de graus e o conjunto de
+multiplicidades de uma molécula dependem apenas da sua estrutura, que nunca
+muda depois que a molécula é criada. Este módulo calcula essas características
+uma única vez e as anexa à molécula (chave 'features'), para que sabor,
+aparência e propriedades estruturais sejam servidos sem percorrer o grafo.
+
+Usado por:
+- data.molecules: pré-computa todas as moléculas de MOLECULES_DATABASE
+- data.discovered_molecules: pré-computa cada descoberta ao ser salva
+- core.analyzer / core.molecule_properties: leem as características prontas
+"""
+
+from .analyzer import analyze_molecule
+from .molecule_analyzer import analyze_molecule_structure
+
+FEATURES_KEY = 'features'
+
+
+def compute_molecule_features(molecule):
+    """
+    Calcula as características estruturais de uma molécula.
+
+    Returns: {
+        'mass': int,                   # Número de partículas (verificação de consistência)
+        'bond_count': int,             # Número de ligações (verificação de consistência)
+        'structure': {...},            # Resultado de analyze_molecule_structure
+        'analysis': {...},             # Resultado de analyze_molecule (inclui cycle_size)
+        'degree_sequence': [int],      # Graus das partículas, em ordem decrescente
+        'multiplicities': [int]        # Multiplicidades distintas, em ordem crescente
+    }
+    """
+    degree_sequence, multiplicities = _degrees_and_multiplicities(molecule)
+
+    return {
+        'mass': len(molecule.get('particles', [])),
+        'bond_count': len(molecule.get('bonds', [])),
+        'structure': analyze_molecule_structure(molecule),
+        'analysis': analyze_molecule(molecule),
+        'degree_sequence': degree_sequence,
+        'multiplicities': multiplicities
+    }
+
+
+def _degrees_and_multiplicities(molecule):
+    """Sequência de graus (decrescente) e multiplicidades distintas (crescente) - O(n + m)"""
+    degrees = {p['id']: 0 for p in molecule.get('particles', [])}
+    for bond in molecule.get('bonds', []):
+        degrees[bond['from']] += 1
+        degrees[bond['to']] += 1
+
+    return (
+        sorted(degrees.values(), reverse=True),
+        sorted(set(bond.get('multiplicity', 1) for bond in molecule.get('bonds', [])))
+    )
+
+
+def attach_molecule_features(molecule):
+    """
+    Pré-computa e anexa as características à molécula (in-place).
+
+    Moléculas com menos de 2 partículas não têm estrutura analisável
+    e são deixadas sem características.
+
+    Returns: a própria molécula
+    """
+    if len(molecule.get('particles', [])) < 2:
+        return molecule
+
+    molecule[FEATURES_KEY] = compute_molecule_features(molecule)
+    return molecule
+
+
+def strip_molecule_features(molecule):
+    """
+    Cópia rasa da molécula sem as características anexadas.
+
+    Para moléculas vindas do corpo de uma requisição: características enviadas
+    pelo cliente não são confiáveis e serão recalculadas.
+    """
+    return {key: value for key, value in molecule.items() if key != FEATURES_KEY}
+
+
+def get_molecule_features(molecule):
+    """
+    Retorna as características pré-computadas da molécula, calculando-as
+    (e anexando-as) apenas se ausentes ou inconsistentes com a estrutura
+    (contagens, sequência de graus e multiplicidades).
+
+    Raises: ValueError se a molécula tiver menos de 2 partículas
+    """
+    features = molecule.get(FEATURES_KEY)
+
+    if (isinstance(features, dict)
+            and features.get('mass') == len(molecule.get('particles', []))
+            and features.get('bond_count') == len(molecule.get('bonds', []))
+            and 'structure' in features
+            and 'analysis' in features
+            and 'multiplicities' in features
+            and (features.get('degree_sequence'), features['multiplicities'])
+                == _degrees_and_multiplicities(molecule)):
+        return features
+
+    features = compute_molecule_features(molecule)
+    molecule[FEATURES_KEY] = features
+    return features
@@ -5,7 +5,7 @@ Calcula propriedades como sabor e aparência baseadas em características estrut
 Usado para mecânica de identificação de moléculas no gameplay.
 """
 
-from core.molecule_analyzer import analyze_molecule_structure
+from core.molecule_features import get_molecule_features
 
 
 # ============================================================================
@@ -101,6 +101,19 @@ def get_appearance_from_bonds(bonds):
     # Extrair multiplicidades únicas
     multiplicities = set(bond.get('multiplicity', 1) for bond in bonds)
     
+    return get_appearance_from_multiplicities(multiplicities)
+
+
+def get_appearance_from_multiplicities(multiplicities):
+    """
+    Retorna a aparência (cor) a partir do conjunto de multiplicidades distintas.
+    
+    Args:
+        multiplicities: Iterável com as multiplicidades presentes (ex: [1, 2])
+    
+    Returns:
+        Dict com 'name', 'color', 'description'
+    """
     # Buscar no mapa
     appearance = MULTIPLICITY_COLOR_MAP.get(frozenset(multiplicities))
     
@@ -129,7 +142,7 @@ def calculate_flavor(molecule):
     Returns:
         String com o sabor
     """
-    structure = analyze_molecule_structure(molecule)
+    structure = get_molecule_features(molecule)['structure']
     topology = structure.get('topology', 'linear')
     return get_flavor_from_topology(topology)
 
@@ -145,7 +158,11 @@ def calculate_appearance(molecule):
         Dict com 'name', 'color', 'description'
     """
     bonds = molecule.get('bonds', [])
-    return get_appearance_from_bonds(bonds)
+    if not bonds:
+        return get_appearance_from_bonds(bonds)
+    
+    multiplicities = get_molecule_features(molecule)['multiplicities']
+    return get_appearance_from_multiplicities(multiplicities)
 
 
 def calculate_molecule_observable_properties(molecule, profile=None):
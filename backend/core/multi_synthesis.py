@@ -0,0 +1,179 @@
+"""
+Síntese N-ária (três ou mais moléculas em uma reação)
+
+Ordem determinística: dobra à esquerda na ordem da receita,
+((M1 + M2) + M3) + ... Cada passo é exatamente synthesize(mistura, Mi):
+anulação, merge, rebond e separação em componentes. Quando um passo gera
+várias moléculas, elas seguem juntas (uma mistura desconexa) para o passo
+seguinte. Com duas moléculas, o resultado é o mesmo de synthesize. Se um
+passo falha, a receita falha nesse passo.
+
+Intermediários são memoizados por prefixo da receita (estrutura exata de
+cada molécula - a síntese depende da ordem das listas, então a chave não
+é a canônica): receitas com prefixos comuns calculam cada prefixo uma vez,
+dentro de um lote e entre chamadas (cache LRU do processo).
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from .synthesis import reaction_signature, synthesize
+
+# Tamanho do cache de prefixos (intermediários)
+PREFIX_CACHE_SIZE = 4096
+
+MAX_RECIPE_LENGTH = 10
+
+_prefix_cache = OrderedDict()
+_prefix_cache_lock = threading.Lock()
+_prefix_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def _mixture(products):
+    """Produtos de um passo como uma única molécula (desconexa se forem vários)"""
+    if isinstance(products, dict):
+        return products
+
+    particles = []
+    bonds = []
+    for molecule in products:
+        new_ids = {}
+        for particle in molecule['particles']:
+            new_ids[particle['id']] = f'p{len(particles)}'
+            particles.append({
+                'id': new_ids[particle['id']],
+                'type': particle['type'],
+                'polarity': particle['polarity']
+            })
+        for bond in molecule['bonds']:
+            bonds.append({
+                'from': new_ids[bond['from']],
+                'to': new_ids[bond['to']],
+                'multiplicity': bond['multiplicity']
+            })
+    return {'particles': particles, 'bonds': bonds}
+
+
+def _step_summary(step, result):
+    details = result.get('details', {})
+    return {
+        'step': step,
+        'success': result.get('success', False),
+        'reason': details.get('reason'),
+        'annihilated_pairs': details.get('annihilated_pairs', 0),
+        'remaining_particles': details.get('remaining_particles')
+    }
+
+
+def _lookup(prefix, batch):
+    entry = batch.get(prefix)
+    if entry is not None:
+        return entry
+    with _prefix_cache_lock:
+        entry = _prefix_cache.get(prefix)
+        if entry is not None:
+            _prefix_cache.move_to_end(prefix)
+    if entry is not None:
+        batch[prefix] = entry
+    return entry
+
+
+def _store(prefix, entry, batch):
+    batch[prefix] = entry
+    with _prefix_cache_lock:
+        _prefix_cache[prefix] = entry
+        _prefix_cache.move_to_end(prefix)
+        while len(_prefix_cache) > PREFIX_CACHE_SIZE:
+            _prefix_cache.popitem(last=False)
+
+
+def _run_recipe(molecules, batch, counters):
+    """Resultado (compartilhado com o cache - não alterar) e resumo dos passos"""
+    signatures = tuple(reaction_signature(molecule) for molecule in molecules)
+
+    # Maior prefixo já calculado
+    start = len(molecules)
+    entry = None
+    while start >= 2:
+        entry = _lookup(signatures[:start], batch)
+        if entry is not None:
+            break
+        start -= 1
+
+    counters['reused'] += max(0, start - 1)
+    if entry is None:
+        start = 1
+
+    for index in range(start, len(molecules)):
+        if entry is not None and not entry[0]['success']:
+            # Prefixo falhou: a receita inteira falha no mesmo passo
+            break
+        state = molecules[0] if entry is None else _mixture(entry[0]['result'])
+        result = synthesize(state, molecules[index])
+        steps = (entry[1] if entry is not None else []) + [_step_summary(index, result)]
+        entry = (result, steps)
+        _store(signatures[:index + 1], entry, batch)
+        counters['computed'] += 1
+
+    return entry
+
+
+def synthesize_recipes(recipes):
+    """
+    Sintetiza um lote de receitas (listas de moléculas, na ordem de mistura).
+
+    Returns: {
+        'results': [resultado no formato de synthesize, com
+                    details['steps'] e details['failed_step'] se falhou],
+        'stats': {'computed': passos sintetizados, 'reused': passos vindos do cache}
+    }
+    """
+    for recipe in recipes:
+        if len(recipe) < 2 or len(recipe) > MAX_RECIPE_LENGTH:
+            raise ValueError(f'Cada receita deve ter entre 2 e {MAX_RECIPE_LENGTH} moléculas')
+
+    batch = {}
+    counters = {'computed': 0, 'reused': 0}
+    results = []
+
+    for recipe in recipes:
+        result, steps = _run_recipe(recipe, batch, counters)
+
+        # Cópia: o chamador pode desenhar/anotar os produtos
+        result = copy.deepcopy(result)
+        details = result.setdefault('details', {})
+        details['initial_count'] = sum(len(molecule.get('particles', [])) for molecule in recipe)
+        details['annihilated_pairs'] = sum(step['annihilated_pairs'] for step in steps)
+        details['steps'] = copy.deepcopy(steps)
+        if not result['success']:
+            details['failed_step'] = steps[-1]['step']
+        results.append(result)
+
+    with _prefix_cache_lock:
+        _prefix_cache_stats['hits'] += counters['reused']
+        _prefix_cache_stats['misses'] += counters['computed']
+
+    return {'results': results, 'stats': counters}
+
+
+def synthesize_many(molecules):
+    """Sintetiza uma única receita (ver synthesize_recipes)"""
+    return synthesize_recipes([molecules])['results'][0]
+
+
+def get_prefix_cache_stats():
+    """Estatísticas do cache de intermediários"""
+    with _prefix_cache_lock:
+        return {
+            **_prefix_cache_stats,
+            'entries': len(_prefix_cache),
+            'max_entries': PREFIX_CACHE_SIZE
+        }
+
+
+def clear_prefix_cache():
+    """Esvazia o cache de intermediários"""
+    with _prefix_cache_lock:
+        _prefix_cache.clear()
+        _prefix_cache_stats['hits'] = 0
+        _prefix_cache_stats['misses'] = 0
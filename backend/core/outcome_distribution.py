@@ -0,0 +1,463 @@
+"""
+Distribuição de Resultados da Síntese
+
+synthesize é determinística por convenção: annihilate_particles anula sempre
+a primeira partícula compatível de B e rebond_molecule liga sempre o primeiro
+par legal após ordenar por conexões faltantes - o produto depende da ordem das
+listas. Este módulo explora as alternativas:
+
+- anulação: em cada tipo, qualquer escolha das k partículas de A e das k de B
+  que se anulam (k = mesmo número de pares da síntese), escolhas uniformes
+- rebond: a cada passo, qualquer par legal (instáveis, tipos diferentes e
+  polaridades opostas), escolhido uniformemente
+- produto final: separação em componentes e validação, como na síntese
+
+Modos:
+- 'exhaustive': probabilidade exata de cada resultado por programação dinâmica
+  sobre os estados intermediários, memoizada pela chave canônica do estado
+  (estados isomorfos têm a mesma distribuição). Estados sem completamento
+  possível (oráculo de estabilização) são podados. Se o número de estados
+  exceder o orçamento, cai para amostragem.
+- 'sample': passeios aleatórios (frequências observadas)
+
+Escolhas de anulação distintas (por chave canônica do intermediário) e lotes
+de amostras podem ser avaliados no pool de processos dos jobs (core.jobs).
+"""
+
+import os
+import random
+import time
+from itertools import combinations, product
+from .canonical import CANONICAL_KEY, canonical_key, canonicalize_molecule
+from .jobs import map_in_pool
+from .stability import can_complete_bonding
+from .synthesis import (
+    count_annihilations, merge_molecules, find_connected_components,
+    split_into_molecules, mark_layout_pending
+)
+from .validator import validate_molecule
+
+MODE_EXHAUSTIVE = 'exhaustive'
+MODE_SAMPLE = 'sample'
+MODES = (MODE_EXHAUSTIVE, MODE_SAMPLE)
+
+DEFAULT_SAMPLES = 1000
+
+# Orçamentos do modo exaustivo (acima deles: amostragem)
+MAX_ANNIHILATION_CHOICES = 5000
+MAX_STATES = 20000
+
+FAILURE_REASONS = ('no_reaction', 'complete_annihilation', 'cannot_rebond', 'invalid_result')
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+# --------------------------------------------
+# Anulação
+# --------------------------------------------
+
+def _annihilation_buckets(molecule_a, molecule_b):
+    """
+    Grupos de escolha da anulação: [(IDs de A, IDs de B, k)] por
+    (tipo, polaridade de A) com k pares anulados.
+    """
+    by_class_a = {}
+    by_class_b = {}
+    for particle in molecule_a['particles']:
+        by_class_a.setdefault((particle['type'], particle['polarity']), []).append(particle['id'])
+    for particle in molecule_b['particles']:
+        by_class_b.setdefault((particle['type'], particle['polarity']), []).append(particle['id'])
+
+    buckets = []
+    for (ptype, polarity), ids_a in by_class_a.items():
+        ids_b = by_class_b.get((ptype, '-' if polarity == '+' else '+'), [])
+        k = min(len(ids_a), len(ids_b))
+        if k:
+            buckets.append((ids_a, ids_b, k))
+    return buckets
+
+
+def _choice_count(buckets):
+    total = 1
+    for ids_a, ids_b, k in buckets:
+        total *= _binomial(len(ids_a), k) * _binomial(len(ids_b), k)
+    return total
+
+
+def _binomial(n, k):
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def _cleaned(molecule, removed):
+    return {
+        'particles': [p for p in molecule['particles'] if p['id'] not in removed],
+        'bonds': [b for b in molecule['bonds'] if b['from'] not in removed and b['to'] not in removed]
+    }
+
+
+def _intermediate(molecule_a, molecule_b, removed_a, removed_b):
+    """Molécula mesclada após uma escolha de anulação (sem coordenadas)"""
+    merged = merge_molecules(_cleaned(molecule_a, removed_a), _cleaned(molecule_b, removed_b))
+    for particle in merged['particles']:
+        particle.pop('x', None)
+        particle.pop('y', None)
+    return merged
+
+
+def _all_choices(buckets):
+    per_bucket = [
+        [
+            (set(chosen_a), set(chosen_b))
+            for chosen_a in combinations(ids_a, k)
+            for chosen_b in combinations(ids_b, k)
+        ]
+        for ids_a, ids_b, k in buckets
+    ]
+    for combination in product(*per_bucket):
+        removed_a = set()
+        removed_b = set()
+        for chosen_a, chosen_b in combination:
+            removed_a |= chosen_a
+            removed_b |= chosen_b
+        yield removed_a, removed_b
+
+
+def _random_choice(buckets, rng):
+    removed_a = set()
+    removed_b = set()
+    for ids_a, ids_b, k in buckets:
+        removed_a.update(rng.sample(ids_a, k))
+        removed_b.update(rng.sample(ids_b, k))
+    return removed_a, removed_b
+
+
+# --------------------------------------------
+# Rebond
+# --------------------------------------------
+
+def _missing(state):
+    from data.molecules import PARTICLE_TYPES
+
+    connections = {p['id']: 0 for p in state['particles']}
+    for bond in state['bonds']:
+        connections[bond['from']] += bond['multiplicity']
+        connections[bond['to']] += bond['multiplicity']
+    return {
+        p['id']: PARTICLE_TYPES[p['type']]['connections'] - connections[p['id']]
+        for p in state['particles']
+    }
+
+
+def _legal_moves(state, missing):
+    """Pares (id1, id2) de instáveis com tipos diferentes e polaridades opostas"""
+    unstable = [p for p in state['particles'] if missing[p['id']] > 0]
+    return [
+        (first['id'], second['id'])
+        for index, first in enumerate(unstable)
+        for second in unstable[index + 1:]
+        if first['type'] != second['type'] and first['polarity'] != second['polarity']
+    ]
+
+
+def _apply_move(state, id1, id2):
+    """Novo estado com a ligação id1-id2 criada (ou com multiplicidade +1)"""
+    bonds = []
+    linked = False
+    for bond in state['bonds']:
+        if not linked and {bond['from'], bond['to']} == {id1, id2}:
+            bond = {**bond, 'multiplicity': bond['multiplicity'] + 1}
+            linked = True
+        bonds.append(bond)
+    if not linked:
+        bonds.append({'from': id1, 'to': id2, 'multiplicity': 1})
+    return {'particles': state['particles'], 'bonds': bonds}
+
+
+def _terminal_outcome(state, products):
+    """
+    Resultado de um estado estável: tupla ordenada das chaves dos produtos
+    válidos (ou o motivo da falha). Registra um representante de cada produto.
+    """
+    components = find_connected_components(state)
+    molecules = split_into_molecules(state, components) if len(components) > 1 else [state]
+
+    keys = []
+    for molecule in molecules:
+        is_valid, _ = validate_molecule(molecule)
+        if not is_valid:
+            continue
+        key = canonical_key(molecule)
+        if key not in products:
+            products[key] = canonicalize_molecule(molecule)
+        keys.append(key)
+
+    if not keys:
+        return 'invalid_result'
+    return tuple(sorted(keys))
+
+
+def _outcome_of_state(state, products):
+    """Estado terminal (ou sem saída) -> resultado; None se ainda há ligações a fazer"""
+    missing = _missing(state)
+    if not any(count > 0 for count in missing.values()):
+        return _terminal_outcome(state, products), None
+    if not can_complete_bonding(state):
+        return 'cannot_rebond', None
+    moves = _legal_moves(state, missing)
+    if not moves:
+        return 'cannot_rebond', None
+    return None, moves
+
+
+def _exact_distribution(state, memo, products, max_states):
+    """Distribuição exata {resultado: probabilidade} a partir de um estado"""
+    key = canonical_key(state)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached
+
+    if len(memo) >= max_states:
+        raise _BudgetExceeded()
+
+    outcome, moves = _outcome_of_state(state, products)
+    if outcome is not None:
+        distribution = {outcome: 1.0}
+    else:
+        distribution = {}
+        weight = 1.0 / len(moves)
+        for id1, id2 in moves:
+            child = _exact_distribution(_apply_move(state, id1, id2), memo, products, max_states)
+            for child_outcome, probability in child.items():
+                distribution[child_outcome] = distribution.get(child_outcome, 0.0) + weight * probability
+
+    memo[key] = distribution
+    return distribution
+
+
+def _random_walk(state, rng, products):
+    while True:
+        outcome, moves = _outcome_of_state(state, products)
+        if outcome is not None:
+            return outcome
+        state = _apply_move(state, *rng.choice(moves))
+
+
+# --------------------------------------------
+# Trabalhos (executados no processo atual ou no pool)
+# --------------------------------------------
+
+def exhaustive_job(job):
+    """
+    Distribuições exatas de um lote de intermediários.
+
+    Args:
+        job: ([(peso, intermediário)], max_states)
+
+    Returns: ({resultado: probabilidade ponderada}, {chave: produto}, estados)
+    """
+    weighted_states, max_states = job
+    memo = {}
+    products = {}
+    distribution = {}
+    for weight, state in weighted_states:
+        for outcome, probability in _exact_distribution(state, memo, products, max_states).items():
+            distribution[outcome] = distribution.get(outcome, 0.0) + weight * probability
+    return distribution, products, len(memo)
+
+
+def sample_job(job):
+    """
+    Amostras de um lote.
+
+    Args:
+        job: (molécula_a, molécula_b, amostras, semente)
+
+    Returns: ({resultado: contagem}, {chave: produto})
+    """
+    molecule_a, molecule_b, samples, seed = job
+    rng = random.Random(seed)
+    buckets = _annihilation_buckets(molecule_a, molecule_b)
+    products = {}
+    counts = {}
+    for _ in range(samples):
+        removed_a, removed_b = _random_choice(buckets, rng)
+        outcome = _random_walk(_intermediate(molecule_a, molecule_b, removed_a, removed_b), rng, products)
+        counts[outcome] = counts.get(outcome, 0) + 1
+    return counts, products
+
+
+def _split(items, parts):
+    parts = max(1, min(parts, len(items)))
+    return [items[index::parts] for index in range(parts)]
+
+
+def _run(function, jobs, workers):
+    if workers > 1 and len(jobs) > 1:
+        return map_in_pool(function, jobs)
+    return [function(job) for job in jobs]
+
+
+def _exhaustive(molecule_a, molecule_b, buckets, workers):
+    """Distribuição exata ou None se algum orçamento for excedido"""
+    total_choices = _choice_count(buckets)
+    if total_choices > MAX_ANNIHILATION_CHOICES:
+        return None
+
+    # Escolhas de anulação isomorfas levam ao mesmo intermediário
+    intermediates = {}
+    for removed_a, removed_b in _all_choices(buckets):
+        state = _intermediate(molecule_a, molecule_b, removed_a, removed_b)
+        key = canonical_key(state)
+        if key in intermediates:
+            intermediates[key][0] += 1
+        else:
+            intermediates[key] = [1, state]
+
+    weighted = [(count / total_choices, state) for count, state in intermediates.values()]
+    jobs = [(chunk, MAX_STATES) for chunk in _split(weighted, workers)]
+    try:
+        results = _run(exhaustive_job, jobs, workers)
+    except _BudgetExceeded:
+        return None
+
+    distribution = {}
+    products = {}
+    states = 0
+    for partial, partial_products, partial_states in results:
+        for outcome, probability in partial.items():
+            distribution[outcome] = distribution.get(outcome, 0.0) + probability
+        products.update(partial_products)
+        states += partial_states
+
+    return distribution, products, {
+        'annihilation_choices': total_choices,
+        'distinct_intermediates': len(intermediates),
+        'states': states
+    }
+
+
+def _sampled(molecule_a, molecule_b, samples, seed, workers):
+    rng = random.Random(seed)
+    parts = max(1, min(workers, samples))
+    jobs = [
+        (molecule_a, molecule_b, len(range(index, samples, parts)), rng.randrange(2 ** 32))
+        for index in range(parts)
+    ]
+
+    counts = {}
+    products = {}
+    for partial_counts, partial_products in _run(sample_job, jobs, workers):
+        for outcome, count in partial_counts.items():
+            counts[outcome] = counts.get(outcome, 0) + count
+        products.update(partial_products)
+
+    distribution = {outcome: count / samples for outcome, count in counts.items()}
+    return distribution, products, counts
+
+
+def _structure(molecule):
+    return {
+        'particles': [
+            {'id': p['id'], 'type': p['type'], 'polarity': p['polarity']}
+            for p in molecule.get('particles', [])
+        ],
+        'bonds': [
+            {'from': b['from'], 'to': b['to'], 'multiplicity': b.get('multiplicity', 1)}
+            for b in molecule.get('bonds', [])
+        ]
+    }
+
+
+def synthesis_outcome_distribution(molecule_a, molecule_b, mode=MODE_EXHAUSTIVE,
+                                   samples=DEFAULT_SAMPLES, seed=None, workers=1):
+    """
+    Distribuição dos produtos de A + B sobre as ordens alternativas de
+    anulação e rebond.
+
+    Args:
+        mode: 'exhaustive' (probabilidades exatas) ou 'sample'
+        samples: Amostras no modo 'sample' (ou na queda por orçamento)
+        seed: Semente da amostragem (resultados reprodutíveis)
+        workers: Partes avaliadas no pool dos jobs (None = número de CPUs; 0 ou 1 = sem pool)
+
+    Returns: {
+        'mode': modo efetivamente usado,
+        'outcomes': [{'products': [moléculas], 'canonical_keys': [...],
+                      'probability': float, 'samples': int (modo 'sample')}],
+        'failures': {motivo: probabilidade},
+        'details': {...}
+    }
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode deve ser um de: {', '.join(MODES)}")
+
+    started = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    molecule_a = _structure(molecule_a)
+    molecule_b = _structure(molecule_b)
+
+    annihilated_pairs = count_annihilations(molecule_a['particles'], molecule_b['particles'])
+    remaining = len(molecule_a['particles']) + len(molecule_b['particles']) - 2 * annihilated_pairs
+    details = {'annihilated_pairs': annihilated_pairs, 'remaining_particles': remaining}
+
+    # Casos decididos pela contagem: não dependem de ordem
+    if annihilated_pairs == 0 or remaining == 0:
+        reason = 'no_reaction' if annihilated_pairs == 0 else 'complete_annihilation'
+        return {
+            'mode': mode,
+            'outcomes': [],
+            'failures': {reason: 1.0},
+            'details': {**details, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)}
+        }
+
+    buckets = _annihilation_buckets(molecule_a, molecule_b)
+    counts = None
+    exact = None
+    if mode == MODE_EXHAUSTIVE:
+        exact = _exhaustive(molecule_a, molecule_b, buckets, workers)
+        if exact is None:
+            details['fallback'] = 'budget_exceeded'
+            mode = MODE_SAMPLE
+
+    if exact is not None:
+        distribution, products, stats = exact
+        details.update(stats)
+    else:
+        distribution, products, counts = _sampled(molecule_a, molecule_b, samples, seed, workers)
+        details['samples'] = samples
+
+    outcomes = []
+    failures = {}
+    for outcome, probability in distribution.items():
+        if isinstance(outcome, str):
+            failures[outcome] = round(failures.get(outcome, 0.0) + probability, 6)
+            continue
+        entry = {
+            'products': [
+                mark_layout_pending({**products[key], CANONICAL_KEY: key})
+                for key in outcome
+            ],
+            'canonical_keys': list(outcome),
+            'probability': round(probability, 6)
+        }
+        if counts is not None:
+            entry['samples'] = counts[outcome]
+        outcomes.append(entry)
+
+    outcomes.sort(key=lambda entry: (-entry['probability'], entry['canonical_keys']))
+    details['distinct_outcomes'] = len(outcomes)
+    details['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    return {
+        'mode': mode,
+        'outcomes': outcomes,
+        'failures': failures,
+        'details': details
+    }
@@ -0,0 +1,190 @@
+"""
+Recomendador de Pares de Síntese
+
+Ordena os pares A x B do conjunto conhecido de um save (moléculas base +
+descobertas) pela chance de produzirem algo que o save ainda não conhece,
+sem executar synthesize:
+
+- resultado conhecido: pares já avaliados pela rede incremental do save
+  (data.network_updater) - todo par de moléculas da rede foi sintetizado;
+  reações registradas dizem exatamente quais produtos saem, e pares sem
+  reação registrada não reagem
+- resultado previsto: pares com alguma molécula ainda fora da rede.
+  Candidatos vêm de um índice por (tipo, polaridade): só pares com pelo
+  menos um tipo em polaridades opostas podem anular algo. Para cada um,
+  o mesmo pré-filtro da síntese (contagem de anulações, anulação completa
+  e oráculo de estabilização sobre o restante) descarta os pares que
+  certamente falham; a novidade é estimada pela composição do restante
+  (nenhuma molécula conhecida com a mesma composição)
+"""
+
+import time
+from .canonical import CANONICAL_KEY, canonical_key
+from .stability import can_complete_bonding, count_particles
+from .synthesis import annihilate_particles, count_annihilations
+
+# Pontuações: resultado conhecido com produto novo > previsto com composição nova > previsto
+SCORE_KNOWN = 1.0
+SCORE_PREDICTED_NOVEL = 0.6
+SCORE_PREDICTED = 0.3
+
+DEFAULT_TOP_K = 10
+
+
+def _opposite(polarity):
+    return '-' if polarity == '+' else '+'
+
+
+def _composition(counts):
+    return frozenset((cls, count) for cls, count in counts.items() if count > 0)
+
+
+def _remaining_composition(counts_a, counts_b):
+    """Composição (tipo, polaridade) do que sobra após a anulação de A + B"""
+    remaining = dict(counts_a)
+    for (ptype, polarity), count_b in counts_b.items():
+        annihilated = min(count_b, counts_a.get((ptype, _opposite(polarity)), 0))
+        remaining[(ptype, _opposite(polarity))] = remaining.get((ptype, _opposite(polarity)), 0) - annihilated
+        remaining[(ptype, polarity)] = remaining.get((ptype, polarity), 0) + count_b - annihilated
+    return _composition(remaining)
+
+
+def _predict(molecule_a, molecule_b):
+    """
+    Pré-filtro da síntese, sem merge/rebond/validação.
+    Returns: (anulações, partículas restantes) ou None se o par certamente falha
+    """
+    particles_a = molecule_a.get('particles', [])
+    particles_b = molecule_b.get('particles', [])
+    annihilated_pairs = count_annihilations(particles_a, particles_b)
+    remaining = len(particles_a) + len(particles_b) - 2 * annihilated_pairs
+    if annihilated_pairs == 0 or remaining == 0:
+        return None
+
+    # A anulação substitui as listas das visões, sem alterar as moléculas
+    cleaned_a, cleaned_b, _ = annihilate_particles(
+        {'particles': particles_a, 'bonds': molecule_a.get('bonds', [])},
+        {'particles': particles_b, 'bonds': molecule_b.get('bonds', [])}
+    )
+    if not can_complete_bonding(cleaned_a, cleaned_b):
+        return None
+    return annihilated_pairs, remaining
+
+
+def recommend_pairs(known, network=None, top_k=DEFAULT_TOP_K):
+    """
+    Recomenda os pares mais promissores do conjunto conhecido.
+
+    Args:
+        known: [(id, molécula)] - moléculas base e descobertas do save
+        network: Rede incremental do save (ou None se ainda não existe)
+        top_k: Número de pares retornados
+
+    Returns: {
+        'recommendations': [{
+            'molecule_a': id, 'molecule_b': id,
+            'score': float,
+            'confidence': 'known' | 'predicted',
+            'novel_products': int,        # Apenas para resultados conhecidos
+            'annihilated_pairs': int,     # Apenas para previsões
+            'remaining_particles': int    # Apenas para previsões
+        }],
+        'details': {'known_pairs', 'predicted_pairs', 'candidates', 'reconciled_molecules', 'elapsed_ms'}
+    }
+    """
+    started = time.perf_counter()
+
+    molecules = dict(known)
+    keys = {
+        molecule_id: molecule.get(CANONICAL_KEY) or canonical_key(molecule)
+        for molecule_id, molecule in known
+    }
+    known_keys = set(keys.values())
+    counts = {molecule_id: count_particles(molecule.get('particles', [])) for molecule_id, molecule in known}
+    known_compositions = {_composition(molecule_counts) for molecule_counts in counts.values()}
+
+    recommendations = []
+
+    # Resultados conhecidos (pares avaliados pela rede do save)
+    reconciled = set()
+    if network is not None:
+        ids_by_key = {}
+        for key, entry in network['molecules'].items():
+            for source_id in entry['source_ids']:
+                if source_id in molecules and keys[source_id] == key:
+                    reconciled.add(source_id)
+                    ids_by_key.setdefault(key, source_id)
+
+        for reaction in network['reactions']:
+            id_a = ids_by_key.get(reaction['a'])
+            id_b = ids_by_key.get(reaction['b'])
+            if id_a is None or id_b is None:
+                continue
+            novel = sum(1 for product_key in reaction['products'] if product_key not in known_keys)
+            if novel:
+                recommendations.append({
+                    'molecule_a': id_a,
+                    'molecule_b': id_b,
+                    'score': SCORE_KNOWN,
+                    'confidence': 'known',
+                    'novel_products': novel
+                })
+    known_pairs = len(recommendations)
+
+    # Previsões (pares com alguma molécula fora da rede)
+    by_class = {}
+    for molecule_id, molecule_counts in counts.items():
+        for cls in molecule_counts:
+            by_class.setdefault(cls, []).append(molecule_id)
+
+    candidates = 0
+    pending = [molecule_id for molecule_id in molecules if molecule_id not in reconciled]
+    for molecule_id in pending:
+        partners = {
+            partner_id
+            for ptype, polarity in counts[molecule_id]
+            for partner_id in by_class.get((ptype, _opposite(polarity)), ())
+        }
+        for partner_id in partners:
+            # Pares entre duas pendentes aparecem uma vez (ambas as ordens)
+            if partner_id not in reconciled and partner_id < molecule_id:
+                continue
+            pairs = [(molecule_id, partner_id)]
+            if partner_id != molecule_id:
+                pairs.append((partner_id, molecule_id))
+
+            for id_a, id_b in pairs:
+                candidates += 1
+                prediction = _predict(molecules[id_a], molecules[id_b])
+                if prediction is None:
+                    continue
+                annihilated_pairs, remaining = prediction
+                novel = _remaining_composition(counts[id_a], counts[id_b]) not in known_compositions
+                recommendations.append({
+                    'molecule_a': id_a,
+                    'molecule_b': id_b,
+                    'score': SCORE_PREDICTED_NOVEL if novel else SCORE_PREDICTED,
+                    'confidence': 'predicted',
+                    'annihilated_pairs': annihilated_pairs,
+                    'remaining_particles': remaining
+                })
+
+    # Desempate: produtos maiores (mais raros) primeiro; IDs para ordem estável
+    recommendations.sort(key=lambda r: (
+        -r['score'],
+        -r.get('novel_products', 0),
+        -r.get('remaining_particles', 0),
+        r['molecule_a'],
+        r['molecule_b']
+    ))
+
+    return {
+        'recommendations': recommendations[:top_k],
+        'details': {
+            'known_pairs': known_pairs,
+            'predicted_pairs': len(recommendations) - known_pairs,
+            'candidates': candidates,
+            'reconciled_molecules': len(reconciled),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+    }
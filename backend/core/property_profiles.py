@@ -13,6 +13,7 @@ import random
 import json
 import os
 from typing import Dict, List, Optional, Tuple
+from .single_flight import SingleFlight
 
 # ============================================================================
 # LISTAS DE ELEMENTOS PARA RANDOMIZAÇÃO
@@ -278,30 +279,21 @@ def _deserialize_profile_from_json(profile_data: Dict) -> Dict:
 
 def load_profiles() -> Dict:
     """Carrega todos os perfis salvos"""
-    import os
+    from data.storage import read_json
     
-    if not os.path.exists(PROFILES_FILE):
-        return {}
+    # Arquivo corrompido é preservado à parte por read_json (nunca sobrescrito)
+    profiles_data = read_json(PROFILES_FILE)
     
-    try:
-        with open(PROFILES_FILE, 'r', encoding='utf-8') as f:
-            profiles_data = json.load(f)
-            # Deserializar cada perfil
-            deserialized_profiles = {}
-            for save_id, profile_data in profiles_data.items():
-                deserialized_profiles[save_id] = _deserialize_profile_from_json(profile_data)
-            return deserialized_profiles
-    except Exception as e:
-        print(f"Erro ao carregar perfis: {e}")
-        return {}
+    # Deserializar cada perfil
+    deserialized_profiles = {}
+    for save_id, profile_data in profiles_data.items():
+        deserialized_profiles[save_id] = _deserialize_profile_from_json(profile_data)
+    return deserialized_profiles
 
 
 def save_profiles(profiles: Dict) -> None:
-    """Salva todos os perfis"""
-    import os
-    
-    # Criar diretório se não existir
-    os.makedirs(os.path.dirname(PROFILES_FILE), exist_ok=True)
+    """Salva todos os perfis (escrita atômica)"""
+    from data.storage import write_json
     
     # Serializar cada perfil antes de salvar
     serialized_profiles = {}
@@ -309,8 +301,7 @@ def save_profiles(profiles: Dict) -> None:
         serialized_profiles[save_id] = _serialize_profile_for_json(profile)
     
     try:
-        with open(PROFILES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(serialized_profiles, f, indent=2, ensure_ascii=False)
+        write_json(PROFILES_FILE, serialized_profiles)
     except Exception as e:
         print(f"Erro ao salvar perfis: {e}")
 
@@ -363,6 +354,10 @@ def check_molecule_effects(molecule: Dict, profile: Dict) -> List[str]:
     return effects
 
 
+# Perfis em criação por save (pedidos simultâneos geram um único perfil)
+_profile_flights = SingleFlight('property_profile')
+
+
 def get_or_create_profile(save_id: str) -> Dict:
     """
     Obtém o perfil de um save, criando um novo se não existir.
@@ -375,6 +370,11 @@ def get_or_create_profile(save_id: str) -> Dict:
     Returns:
         Dict com o perfil
     """
+    profile, _ = _profile_flights.run(save_id, _load_or_create_profile, save_id)
+    return profile
+
+
+def _load_or_create_profile(save_id: str) -> Dict:
     profiles = load_profiles()
     
     # Verificar se precisa criar ou atualizar perfil
@@ -432,11 +432,17 @@ def get_or_create_profile(save_id: str) -> Dict:
                         break
     
     if needs_regeneration:
+        from data.storage import file_lock
+        
         # Gerar novo perfil com formato atualizado
         profile = generate_property_profile(save_id)
         profile['generated_at'] = __import__('datetime').datetime.now().isoformat()
-        profiles[save_id] = profile
-        save_profiles(profiles)
+        
+        # Recarregar sob lock para não perder perfis gravados por outro worker
+        with file_lock(PROFILES_FILE):
+            profiles = load_profiles()
+            profiles[save_id] = profile
+            save_profiles(profiles)
         return profile
     
     return profiles[save_id]
@@ -466,11 +472,14 @@ def delete_profile(save_id: str) -> bool:
     Returns:
         True se deletado com sucesso, False caso contrário
     """
-    profiles = load_profiles()
+    from data.storage import file_lock
     
-    if save_id in profiles:
-        del profiles[save_id]
-        save_profiles(profiles)
-        return True
+    with file_lock(PROFILES_FILE):
+        profiles = load_profiles()
+        
+        if save_id in profiles:
+            del profiles[save_id]
+            save_profiles(profiles)
+            return True
     
     return False
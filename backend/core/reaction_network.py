@@ -0,0 +1,296 @@
+"""
+Rede de Reações (Fecho por Síntese)
+
+Calcula o conjunto de moléculas alcançáveis a partir de moléculas de partida
+(ex: MOLECULES_DATABASE) por sínteses repetidas, até uma massa máxima, e o
+grafo de reações que as conecta.
+
+Avaliação semi-ingênua: a cada rodada apenas as moléculas derivadas na rodada
+anterior (delta) são combinadas com o conjunto conhecido (delta x conhecidas
+e conhecidas x delta, pares ordenados - a síntese não é comutativa). Pares já
+avaliados nunca são sintetizados de novo; o fecho termina quando uma rodada
+não produz moléculas novas.
+
+As moléculas são deduplicadas pela chave canônica. Os pares de cada rodada
+são avaliados em lotes, opcionalmente em um pool de processos.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from data.molecules import calculate_molecular_formula
+from .canonical import CANONICAL_KEY, canonical_key
+from .synthesis import check_synthesis, synthesize
+
+# Massa máxima padrão das moléculas da rede
+DEFAULT_MAX_MASS = 6
+
+# Pares por lote enviado a um processo
+PAIR_BATCH_SIZE = 256
+
+NETWORK_VERSION = 1
+
+
+def _compact(molecule):
+    """Apenas a estrutura (IDs, tipos, polaridades e ligações) - sem coordenadas e anotações"""
+    return {
+        'particles': [
+            {'id': p['id'], 'type': p['type'], 'polarity': p['polarity']}
+            for p in molecule.get('particles', [])
+        ],
+        'bonds': [
+            {'from': b['from'], 'to': b['to'], 'multiplicity': b.get('multiplicity', 1)}
+            for b in molecule.get('bonds', [])
+        ]
+    }
+
+
+def react_pairs(batch):
+    """
+    Avalia um lote de pares (executado nos processos do pool).
+
+    Args:
+        batch: [(chave_a, molécula_a, chave_b, molécula_b)]
+
+    Returns: [(chave_a, chave_b, [(chave_produto, produto compacto)])]
+             apenas para os pares cuja síntese teve sucesso
+    """
+    reactions = []
+    for key_a, molecule_a, key_b, molecule_b in batch:
+        if not check_synthesis(molecule_a, molecule_b)['can_synthesize']:
+            continue
+        result = synthesize(molecule_a, molecule_b)
+        if not result.get('success'):
+            continue
+        produced = result['result']
+        products = produced if isinstance(produced, list) else [produced]
+        reactions.append((key_a, key_b, [
+            (product.get(CANONICAL_KEY) or canonical_key(product), _compact(product))
+            for product in products
+        ]))
+    return reactions
+
+
+def _batches(pairs, size):
+    for start in range(0, len(pairs), size):
+        yield pairs[start:start + size]
+
+
+def _new_molecule_entry(molecule, round_number, source_id=None):
+    return {
+        'molecule': molecule,
+        'mass': len(molecule['particles']),
+        'formula': calculate_molecular_formula(molecule),
+        'round': round_number,
+        'source_ids': [source_id] if source_id else []
+    }
+
+
+def new_network(sources, max_mass=DEFAULT_MAX_MASS):
+    """
+    Rede inicial (rodada 0) com as moléculas de partida.
+
+    Args:
+        sources: [(id, molécula)]
+        max_mass: Massa máxima dos produtos (None = sem limite)
+    """
+    network = {
+        'version': NETWORK_VERSION,
+        'max_mass': max_mass,
+        'molecules': {},
+        'reactions': [],
+        'rounds': []
+    }
+    for source_id, molecule in sources:
+        key = canonical_key(molecule)
+        entry = network['molecules'].get(key)
+        if entry is None:
+            network['molecules'][key] = _new_molecule_entry(_compact(molecule), 0, source_id)
+        elif source_id not in entry['source_ids']:
+            entry['source_ids'].append(source_id)
+    return network
+
+
+def _record_reaction(network, key_a, key_b, products, round_number):
+    """
+    Registra A + B -> produtos na rede (produtos acima de max_mass são descartados).
+
+    Args:
+        products: [(chave_produto, produto compacto)]
+
+    Returns: (chaves das moléculas novas, número de produtos descartados)
+    """
+    molecules = network['molecules']
+    max_mass = network['max_mass']
+    product_keys = []
+    new_keys = []
+    dropped = 0
+    for product_key, product in products:
+        if max_mass is not None and len(product['particles']) > max_mass:
+            dropped += 1
+            continue
+        product_keys.append(product_key)
+        if product_key not in molecules:
+            molecules[product_key] = _new_molecule_entry(product, round_number)
+            new_keys.append(product_key)
+    # Reações cujos produtos excedem a massa máxima ficam só na contagem
+    if product_keys:
+        network['reactions'].append({'a': key_a, 'b': key_b, 'products': product_keys})
+    return new_keys, dropped
+
+
+def _evaluate(pairs, executor):
+    batches = list(_batches(pairs, PAIR_BATCH_SIZE))
+    if executor is None or len(batches) < 2:
+        return [reaction for batch in batches for reaction in react_pairs(batch)]
+    return [reaction for result in executor.map(react_pairs, batches) for reaction in result]
+
+
+def _semi_naive_round(network, delta_keys, round_number, executor):
+    """
+    Uma rodada: combina o delta com as moléculas conhecidas.
+    Returns: chaves das moléculas novas (próximo delta)
+    """
+    molecules = network['molecules']
+    delta = set(delta_keys)
+    known_keys = list(molecules)
+    old_keys = [key for key in known_keys if key not in delta]
+
+    pairs = []
+    for key_a in delta_keys:
+        for key_b in known_keys:
+            pairs.append((key_a, molecules[key_a]['molecule'], key_b, molecules[key_b]['molecule']))
+    for key_a in old_keys:
+        for key_b in delta_keys:
+            pairs.append((key_a, molecules[key_a]['molecule'], key_b, molecules[key_b]['molecule']))
+
+    started = time.perf_counter()
+    new_keys = []
+    reactions = _evaluate(pairs, executor)
+    dropped = 0
+
+    for key_a, key_b, products in reactions:
+        created, discarded = _record_reaction(network, key_a, key_b, products, round_number)
+        new_keys.extend(created)
+        dropped += discarded
+
+    network['rounds'].append({
+        'round': round_number,
+        'pairs': len(pairs),
+        'reactions': len(reactions),
+        'dropped_products': dropped,
+        'new_molecules': len(new_keys),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+    return new_keys
+
+
+def compute_reaction_network(sources, max_mass=DEFAULT_MAX_MASS, max_rounds=None, workers=None):
+    """
+    Calcula o fecho da rede de reações por avaliação semi-ingênua.
+
+    Args:
+        sources: [(id, molécula)] de partida
+        max_mass: Massa máxima das moléculas da rede (produtos maiores são descartados)
+        max_rounds: Limite opcional de rodadas
+        workers: Processos do pool (None = número de CPUs; 0 ou 1 = sem pool)
+
+    Returns: {
+        'version', 'max_mass',
+        'molecules': {chave: {'molecule', 'mass', 'formula', 'round', 'source_ids'}},
+        'reactions': [{'a', 'b', 'products': [chaves]}],
+        'rounds': [{'round', 'pairs', 'reactions', 'dropped_products', 'new_molecules', 'elapsed_ms'}],
+        'complete': bool   # False se parou por max_rounds antes do fecho
+    }
+    """
+    network = new_network(sources, max_mass)
+    delta_keys = list(network['molecules'])
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # 'spawn', como o pool dos jobs: os processos não herdam threads e locks de quem chamou
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn')
+    ) if workers > 1 else None
+    try:
+        round_number = 0
+        while delta_keys and (max_rounds is None or round_number < max_rounds):
+            round_number += 1
+            delta_keys = _semi_naive_round(network, delta_keys, round_number, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    network['complete'] = not delta_keys
+    return network
+
+
+def summarize_network(network):
+    """Resumo da rede (contagens por massa e por rodada)"""
+    by_mass = {}
+    for entry in network['molecules'].values():
+        by_mass[entry['mass']] = by_mass.get(entry['mass'], 0) + 1
+
+    return {
+        'max_mass': network['max_mass'],
+        'molecules': len(network['molecules']),
+        'reactions': len(network['reactions']),
+        'rounds': len(network['rounds']),
+        'complete': network.get('complete', False),
+        'by_mass': {str(mass): count for mass, count in sorted(by_mass.items())}
+    }
+
+
+# --------------------------------------------
+# Atualização incremental (redes por save)
+# --------------------------------------------
+
+def source_index(network):
+    """ID de origem -> chave canônica, para as moléculas conhecidas da rede"""
+    return {
+        source_id: key
+        for key, entry in network['molecules'].items()
+        for source_id in entry['source_ids']
+    }
+
+
+def add_source(network, source_id, molecule, round_number):
+    """
+    Marca uma molécula como conhecida (ID de origem), criando a entrada se
+    ela ainda não está na rede (ex: já era produto de uma reação registrada).
+
+    Returns: chave canônica da molécula
+    """
+    key = molecule.get(CANONICAL_KEY) or canonical_key(molecule)
+    entry = network['molecules'].get(key)
+    if entry is None:
+        network['molecules'][key] = _new_molecule_entry(_compact(molecule), round_number, source_id)
+    elif source_id not in entry['source_ids']:
+        entry['source_ids'].append(source_id)
+    return key
+
+
+def remove_source(network, source_id):
+    """Remove um ID de origem (a molécula e suas reações continuam na rede)"""
+    for entry in network['molecules'].values():
+        if source_id in entry['source_ids']:
+            entry['source_ids'].remove(source_id)
+
+
+def record_synthesis(network, key_a, key_b, result, round_number):
+    """
+    Registra um resultado de synthesize() na rede (falhas são ignoradas;
+    produtos acima de max_mass são descartados).
+    Returns: (chaves das moléculas novas, número de produtos descartados)
+    """
+    if not result or not result.get('success') or not result.get('result'):
+        return [], 0
+    produced = result['result']
+    products = produced if isinstance(produced, list) else [produced]
+    return _record_reaction(network, key_a, key_b, [
+        (product.get(CANONICAL_KEY) or canonical_key(product), _compact(product))
+        for product in products
+    ], round_number)
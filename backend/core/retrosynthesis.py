@@ -0,0 +1,242 @@
+"""
+Planejador de Rotas de Síntese (Retrossíntese)
+
+Dada uma molécula alvo, encontra a rota mais curta conhecida (menor número
+de sínteses) que a produz a partir das moléculas de partida (banco base e,
+opcionalmente, descobertas do save).
+
+Busca A* sobre o hipergrafo de reações (cada síntese consome duas moléculas
+já alcançadas e produz um ou mais produtos):
+- custo de uma molécula = custo(A) + custo(B) + 1 (partida = 0)
+- heurística admissível: 0 para o alvo, 1 para as demais moléculas
+- desempate orientado ao alvo (análise para trás): moléculas que cobrem mais
+  da composição do alvo (contagens por tipo/polaridade) e com massa mais
+  próxima são expandidas primeiro
+
+Pares que não reagem são descartados pelo predicado memoizado
+check_synthesis; as sínteses efetivas são memoizadas pela estrutura exata
+do par (synthesize depende da ordem das partículas e ligações, então duas
+numerações da mesma molécula podem dar produtos diferentes). A busca respeita um orçamento de tempo e uma massa máxima.
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from data.molecules import calculate_molecular_formula
+from .canonical import CANONICAL_KEY, canonical_key
+from .stability import count_particles
+from .synthesis import check_synthesis, reaction_signature, synthesize
+
+# Orçamento de tempo padrão (segundos)
+DEFAULT_TIME_BUDGET = 5.0
+
+# Margem padrão de massa acima do alvo para moléculas intermediárias
+DEFAULT_MASS_MARGIN = 4
+
+# Cache de reações (estrutura_a, estrutura_b) -> [produtos]
+REACTION_CACHE_SIZE = 8192
+_reaction_cache = OrderedDict()
+_reaction_cache_lock = threading.Lock()
+
+
+def _key_of(molecule):
+    return molecule.get(CANONICAL_KEY) or canonical_key(molecule)
+
+
+def _react(molecule_a, molecule_b):
+    """Produtos de A + B (lista vazia se a síntese falhar), memoizados pela estrutura exata"""
+    pair = (reaction_signature(molecule_a), reaction_signature(molecule_b))
+    with _reaction_cache_lock:
+        products = _reaction_cache.get(pair)
+        if products is not None:
+            _reaction_cache.move_to_end(pair)
+            return products
+
+    products = []
+    if check_synthesis(molecule_a, molecule_b)['can_synthesize']:
+        result = synthesize(molecule_a, molecule_b)
+        if result.get('success'):
+            produced = result['result']
+            products = produced if isinstance(produced, list) else [produced]
+
+    with _reaction_cache_lock:
+        _reaction_cache[pair] = products
+        _reaction_cache.move_to_end(pair)
+        while len(_reaction_cache) > REACTION_CACHE_SIZE:
+            _reaction_cache.popitem(last=False)
+    return products
+
+
+def _coverage_deficit(counts, target_counts):
+    """Quantas partículas do alvo (por tipo/polaridade) a molécula não tem"""
+    return sum(max(0, count - counts.get(cls, 0)) for cls, count in target_counts.items())
+
+
+def _describe(node):
+    molecule = node['molecule']
+    return {
+        'id': node['source_id'],
+        'canonical_key': node['key'],
+        'formula': calculate_molecular_formula(molecule),
+        'mass': len(molecule.get('particles', []))
+    }
+
+
+def _build_route(nodes, target_key):
+    """Passos da rota em ordem topológica (cada síntese aparece uma vez)"""
+    steps = []
+    emitted = set()
+    stack = [(target_key, False)]
+    while stack:
+        key, expanded = stack.pop()
+        node = nodes[key]
+        if node['recipe'] is None or key in emitted:
+            continue
+        key_a, key_b = node['recipe']
+        if not expanded:
+            stack.append((key, True))
+            stack.append((key_b, False))
+            stack.append((key_a, False))
+            continue
+        emitted.add(key)
+        steps.append({
+            'step': len(steps) + 1,
+            'molecule_a': _describe(nodes[key_a]),
+            'molecule_b': _describe(nodes[key_b]),
+            'product': _describe(node)
+        })
+    return steps
+
+
+def plan_synthesis_route(target, sources, time_budget=DEFAULT_TIME_BUDGET, max_mass=None):
+    """
+    Procura a rota com menos sínteses das moléculas de partida até o alvo.
+
+    Args:
+        target: Molécula alvo
+        sources: Lista de (id, molécula) de partida (custo 0)
+        time_budget: Tempo máximo de busca em segundos
+        max_mass: Massa máxima das moléculas intermediárias
+                  (padrão: massa do alvo + DEFAULT_MASS_MARGIN)
+
+    Returns: {
+        'found': bool,
+        'steps': int,                 # Número de sínteses da rota
+        'route': [{'step', 'molecule_a', 'molecule_b', 'product'}],
+        'target': {...},
+        'details': {'expanded', 'reactions', 'reachable', 'elapsed_ms', 'reason'}
+    }
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+
+    # Alvo vem do cliente: chave sempre recalculada
+    target_key = canonical_key(target)
+    target_counts = count_particles(target.get('particles', []))
+    target_mass = len(target.get('particles', []))
+    if max_mass is None:
+        max_mass = target_mass + DEFAULT_MASS_MARGIN
+
+    # key -> {'key', 'molecule', 'cost', 'recipe', 'source_id'}
+    nodes = {}
+    heap = []
+    sequence = 0
+
+    def push(key, molecule, cost, recipe, source_id=None):
+        nonlocal sequence
+        node = nodes.get(key)
+        if node is not None and node['cost'] <= cost:
+            return
+        nodes[key] = {
+            'key': key,
+            'molecule': molecule,
+            'cost': cost,
+            'recipe': recipe,
+            'source_id': source_id
+        }
+        counts = count_particles(molecule.get('particles', []))
+        heuristic = 0 if key == target_key else 1
+        mass = len(molecule.get('particles', []))
+        sequence += 1
+        heapq.heappush(heap, (
+            cost + heuristic,
+            _coverage_deficit(counts, target_counts),
+            abs(mass - target_mass),
+            sequence,
+            key,
+            cost
+        ))
+
+    for source_id, molecule in sources:
+        push(_key_of(molecule), molecule, 0, None, source_id)
+
+    settled = []
+    settled_keys = set()
+    reactions = 0
+    reason = 'exhausted'
+
+    while heap:
+        if time.perf_counter() > deadline:
+            reason = 'time_budget'
+            break
+
+        _, _, _, _, key, cost = heapq.heappop(heap)
+        if key in settled_keys or nodes[key]['cost'] != cost:
+            continue
+
+        if key == target_key:
+            reason = 'found'
+            break
+
+        settled.append(key)
+        settled_keys.add(key)
+        node = nodes[key]
+
+        for other_key in settled:
+            if time.perf_counter() > deadline:
+                break
+            other = nodes[other_key]
+            pairs = [(node, other)] if other_key == key else [(node, other), (other, node)]
+            for first, second in pairs:
+                reactions += 1
+                for product in _react(first['molecule'], second['molecule']):
+                    if len(product.get('particles', [])) > max_mass:
+                        continue
+                    push(
+                        _key_of(product),
+                        product,
+                        first['cost'] + second['cost'] + 1,
+                        (first['key'], second['key'])
+                    )
+
+    found = reason == 'found'
+    route = _build_route(nodes, target_key) if found else []
+
+    return {
+        'found': found,
+        'steps': len(route),
+        'route': route,
+        'target': {
+            'canonical_key': target_key,
+            'formula': calculate_molecular_formula(target),
+            'mass': target_mass
+        },
+        'details': {
+            'expanded': len(settled),
+            'reactions': reactions,
+            'reachable': len(nodes),
+            'max_mass': max_mass,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'reason': reason
+        }
+    }
+
+
+def get_reaction_cache_stats():
+    """Estatísticas do cache de reações do planejador"""
+    with _reaction_cache_lock:
+        return {
+            'entries': len(_reaction_cache),
+            'max_entries': REACTION_CACHE_SIZE
+        }
@@ -0,0 +1,178 @@
+"""
+Coalescência de Pedidos Idênticos (single-flight)
+
+Pedidos simultâneos com a mesma chave compartilham um único cálculo: o
+primeiro executa a função, os demais esperam e recebem o mesmo resultado
+(ou a mesma exceção). Terminado o cálculo, a chave sai do registro - o
+próximo pedido calcula de novo (ou encontra o resultado no cache de quem
+chamou).
+
+Quem recebe o resultado pode alterá-lo (layouts, status...): o primeiro
+fica com o objeto original e cada pedido que esperou recebe uma cópia,
+feita antes de o original ser devolvido. Sem concorrência não há cópia.
+
+Lotes (run_many) reservam várias chaves de uma vez e as calculam em uma
+única chamada. Quem calcula fora da thread do pedido (jobs em segundo
+plano) usa as etapas separadas: begin reserva, finish/fail/abandon
+encerram e wait espera as chaves reservadas por outros (begin com
+join=False só reserva as livres, sem esperar nenhuma). Uma chave
+abandonada (job cancelado) não propaga erro: quem esperava por ela a
+calcula de novo.
+"""
+
+import copy
+import threading
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.copies = []
+        self.error = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    """Grupo de chaves coalescidas (ex.: um por tipo de cálculo)"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'computed': 0, 'shared': 0}
+        with _registry_lock:
+            _registry.append(self)
+
+    def run(self, key, function, *args, **kwargs):
+        """
+        Executa function(*args, **kwargs), ou espera o cálculo em andamento da mesma chave.
+        Returns: (resultado, calculado_por_este_pedido)
+        """
+        while True:
+            led, joined = self.begin([key])
+            if led:
+                try:
+                    result = function(*args, **kwargs)
+                except BaseException as e:
+                    self.fail(led, e)
+                    raise
+                self.finish(led, {key: result})
+                return result, True
+
+            results, abandoned = self.wait(joined)
+            if not abandoned:
+                return results[key], False
+
+    def run_many(self, keys, function):
+        """
+        Versão em lote de run: function(chaves) -> {chave: resultado} é chamada
+        uma vez com as chaves sem cálculo em andamento; as demais são esperadas.
+        Returns: ({chave: resultado}, chaves calculadas por este pedido)
+        """
+        results = {}
+        computed = set()
+        pending = list(dict.fromkeys(keys))
+        while pending:
+            led, joined = self.begin(pending)
+            if led:
+                try:
+                    values = function(list(led))
+                except BaseException as e:
+                    self.fail(led, e)
+                    raise
+                self.finish(led, values)
+                results.update((key, values[key]) for key in led)
+                computed.update(led)
+
+            waited, pending = self.wait(joined)
+            results.update(waited)
+        return results, computed
+
+    def begin(self, keys, join=True):
+        """
+        Reserva as chaves sem cálculo em andamento e entra na fila das demais
+        (join=False: as demais são ignoradas - em_andamento fica vazio).
+        Returns: (reservadas, em_andamento) - {chave: chamada}; as reservadas
+                 devem ser encerradas com finish, fail ou abandon
+        """
+        led = {}
+        joined = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is not None and not join:
+                    continue
+                self._stats['calls'] += 1
+                if call is not None:
+                    call.waiters += 1
+                    self._stats['shared'] += 1
+                    joined[key] = call
+                else:
+                    led[key] = self._calls[key] = _Call()
+                    self._stats['computed'] += 1
+        return led, joined
+
+    def _close(self, led):
+        # Fecha as chaves antes de copiar: ninguém mais entra nestas chamadas
+        with self._lock:
+            for key, call in led.items():
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    def finish(self, led, results):
+        """Publica os resultados ({chave: resultado}) das chaves reservadas"""
+        self._close(led)
+        for key, call in led.items():
+            if key in results:
+                call.copies = [copy.deepcopy(results[key]) for _ in range(call.waiters)]
+            else:
+                call.abandoned = True
+            call.done.set()
+
+    def fail(self, led, error):
+        """Encerra as chaves reservadas com uma exceção (repassada a quem espera)"""
+        self._close(led)
+        for call in led.values():
+            call.error = error
+            call.done.set()
+
+    def abandon(self, led):
+        """Libera as chaves reservadas sem resultado (quem espera calcula de novo)"""
+        self._close(led)
+        for call in led.values():
+            call.abandoned = True
+            call.done.set()
+
+    def wait(self, joined):
+        """
+        Espera as chaves em andamento em outros pedidos.
+        Returns: ({chave: resultado}, chaves abandonadas)
+        Raises: a exceção de quem calculava
+        """
+        results = {}
+        abandoned = []
+        for key, call in joined.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            if call.abandoned:
+                abandoned.append(key)
+                continue
+            with self._lock:
+                results[key] = call.copies.pop()
+        return results, abandoned
+
+    def get_stats(self):
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
+
+
+def get_single_flight_stats():
+    """Estatísticas de todos os grupos: {nome: {'calls', 'computed', 'shared', 'in_flight'}}"""
+    with _registry_lock:
+        groups = list(_registry)
+    return {group.name: group.get_stats() for group in groups}
@@ -0,0 +1,219 @@
+"""
+Oráculo de Viabilidade de Estabilização
+
+Decide, apenas a partir das contagens de partículas por tipo/polaridade e das
+valências de PARTICLE_TYPES, se existe um conjunto de ligações que estabiliza
+todas as partículas - sem enumerar ligações.
+
+Modelo: multigrafo bipartido por polaridade (+ de um lado, - do outro), sem
+ligações entre partículas do mesmo tipo, com multiplicidade limitada por par.
+Partículas da mesma classe (tipo, polaridade, conexões faltantes) são
+intercambiáveis, então a realizabilidade da sequência de graus é um fluxo
+máximo entre classes: fonte -> classes '+' -> classes '-' -> sorvedouro.
+Pela simetria dentro das classes e pela integralidade do fluxo, o fluxo entre
+classes é viável se e somente se existe uma atribuição inteira por partícula.
+
+Para moléculas conectadas também são exigidos (condições necessárias):
+- soma das valências >= 2 * (n - 1) (ligações suficientes para uma árvore)
+- grafo de compatibilidade entre as classes presentes conectado
+
+Os veredictos são memoizados por vetor de contagens. Um veredicto negativo é
+sempre correto, então pode ser usado para podar buscas com segurança.
+"""
+
+from functools import lru_cache
+from collections import deque
+
+# Multiplicidade máxima de uma ligação (mesmo limite do gerador)
+MAX_BOND_MULTIPLICITY = 3
+
+
+def _valence(ptype):
+    from data.molecules import PARTICLE_TYPES
+    return PARTICLE_TYPES[ptype]['connections']
+
+
+def _compatible(class_a, class_b):
+    """Tipos diferentes e polaridades opostas"""
+    return class_a[0] != class_b[0] and class_a[1] != class_b[1]
+
+
+def _max_flow(capacity, source, sink):
+    """Fluxo máximo (Edmonds-Karp) em um grafo pequeno {u: {v: capacidade}}"""
+    residual = {u: dict(edges) for u, edges in capacity.items()}
+    for u, edges in capacity.items():
+        for v in edges:
+            residual.setdefault(v, {}).setdefault(u, 0)
+
+    flow = 0
+    while True:
+        parent = {source: None}
+        queue = deque([source])
+        while queue and sink not in parent:
+            u = queue.popleft()
+            for v, cap in residual[u].items():
+                if cap > 0 and v not in parent:
+                    parent[v] = u
+                    queue.append(v)
+        if sink not in parent:
+            return flow
+
+        # Gargalo do caminho aumentante
+        bottleneck = float('inf')
+        v = sink
+        while parent[v] is not None:
+            bottleneck = min(bottleneck, residual[parent[v]][v])
+            v = parent[v]
+
+        v = sink
+        while parent[v] is not None:
+            residual[parent[v]][v] -= bottleneck
+            residual[v][parent[v]] += bottleneck
+            v = parent[v]
+        flow += bottleneck
+
+
+@lru_cache(maxsize=4096)
+def _is_feasible(classes, connected, max_multiplicity):
+    """
+    Args:
+        classes: tupla ordenada de ((tipo, polaridade, demanda), quantidade)
+        connected: exigir molécula conectada
+        max_multiplicity: limite por par de partículas (None = sem limite)
+    """
+    classes = [(cls, count) for cls, count in classes if count > 0]
+    n = sum(count for _, count in classes)
+    positive_total = sum(cls[2] * count for cls, count in classes if cls[1] == '+')
+    negative_total = sum(cls[2] * count for cls, count in classes if cls[1] != '+')
+
+    if positive_total != negative_total:
+        return False
+
+    if connected:
+        if n < 2 or any(cls[2] < 1 for cls, _ in classes):
+            return False
+        if positive_total + negative_total < 2 * (n - 1):
+            return False
+        if not _classes_connected([cls for cls, _ in classes]):
+            return False
+
+    if positive_total == 0:
+        return True
+
+    # Rede de fluxo entre classes
+    capacity = {'source': {}, 'sink': {}}
+    for cls, count in classes:
+        capacity.setdefault(cls, {})
+        if cls[1] == '+':
+            capacity['source'][cls] = cls[2] * count
+        else:
+            capacity[cls]['sink'] = cls[2] * count
+
+    for cls_a, count_a in classes:
+        if cls_a[1] != '+':
+            continue
+        for cls_b, count_b in classes:
+            if cls_b[1] == '+' or not _compatible(cls_a, cls_b):
+                continue
+            if max_multiplicity is None:
+                pair_capacity = min(cls_a[2] * count_a, cls_b[2] * count_b)
+            else:
+                pair_capacity = count_a * count_b * min(max_multiplicity, cls_a[2], cls_b[2])
+            capacity[cls_a][cls_b] = pair_capacity
+
+    return _max_flow(capacity, 'source', 'sink') == positive_total
+
+
+def _classes_connected(classes):
+    """Verifica se o grafo de compatibilidade entre as classes é conectado"""
+    if not classes:
+        return False
+    seen = {classes[0]}
+    queue = deque([classes[0]])
+    while queue:
+        current = queue.popleft()
+        for other in classes:
+            if other not in seen and _compatible(current, other):
+                seen.add(other)
+                queue.append(other)
+    return len(seen) == len(classes)
+
+
+def _freeze(counts):
+    return tuple(sorted(counts.items()))
+
+
+def is_stable_bonding_feasible(counts, connected=True, max_multiplicity=MAX_BOND_MULTIPLICITY):
+    """
+    Verifica se partículas com estas contagens podem formar uma molécula estável.
+
+    Args:
+        counts: {(tipo, polaridade): quantidade}
+        connected: exigir que a molécula seja conectada
+        max_multiplicity: multiplicidade máxima por ligação
+
+    Returns: bool (False = certamente impossível)
+    """
+    classes = {}
+    for (ptype, polarity), count in counts.items():
+        key = (ptype, polarity, _valence(ptype))
+        classes[key] = classes.get(key, 0) + count
+    return _is_feasible(_freeze(classes), connected, max_multiplicity)
+
+
+def count_particles(particles):
+    """Vetor de contagens {(tipo, polaridade): quantidade}"""
+    counts = {}
+    for particle in particles:
+        key = (particle['type'], particle['polarity'])
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def can_complete_bonding(*molecules):
+    """
+    Verifica se as ligações faltantes das moléculas (consideradas em conjunto)
+    podem ser completadas, mantendo as ligações existentes - como no rebond.
+    Não exige conectividade (o resultado pode ser separado em componentes).
+
+    Returns: bool (False = nenhuma sequência de ligações estabiliza todas)
+    """
+    classes = {}
+    for molecule in molecules:
+        connection_count = {p['id']: 0 for p in molecule['particles']}
+        for bond in molecule['bonds']:
+            connection_count[bond['from']] += bond['multiplicity']
+            connection_count[bond['to']] += bond['multiplicity']
+
+        for particle in molecule['particles']:
+            # Partículas com excesso de conexões são ignoradas, como no rebond
+            missing = _valence(particle['type']) - connection_count[particle['id']]
+            if missing > 0:
+                key = (particle['type'], particle['polarity'], missing)
+                classes[key] = classes.get(key, 0) + 1
+
+    return is_residual_feasible(classes)
+
+
+def is_residual_feasible(residuals):
+    """
+    Verifica se valências faltantes podem ser completadas (sem exigir
+    conectividade nem limitar a multiplicidade).
+
+    Args:
+        residuals: {(tipo, polaridade, conexões faltantes): quantidade}
+
+    Returns: bool (False = certamente impossível)
+    """
+    return _is_feasible(_freeze(residuals), False, None)
+
+
+def get_oracle_stats():
+    """Estatísticas da memoização do oráculo"""
+    info = _is_feasible.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'entries': info.currsize,
+        'max_entries': info.maxsize
+    }
@@ -4,8 +4,18 @@ Realiza a mistura de duas moléculas seguindo as regras
 """
 
 from .validator import quick_validate, validate_molecule
-import copy
-from collections import deque
+from .canonical import attach_canonical_key, canonical_labeling
+from .graph import build_adjacency, find_cycle, index_particles
+from .stability import can_complete_bonding
+import heapq
+import threading
+from collections import deque, OrderedDict
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def synthesize(molecule_a, molecule_b):
@@ -17,6 +27,10 @@ def synthesize(molecule_a, molecule_b):
     PASSO 3: Rebonds - Reconstrói ligações faltantes
     PASSO 4: Reorganiza posições - Ajusta x,y para visualização (partículas ligadas próximas)
     
+    O PASSO 4 é preguiçoso: os produtos saem marcados com 'layout_pending' e as
+    coordenadas só são calculadas por ensure_layout / ensure_result_layout quando
+    um payload que precisa desenhá-los é serializado.
+    
     Returns: {
         'success': bool,
         'result': molecule or None,
@@ -29,9 +43,10 @@ def synthesize(molecule_a, molecule_b):
     initial_count = initial_count_a + initial_count_b
     
     # PASSO 1: ANULAÇÃO
+    # (sem deepcopy: a anulação e o merge só criam listas/dicts novos)
     mol_a_cleaned, mol_b_cleaned, annihilated_pairs = annihilate_particles(
-        copy.deepcopy(molecule_a), 
-        copy.deepcopy(molecule_b)
+        _reactant(molecule_a),
+        _reactant(molecule_b)
     )
     
     # REGRA: Se nada foi anulado, não há reação química válida
@@ -59,6 +74,20 @@ def synthesize(molecule_a, molecule_b):
             }
         }
     
+    # Oráculo: se as ligações faltantes não podem ser completadas, o rebond
+    # falharia de qualquer forma - evitar merge e rebond
+    if not can_complete_bonding(mol_a_cleaned, mol_b_cleaned):
+        return {
+            'success': False,
+            'result': None,
+            'details': {
+                'reason': 'cannot_rebond',
+                'initial_count': initial_count,
+                'remaining_particles': len(mol_a_cleaned['particles']) + len(mol_b_cleaned['particles']),
+                'annihilated_pairs': annihilated_pairs
+            }
+        }
+    
     # PASSO 2: SOMA EM NOVO (merge das moléculas limpas)
     merged = merge_molecules(mol_a_cleaned, mol_b_cleaned)
     
@@ -86,15 +115,15 @@ def synthesize(molecule_a, molecule_b):
         # Resultado tem múltiplas moléculas desconectadas - separar cada uma
         separate_molecules = split_into_molecules(result, components)
         
-        # Reorganizar posições de cada molécula separadamente
-        # E validar cada uma para garantir que respeitam as regras
+        # Validar cada molécula separada para garantir que respeitam as regras
+        # (posições de cada uma são calculadas sob demanda)
         valid_molecules = []
         for mol in separate_molecules:
-            reorganize_positions(mol)
+            mark_layout_pending(mol)
             # Validar cada molécula separada
             is_valid, _ = validate_molecule(mol)
             if is_valid:
-                valid_molecules.append(mol)
+                valid_molecules.append(attach_canonical_key(mol))
         
         # Se nenhuma molécula é válida, falhar
         if not valid_molecules:
@@ -122,8 +151,8 @@ def synthesize(molecule_a, molecule_b):
             }
         }
     
-    # PASSO 4: REORGANIZA POSIÇÕES (ajusta x,y para visualização clara)
-    reorganize_positions(result)
+    # PASSO 4: REORGANIZA POSIÇÕES (adiado até a molécula ser desenhada)
+    mark_layout_pending(result)
     
     # VALIDAÇÃO DE SEGURANÇA: Garantir que resultado respeita todas as regras
     # (incluindo a regra de que partículas do mesmo tipo devem ter mesma polaridade)
@@ -142,6 +171,8 @@ def synthesize(molecule_a, molecule_b):
             }
         }
     
+    attach_canonical_key(result)
+    
     return {
         'success': True,
         'result': result,  # Molécula única
@@ -154,6 +185,125 @@ def synthesize(molecule_a, molecule_b):
     }
 
 
+def _reactant(molecule):
+    """Visão da molécula para a síntese (a anulação substitui as listas, não as altera)"""
+    return {'particles': molecule['particles'], 'bonds': molecule['bonds']}
+
+
+def count_annihilations(particles_a, particles_b):
+    """
+    Número de pares anulados entre A e B, por contagem em buckets de
+    tipo/polaridade (mesmo resultado de annihilate_particles, sem montar nada):
+    cada tipo anula min(A+, B-) + min(A-, B+) pares.
+    """
+    buckets_a = {}
+    buckets_b = {}
+    for particle in particles_a:
+        key = (particle['type'], particle['polarity'])
+        buckets_a[key] = buckets_a.get(key, 0) + 1
+    for particle in particles_b:
+        key = (particle['type'], particle['polarity'])
+        buckets_b[key] = buckets_b.get(key, 0) + 1
+    
+    pairs = 0
+    for (ptype, polarity), count_a in buckets_a.items():
+        opposite = '-' if polarity == '+' else '+'
+        pairs += min(count_a, buckets_b.get((ptype, opposite), 0))
+    return pairs
+
+
+def check_synthesis(molecule_a, molecule_b):
+    """
+    Predicado: verifica se a síntese de A + B é possível, sem montar os produtos
+    para resposta nem calcular coordenadas. Retorna os mesmos motivos de
+    synthesize ('no_reaction', 'complete_annihilation', 'cannot_rebond',
+    'invalid_result'; None em caso de sucesso).
+    
+    - Anulação contada por buckets de tipo/polaridade: casos sem reação ou com
+      anulação completa são decididos sem copiar nada.
+    - Demais casos: oráculo de estabilização e, se viável, merge + rebond +
+      validação rápida sobre cópias mínimas (apenas id/tipo/polaridade), sem
+      montar os produtos (marcas de layout, chaves canônicas).
+    - Veredictos memoizados pela estrutura (IDs, tipos, polaridades e ligações).
+    
+    Returns: {
+        'can_synthesize': bool,
+        'reason': str or None,
+        'annihilated_pairs': int,
+        'remaining_particles': int
+    }
+    """
+    return dict(_check_synthesis_cached(
+        reaction_signature(molecule_a),
+        reaction_signature(molecule_b)
+    ))
+
+
+def reaction_signature(molecule):
+    """
+    Tudo o que a síntese lê de uma molécula, em forma hasheável (IDs, tipos,
+    polaridades e ligações, na ordem das listas). Chave de memoização de
+    reações: a síntese depende da ordem, então a chave canônica não serve.
+    """
+    return (
+        tuple((p['id'], p['type'], p['polarity']) for p in molecule.get('particles', [])),
+        tuple((b['from'], b['to'], b.get('multiplicity', 1)) for b in molecule.get('bonds', []))
+    )
+
+
+def _molecule_from_signature(signature):
+    particles, bonds = signature
+    return {
+        'particles': [{'id': pid, 'type': ptype, 'polarity': polarity} for pid, ptype, polarity in particles],
+        'bonds': [{'from': a, 'to': b, 'multiplicity': m} for a, b, m in bonds]
+    }
+
+
+@lru_cache(maxsize=4096)
+def _check_synthesis_cached(signature_a, signature_b):
+    particles_a, _ = signature_a
+    particles_b, _ = signature_b
+    
+    def verdict(reason, annihilated_pairs, remaining_particles):
+        return {
+            'can_synthesize': reason is None,
+            'reason': reason,
+            'annihilated_pairs': annihilated_pairs,
+            'remaining_particles': remaining_particles
+        }
+    
+    particle_dicts_a = [{'type': t, 'polarity': pol} for _, t, pol in particles_a]
+    particle_dicts_b = [{'type': t, 'polarity': pol} for _, t, pol in particles_b]
+    annihilated_pairs = count_annihilations(particle_dicts_a, particle_dicts_b)
+    remaining_particles = len(particles_a) + len(particles_b) - 2 * annihilated_pairs
+    
+    if annihilated_pairs == 0:
+        return verdict('no_reaction', 0, remaining_particles)
+    
+    if remaining_particles == 0:
+        return verdict('complete_annihilation', annihilated_pairs, 0)
+    
+    # Mesmos passos de synthesize, sem montar produtos (layout, chave canônica)
+    cleaned_a, cleaned_b, _ = annihilate_particles(
+        _molecule_from_signature(signature_a),
+        _molecule_from_signature(signature_b)
+    )
+    if not can_complete_bonding(cleaned_a, cleaned_b):
+        return verdict('cannot_rebond', annihilated_pairs, remaining_particles)
+    
+    bonded = rebond_molecule(merge_molecules(cleaned_a, cleaned_b))
+    if bonded is None:
+        return verdict('cannot_rebond', annihilated_pairs, remaining_particles)
+    
+    # Sucesso se a molécula (ou ao menos um dos componentes) é válida
+    components = find_connected_components(bonded)
+    if len(components) > 1:
+        valid = any(quick_validate(part) for part in split_into_molecules(bonded, components))
+    else:
+        valid = quick_validate(bonded)
+    return verdict(None if valid else 'invalid_result', annihilated_pairs, remaining_particles)
+
+
 def find_connected_components(molecule):
     """
     Encontra todos os componentes conectados de uma molécula.
@@ -170,10 +320,7 @@ def find_connected_components(molecule):
         return []
     
     # Construir grafo de adjacência
-    adjacency = {p['id']: [] for p in particles}
-    for bond in bonds:
-        adjacency[bond['from']].append(bond['to'])
-        adjacency[bond['to']].append(bond['from'])
+    adjacency = build_adjacency(particles, bonds)
     
     # Encontrar componentes usando BFS
     visited = set()
@@ -213,22 +360,25 @@ def split_into_molecules(molecule, components):
     
     Returns: Lista de moléculas separadas
     """
-    molecules = []
+    # Índice do componente de cada partícula (uma única passada em partículas e bonds)
+    component_of = {}
+    for index, component in enumerate(components):
+        for pid in component:
+            component_of[pid] = index
     
-    for component in components:
-        # Filtrar partículas deste componente
-        particles = [p for p in molecule['particles'] if p['id'] in component]
-        
-        # Filtrar bonds deste componente
-        bonds = [
-            b for b in molecule['bonds']
-            if b['from'] in component and b['to'] in component
-        ]
-        
-        molecules.append({
-            'particles': particles,
-            'bonds': bonds
-        })
+    molecules = [{'particles': [], 'bonds': []} for _ in components]
+    
+    # Filtrar partículas de cada componente
+    for particle in molecule['particles']:
+        index = component_of.get(particle['id'])
+        if index is not None:
+            molecules[index]['particles'].append(particle)
+    
+    # Filtrar bonds de cada componente
+    for bond in molecule['bonds']:
+        index = component_of.get(bond['from'])
+        if index is not None and component_of.get(bond['to']) == index:
+            molecules[index]['bonds'].append(bond)
     
     return molecules
 
@@ -250,20 +400,32 @@ def annihilate_particles(molecule_a, molecule_b):
     to_remove_a = set()
     to_remove_b = set()
     
+    # Filas (na ordem de B) das partículas de B por tipo e polaridade:
+    # cada partícula de A anula a primeira partícula de B do mesmo tipo
+    # e polaridade oposta ainda disponível
+    queues_b = {}
+    for index, pb in enumerate(particles_b):
+        queues_b.setdefault(pb['type'], {}).setdefault(pb['polarity'], deque()).append((index, pb['id']))
+    
     for pa in particles_a:
         if pa['id'] in to_remove_a:
             continue
         
-        for pb in particles_b:
-            if pb['id'] in to_remove_b:
+        match = None
+        for polarity, queue in queues_b.get(pa['type'], {}).items():
+            if polarity == pa['polarity']:
                 continue
-            
-            # Verificar se são do mesmo tipo mas polaridades opostas
-            if pa['type'] == pb['type'] and pa['polarity'] != pb['polarity']:
-                to_remove_a.add(pa['id'])
-                to_remove_b.add(pb['id'])
-                annihilated_pairs += 1
-                break
+            while queue and queue[0][1] in to_remove_b:
+                queue.popleft()
+            if queue and (match is None or queue[0][0] < match[1][0]):
+                match = (queue, queue[0])
+        
+        if match:
+            queue, (_, pb_id) = match
+            queue.popleft()
+            to_remove_a.add(pa['id'])
+            to_remove_b.add(pb_id)
+            annihilated_pairs += 1
     
     # Remover partículas anuladas
     molecule_a['particles'] = [p for p in particles_a if p['id'] not in to_remove_a]
@@ -379,90 +541,108 @@ def rebond_molecule(molecule):
     - Partículas do mesmo tipo não podem se ligar
     - Uma partícula pode aumentar multiplicidade de bond existente
     - Adiciona uma ligação por vez, testando todas possibilidades
+    
+    A cada passo, as instáveis são consideradas na ordem (conexões faltantes
+    decrescente, ordem original) e é ligado o primeiro par compatível. Em vez de
+    reordenar e varrer todas as instáveis a cada ligação, elas ficam em heaps por
+    (conexões faltantes, tipo, polaridade): cada ligação custa O(log n).
     """
     from data.molecules import PARTICLE_TYPES
     
-    MAX_ITERATIONS = 100
-    iteration = 0
+    # Oráculo (memoizado): nenhuma sequência de ligações estabiliza todas
+    if not can_complete_bonding(molecule):
+        return None
     
-    while iteration < MAX_ITERATIONS:
-        iteration += 1
-        
-        # Calcular conexões atuais
-        connection_count = calculate_connections(molecule)
-        
-        # Encontrar partículas instáveis (abaixo do limite)
-        unstable = []
-        for particle in molecule['particles']:
-            pid = particle['id']
-            ptype = particle['type']
-            max_conn = PARTICLE_TYPES[ptype]['connections']
-            current_conn = connection_count.get(pid, 0)
-            
-            if current_conn < max_conn:
-                unstable.append({
-                    'id': pid,
-                    'type': ptype,
-                    'missing': max_conn - current_conn
-                })
-        
-        # Ordenar por quantidade de conexões faltantes (maior primeiro)
-        # Isso prioriza partículas que precisam de mais conexões
-        unstable.sort(key=lambda x: x['missing'], reverse=True)
-        
+    particles = molecule['particles']
+    connection_count = calculate_connections(molecule)
+    
+    # Índice de ligações por par (primeira ocorrência, como find_bond)
+    bond_index = {}
+    for bond in molecule['bonds']:
+        bond_index.setdefault(frozenset((bond['from'], bond['to'])), bond)
+    
+    # Conexões faltantes e classe (tipo, polaridade) de cada partícula
+    missing = []
+    classes = []
+    for particle in particles:
+        max_conn = PARTICLE_TYPES[particle['type']]['connections']
+        missing.append(max_conn - connection_count.get(particle['id'], 0))
+        classes.append((particle['type'], particle['polarity']))
+    
+    # Instáveis por (faltantes, classe) - heaps de índices com remoção preguiçosa
+    heaps = {}
+    unstable_by_class = {}
+    for index, count in enumerate(missing):
+        if count > 0:
+            heaps.setdefault((count, classes[index]), []).append(index)
+            unstable_by_class[classes[index]] = unstable_by_class.get(classes[index], 0) + 1
+    for heap in heaps.values():
+        heapq.heapify(heap)
+    
+    levels = range(max(missing, default=0), 0, -1)
+    
+    def compatible(class_a, class_b):
+        # Tipos diferentes e polaridades opostas
+        return class_a[0] != class_b[0] and class_a[1] != class_b[1]
+    
+    def has_partner(cls):
+        return any(count > 0 and compatible(cls, other) for other, count in unstable_by_class.items())
+    
+    def first_unstable(accept):
+        """Primeira instável (maior faltantes, menor índice) cuja classe é aceita"""
+        for level in levels:
+            best = None
+            for cls in unstable_by_class:
+                if not accept(cls):
+                    continue
+                heap = heaps.get((level, cls))
+                while heap and missing[heap[0]] != level:
+                    heapq.heappop(heap)
+                if heap and (best is None or heap[0] < best):
+                    best = heap[0]
+            if best is not None:
+                return best
+        return None
+    
+    def consume(index):
+        missing[index] -= 1
+        if missing[index] > 0:
+            heapq.heappush(heaps.setdefault((missing[index], classes[index]), []), index)
+        else:
+            unstable_by_class[classes[index]] -= 1
+    
+    # Cada ligação reduz em 2 o total de conexões faltantes, então o laço termina
+    while True:
         # Se não há partículas instáveis, molécula está estável!
-        if not unstable:
+        if not any(unstable_by_class.values()):
             return molecule
         
-        # Tentar criar UMA nova ligação
-        bond_created = False
+        # Primeira instável que tem algum parceiro compatível
+        i1 = first_unstable(has_partner)
+        if i1 is None:
+            # Não é possível criar nenhuma ligação: falhou
+            return None
         
-        for u1 in unstable:
-            if bond_created:
-                break
-            
-            p1 = next(p for p in molecule['particles'] if p['id'] == u1['id'])
-            
-            for u2 in unstable:
-                if u1['id'] == u2['id']:
-                    continue
-                
-                p2 = next(p for p in molecule['particles'] if p['id'] == u2['id'])
-                
-                # Verificar se podem se ligar (tipos diferentes e polaridades opostas)
-                if p1['type'] == p2['type']:
-                    continue
-                
-                # Partículas só se ligam com polaridades opostas
-                if p1['polarity'] == p2['polarity']:
-                    continue
-                
-                # Verificar se já existe bond entre eles
-                existing_bond = find_bond(molecule, u1['id'], u2['id'])
-                
-                if existing_bond:
-                    # Tentar aumentar multiplicidade
-                    max_multiplicity = min(u1['missing'], u2['missing'])
-                    if max_multiplicity > 0:
-                        existing_bond['multiplicity'] += 1
-                        bond_created = True
-                        break
-                else:
-                    # Criar nova ligação
-                    molecule['bonds'].append({
-                        'from': u1['id'],
-                        'to': u2['id'],
-                        'multiplicity': 1
-                    })
-                    bond_created = True
-                    break
+        i2 = first_unstable(lambda cls: compatible(classes[i1], cls))
+        id1 = particles[i1]['id']
+        id2 = particles[i2]['id']
         
-        # Se não conseguiu criar nenhuma ligação, falhou
-        if not bond_created:
-            return None
-    
-    # Excedeu iterações máximas
-    return None
+        existing_bond = bond_index.get(frozenset((id1, id2)))
+        if existing_bond:
+            # Aumentar multiplicidade
+            existing_bond['multiplicity'] += 1
+        else:
+            # Criar nova ligação
+            bond = {
+                'from': id1,
+                'to': id2,
+                'multiplicity': 1
+            }
+            molecule['bonds'].append(bond)
+            bond_index[frozenset((id1, id2))] = bond
+        
+        consume(i1)
+        consume(i2)
 
 
 def find_bond(molecule, id1, id2):
@@ -485,25 +665,161 @@ def calculate_connections(molecule):
     return connection_count
 
 
-def reorganize_positions(molecule):
+LAYOUT_PENDING_KEY = 'layout_pending'
+
+
+def mark_layout_pending(molecule):
+    """Marca a molécula para ter as posições calculadas apenas quando for desenhada"""
+    molecule[LAYOUT_PENDING_KEY] = True
+    return molecule
+
+
+def ensure_layout(molecule, engine=None):
+    """
+    Calcula as posições de uma molécula marcada como pendente (uma única vez).
+    Moléculas sem a marca são devolvidas sem alteração.
+    """
+    if isinstance(molecule, dict) and molecule.pop(LAYOUT_PENDING_KEY, False):
+        reorganize_positions(molecule, engine)
+    return molecule
+
+
+def ensure_result_layout(result, engine=None):
+    """
+    Calcula as posições pendentes de todos os produtos de um resultado de síntese
+    (molécula única ou lista de moléculas).
+    """
+    if not result:
+        return result
+    
+    products = result.get('result')
+    if isinstance(products, list):
+        for molecule in products:
+            ensure_layout(molecule, engine)
+    elif isinstance(products, dict):
+        ensure_layout(products, engine)
+    
+    return result
+
+
+# Engines de layout:
+# - 'heuristic': polígono para ciclos / BFS em árvore (padrão)
+# - 'stress': stress majorization vetorizada com NumPy, semeada pela heurística.
+#   Melhor para moléculas densas ou grandes. Sem NumPy, cai para a heurística.
+LAYOUT_ENGINE_HEURISTIC = 'heuristic'
+LAYOUT_ENGINE_STRESS = 'stress'
+LAYOUT_ENGINES = (LAYOUT_ENGINE_HEURISTIC, LAYOUT_ENGINE_STRESS)
+
+
+def is_layout_engine_available(engine):
+    """Verifica se um engine de layout pode ser usado neste ambiente"""
+    if engine == LAYOUT_ENGINE_STRESS:
+        return np is not None
+    return engine in LAYOUT_ENGINES
+
+
+# Cache de layouts por (engine, forma canônica): moléculas isomorfas reutilizam
+# o mesmo layout. Valor = [(x, y), ...] na ordem dos rótulos canônicos.
+LAYOUT_CACHE_SIZE = 4096
+# Acima deste tamanho o layout é calculado direto: a rotulação canônica de
+# moléculas grandes e simétricas custa mais que o próprio layout, e estruturas
+# grandes raramente se repetem
+LAYOUT_CACHE_MAX_PARTICLES = 64
+_layout_cache = OrderedDict()
+_layout_cache_lock = threading.Lock()
+_layout_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_layout_cache_stats():
+    """Estatísticas do cache de layouts"""
+    with _layout_cache_lock:
+        return {
+            'entries': len(_layout_cache),
+            'max_entries': LAYOUT_CACHE_SIZE,
+            **_layout_cache_stats
+        }
+
+
+def clear_layout_cache():
+    """Esvazia o cache de layouts"""
+    with _layout_cache_lock:
+        _layout_cache.clear()
+        _layout_cache_stats['hits'] = 0
+        _layout_cache_stats['misses'] = 0
+
+
+def reorganize_positions(molecule, engine=None):
     """
     PASSO 4: Reorganiza posições das partículas para visualização clara
     
-    Estratégias de layout:
-    - Detecta ciclos e os posiciona como polígonos regulares
-    - Usa BFS para estruturas em árvore/estrela
-    - Evita sobreposições e colisões
+    O layout é determinístico para uma dada estrutura, então é calculado uma
+    vez por forma canônica e aplicado via rótulos canônicos -> IDs.
+    
+    Args:
+        molecule: Molécula (posições alteradas no próprio dict)
+        engine: LAYOUT_ENGINE_HEURISTIC (padrão) ou LAYOUT_ENGINE_STRESS
+    
+    Raises: ValueError se o engine não existir
     """
-    import math
+    engine = engine or LAYOUT_ENGINE_HEURISTIC
+    if engine not in LAYOUT_ENGINES:
+        raise ValueError(f'Engine de layout desconhecido: {engine}')
+    if not is_layout_engine_available(engine):
+        engine = LAYOUT_ENGINE_HEURISTIC
     
     if not molecule['particles']:
         return
     
+    if len(molecule['particles']) > LAYOUT_CACHE_MAX_PARTICLES:
+        _compute_layout(molecule)
+        if engine == LAYOUT_ENGINE_STRESS:
+            _layout_stress(molecule)
+        return
+    
+    labeling = canonical_labeling(molecule)
+    form = (engine, labeling['form'])
+    particles_by_id = {p['id']: p for p in molecule['particles']}
+    
+    with _layout_cache_lock:
+        coords = _layout_cache.get(form)
+        if coords is not None:
+            _layout_cache.move_to_end(form)
+            _layout_cache_stats['hits'] += 1
+        else:
+            _layout_cache_stats['misses'] += 1
+    
+    if coords is not None:
+        for particle_id, (x, y) in zip(labeling['labels'], coords):
+            particles_by_id[particle_id]['x'] = x
+            particles_by_id[particle_id]['y'] = y
+        return
+    
+    _compute_layout(molecule)
+    if engine == LAYOUT_ENGINE_STRESS:
+        _layout_stress(molecule)
+    
+    coords = [
+        (particles_by_id[pid]['x'], particles_by_id[pid]['y'])
+        for pid in labeling['labels']
+    ]
+    with _layout_cache_lock:
+        _layout_cache[form] = coords
+        _layout_cache.move_to_end(form)
+        while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+
+
+def _compute_layout(molecule):
+    """
+    Calcula o layout de uma molécula (sem cache)
+    
+    Estratégias de layout:
+    - Detecta ciclos e os posiciona como polígonos regulares
+    - Usa BFS para estruturas em árvore/estrela
+    - Evita sobreposições e colisões
+    """
     # Construir grafo de adjacências (usado por todas as estratégias)
-    adjacency = {p['id']: [] for p in molecule['particles']}
-    for bond in molecule['bonds']:
-        adjacency[bond['from']].append(bond['to'])
-        adjacency[bond['to']].append(bond['from'])
+    adjacency = build_adjacency(molecule['particles'], molecule['bonds'])
     
     # ESTRATÉGIA 1: Detectar ciclos (estruturas circulares)
     cycle = _detect_cycle(adjacency, molecule['particles'])
@@ -521,42 +837,10 @@ def reorganize_positions(molecule):
 
 def _detect_cycle(adjacency, particles):
     """
-    Detecta ciclos usando DFS e retorna lista de IDs do ciclo.
+    Detecta ciclos usando DFS (iterativa) e retorna lista de IDs do ciclo.
     Retorna None se não houver ciclo.
     """
-    if len(particles) < 3:
-        return None
-    
-    visited = set()
-    parent = {}
-    
-    def dfs(node, par):
-        visited.add(node)
-        parent[node] = par
-        
-        for neighbor in adjacency[node]:
-            if neighbor not in visited:
-                cycle = dfs(neighbor, node)
-                if cycle:
-                    return cycle
-            elif neighbor != par:
-                # Ciclo encontrado - reconstruir caminho
-                cycle_nodes = [neighbor, node]
-                current = node
-                while parent[current] != neighbor and parent[current] is not None:
-                    current = parent[current]
-                    cycle_nodes.insert(1, current)
-                return cycle_nodes
-        return None
-    
-    # Tentar DFS a partir de cada partícula
-    for particle in particles:
-        if particle['id'] not in visited:
-            cycle = dfs(particle['id'], None)
-            if cycle:
-                return cycle
-    
-    return None
+    return find_cycle(adjacency, particles)
 
 
 def _layout_as_polygon(molecule, cycle_ids, adjacency):
@@ -571,14 +855,20 @@ def _layout_as_polygon(molecule, cycle_ids, adjacency):
     
     n = len(cycle_ids)
     RADIUS = 3.0
+    # Ciclos grandes: aumentar o raio para manter a distância entre vizinhos
+    # (até hexágonos o raio continua RADIUS)
+    ring_radius = max(RADIUS, RADIUS / (2 * math.sin(math.pi / n)))
+    
+    particles_by_id = index_particles(molecule['particles'])
+    cycle_set = set(cycle_ids)
     
     # Posicionar partículas do ciclo em círculo (coordenadas inteiras)
     angle_step = (2 * math.pi) / n
     for i, pid in enumerate(cycle_ids):
         angle = i * angle_step - math.pi / 2  # Começar do topo
-        particle = next(p for p in molecule['particles'] if p['id'] == pid)
-        particle['x'] = round(RADIUS * math.cos(angle))
-        particle['y'] = round(RADIUS * math.sin(angle))
+        particle = particles_by_id[pid]
+        particle['x'] = round(ring_radius * math.cos(angle))
+        particle['y'] = round(ring_radius * math.sin(angle))
     
     positioned = set(cycle_ids)
     
@@ -590,7 +880,7 @@ def _layout_as_polygon(molecule, cycle_ids, adjacency):
     multi_connected = []   # Conecta com 2+ partículas do ciclo
     
     for pid in unpositioned:
-        connections_to_cycle = [n for n in adjacency[pid] if n in cycle_ids]
+        connections_to_cycle = [n for n in adjacency[pid] if n in cycle_set]
         num_connections = len(connections_to_cycle)
         
         if num_connections == 0:
@@ -603,13 +893,13 @@ def _layout_as_polygon(molecule, cycle_ids, adjacency):
     
     # REGRA 1: Partículas single-conectadas → FORA do ciclo
     for pid in single_connected:
-        connections_to_cycle = [n for n in adjacency[pid] if n in cycle_ids]
+        connections_to_cycle = [n for n in adjacency[pid] if n in cycle_set]
         cycle_neighbor_id = connections_to_cycle[0]
-        cycle_neighbor = next(p for p in molecule['particles'] if p['id'] == cycle_neighbor_id)
+        cycle_neighbor = particles_by_id[cycle_neighbor_id]
         
         angle_to_center = math.atan2(cycle_neighbor['y'], cycle_neighbor['x'])
         
-        particle = next(p for p in molecule['particles'] if p['id'] == pid)
+        particle = particles_by_id[pid]
         particle['x'] = round(cycle_neighbor['x'] + RADIUS * 1.2 * math.cos(angle_to_center))
         particle['y'] = round(cycle_neighbor['y'] + RADIUS * 1.2 * math.sin(angle_to_center))
         positioned.add(pid)
@@ -617,16 +907,14 @@ def _layout_as_polygon(molecule, cycle_ids, adjacency):
     # REGRA 2: Partículas multi-conectadas → DENTRO do ciclo, distribuídas ao redor do centro
     if multi_connected:
         # Calcular centro do ciclo
-        cycle_center_x = sum(next(p for p in molecule['particles'] if p['id'] == cid)['x'] 
-                            for cid in cycle_ids) / len(cycle_ids)
-        cycle_center_y = sum(next(p for p in molecule['particles'] if p['id'] == cid)['y'] 
-                            for cid in cycle_ids) / len(cycle_ids)
+        cycle_center_x = sum(particles_by_id[cid]['x'] for cid in cycle_ids) / len(cycle_ids)
+        cycle_center_y = sum(particles_by_id[cid]['y'] for cid in cycle_ids) / len(cycle_ids)
         
         # Distribuir partículas multi-conectadas ao redor do centro
         num_multi = len(multi_connected)
         if num_multi == 1:
             # Apenas 1 → colocar no centro
-            particle = next(p for p in molecule['particles'] if p['id'] == multi_connected[0])
+            particle = particles_by_id[multi_connected[0]]
             particle['x'] = round(cycle_center_x)
             particle['y'] = round(cycle_center_y)
             positioned.add(multi_connected[0])
@@ -637,11 +925,26 @@ def _layout_as_polygon(molecule, cycle_ids, adjacency):
             
             for i, pid in enumerate(multi_connected):
                 angle = i * angle_step
-                particle = next(p for p in molecule['particles'] if p['id'] == pid)
+                particle = particles_by_id[pid]
                 particle['x'] = round(cycle_center_x + inner_radius * math.cos(angle))
                 particle['y'] = round(cycle_center_y + inner_radius * math.sin(angle))
                 positioned.add(pid)
 
+    # REGRA 3: Partículas sem ligação direta com o ciclo → FORA, a partir do
+    # vizinho já posicionado (BFS). Depende de qual ciclo a DFS encontrou.
+    queue = deque(p['id'] for p in molecule['particles'] if p['id'] in positioned)
+    while queue:
+        anchor = particles_by_id[queue.popleft()]
+        angle_to_center = math.atan2(anchor['y'], anchor['x'])
+        for neighbor_id in adjacency[anchor['id']]:
+            if neighbor_id in positioned:
+                continue
+            particle = particles_by_id[neighbor_id]
+            particle['x'] = round(anchor['x'] + RADIUS * 1.2 * math.cos(angle_to_center))
+            particle['y'] = round(anchor['y'] + RADIUS * 1.2 * math.sin(angle_to_center))
+            positioned.add(neighbor_id)
+            queue.append(neighbor_id)
+
 
 def _layout_as_tree(molecule, adjacency):
     """
@@ -666,8 +969,9 @@ def _layout_as_tree(molecule, adjacency):
     start_id = start_particle['id']
     
     # BFS para posicionar partículas
+    particles_by_id = index_particles(molecule['particles'])
     visited = set()
-    queue = [(start_id, 0, 0, None)]
+    queue = deque([(start_id, 0, 0, None)])
     visited.add(start_id)
     
     # Mapa de posições para evitar sobreposições
@@ -689,10 +993,10 @@ def _layout_as_tree(molecule, adjacency):
     ]
     
     while queue:
-        current_id, x, y, parent_id = queue.pop(0)
+        current_id, x, y, parent_id = queue.popleft()
         
         # Atualizar posição da partícula
-        particle = next(p for p in molecule['particles'] if p['id'] == current_id)
+        particle = particles_by_id[current_id]
         particle['x'] = x
         particle['y'] = y
         position_map[(x, y)] = current_id
@@ -757,6 +1061,9 @@ def _optimize_centered_particles(molecule, adjacency):
     """
     Otimização final: centraliza partículas com 3+ conexões entre seus vizinhos.
     Usa iterações suaves com verificação de colisão.
+    
+    A verificação de colisão usa uma grade espacial com células do tamanho da
+    distância mínima: só as 9 células vizinhas precisam ser consultadas.
     """
     import math
     
@@ -764,6 +1071,11 @@ def _optimize_centered_particles(molecule, adjacency):
     DAMPING = 0.15
     MIN_DISTANCE = 2.0
     
+    particles_by_id = index_particles(molecule['particles'])
+    
+    def cell_of(x, y):
+        return (math.floor(x / MIN_DISTANCE), math.floor(y / MIN_DISTANCE))
+    
     for iteration in range(ITERATIONS):
         forces = {p['id']: {'x': 0, 'y': 0} for p in molecule['particles']}
         
@@ -777,33 +1089,127 @@ def _optimize_centered_particles(molecule, adjacency):
                 continue
             
             # Centroide dos vizinhos
-            center_x = sum(next(p for p in molecule['particles'] if p['id'] == nid)['x'] 
-                          for nid in neighbors) / len(neighbors)
-            center_y = sum(next(p for p in molecule['particles'] if p['id'] == nid)['y'] 
-                          for nid in neighbors) / len(neighbors)
+            center_x = sum(particles_by_id[nid]['x'] for nid in neighbors) / len(neighbors)
+            center_y = sum(particles_by_id[nid]['y'] for nid in neighbors) / len(neighbors)
             
             # Força suave em direção ao centroide
             forces[pid]['x'] = (center_x - particle['x']) * DAMPING
             forces[pid]['y'] = (center_y - particle['y']) * DAMPING
         
+        # Grade espacial com as posições atuais
+        grid = {}
+        for particle in molecule['particles']:
+            grid.setdefault(cell_of(particle['x'], particle['y']), []).append(particle)
+        
         # Aplicar forças com verificação de colisão (manter coordenadas inteiras)
         for particle in molecule['particles']:
             new_x = round(particle['x'] + forces[particle['id']]['x'])
             new_y = round(particle['y'] + forces[particle['id']]['y'])
             
-            # Verificar colisões
+            # Verificar colisões (apenas nas células vizinhas)
             collision = False
-            for other in molecule['particles']:
-                if other['id'] == particle['id']:
-                    continue
-                
-                dist = math.sqrt((new_x - other['x'])**2 + (new_y - other['y'])**2)
-                if dist < MIN_DISTANCE:
-                    collision = True
+            cx, cy = cell_of(new_x, new_y)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for other in grid.get((cx + dx, cy + dy), ()):
+                        if other['id'] == particle['id']:
+                            continue
+                        
+                        dist = math.sqrt((new_x - other['x'])**2 + (new_y - other['y'])**2)
+                        if dist < MIN_DISTANCE:
+                            collision = True
+                            break
+                    if collision:
+                        break
+                if collision:
                     break
             
             # Aplicar movimento se seguro
             if not collision:
+                grid[cell_of(particle['x'], particle['y'])].remove(particle)
                 particle['x'] = new_x
                 particle['y'] = new_y
+                grid.setdefault(cell_of(new_x, new_y), []).append(particle)
+
+
+def _graph_distances(particle_ids, adjacency):
+    """
+    Distâncias em número de ligações entre todos os pares (BFS a partir de cada
+    partícula). Pares desconexos recebem infinito.
+    """
+    index = {pid: i for i, pid in enumerate(particle_ids)}
+    neighbors = [[index[n] for n in adjacency[pid]] for pid in particle_ids]
+    n = len(particle_ids)
+    
+    distances = np.full((n, n), np.inf)
+    for source in range(n):
+        row = distances[source]
+        row[source] = 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            next_distance = row[node] + 1
+            for neighbor in neighbors[node]:
+                if row[neighbor] == np.inf:
+                    row[neighbor] = next_distance
+                    queue.append(neighbor)
+    
+    return distances
+
 
+def _layout_stress(molecule):
+    """
+    Refina as posições atuais (semente da heurística) por stress majorization:
+    aproxima a distância euclidiana entre cada par da distância no grafo
+    (em ligações) vezes EDGE_LENGTH. Todas as distâncias são calculadas de
+    forma vetorizada com NumPy (matrizes n x n).
+    """
+    EDGE_LENGTH = 4.0
+    MAX_ITERATIONS = 300
+    TOLERANCE = 1e-5
+    
+    particles = molecule['particles']
+    n = len(particles)
+    if n < 3:
+        return
+    
+    particle_ids = [p['id'] for p in particles]
+    adjacency = build_adjacency(particles, molecule['bonds'])
+    
+    hops = _graph_distances(particle_ids, adjacency)
+    
+    # Pares desconexos: manter afastados com peso baixo
+    finite = np.isfinite(hops)
+    hops[~finite] = hops[finite].max() + 1
+    
+    target = hops * EDGE_LENGTH
+    weights = np.zeros_like(target)
+    off_diagonal = ~np.eye(n, dtype=bool)
+    weights[off_diagonal] = target[off_diagonal] ** -2.0
+    weight_sums = weights.sum(axis=1)
+    
+    # Semente: posições da heurística, com ruído determinístico mínimo para
+    # separar partículas sobrepostas
+    positions = np.array([[p['x'], p['y']] for p in particles], dtype=float)
+    positions += np.random.default_rng(0).normal(scale=1e-3, size=positions.shape)
+    
+    previous = None
+    for _ in range(MAX_ITERATIONS):
+        diff = positions[:, None, :] - positions[None, :, :]
+        dist = np.maximum(np.sqrt((diff ** 2).sum(axis=2)), 1e-9)
+        
+        # Critério de parada: redução relativa do stress das posições atuais
+        current = (weights * (dist - target) ** 2).sum()
+        if previous is not None and previous - current < TOLERANCE * previous:
+            break
+        previous = current
+        
+        # x_i = Σ_j w_ij (x_j + d_ij (x_i - x_j) / |x_i - x_j|) / Σ_j w_ij
+        pull = weights[:, :, None] * (positions[None, :, :] + (target / dist)[:, :, None] * diff)
+        positions = pull.sum(axis=1) / weight_sums[:, None]
+    
+    # Centralizar e manter coordenadas inteiras
+    positions -= positions.mean(axis=0)
+    for particle, (x, y) in zip(particles, positions):
+        particle['x'] = int(round(x))
+        particle['y'] = int(round(y))
@@ -3,34 +3,24 @@ Validador de Moléculas
 Verifica se uma molécula segue as regras do jogo
 """
 
+import os
 from data.molecules import PARTICLE_TYPES
+from .graph import build_adjacency, is_connected
+from .jobs import map_in_pool
+
+VALIDATION_MODE_FULL = 'full'
+VALIDATION_MODE_QUICK = 'quick'
+VALIDATION_MODES = (VALIDATION_MODE_FULL, VALIDATION_MODE_QUICK)
+
+# Lotes a partir deste tamanho são divididos entre os processos do pool dos jobs
+POOL_BATCH_THRESHOLD = 2000
 
 
 def _is_fully_connected(adjacency, particles):
     """
     Verifica se todas as partículas estão conectadas (BFS).
     """
-    if len(particles) == 0:
-        return False
-    
-    if len(particles) == 1:
-        return True
-    
-    # BFS a partir da primeira partícula
-    start_id = particles[0]['id']
-    visited = set()
-    queue = [start_id]
-    visited.add(start_id)
-    
-    while queue:
-        current = queue.pop(0)
-        for neighbor in adjacency.get(current, []):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
-    
-    # Se visitou todas as partículas, está conectada
-    return len(visited) == len(particles)
+    return is_connected(adjacency, particles)
 
 
 def _check_same_type_polarity_consistency(particles):
@@ -74,95 +64,109 @@ def _check_same_type_polarity_consistency(particles):
     return errors
 
 
-def validate_molecule(molecule):
+def _violations(molecule):
     """
-    Valida uma molécula completa
+    Gera as violações das regras, na ordem em que validate_molecule as reporta.
     
-    Returns: (is_valid, errors)
+    Uma única passada de análise por molécula: mapa de partículas, contagem de
+    conexões, conexões faltantes e adjacência são calculados uma vez e
+    compartilhados pelas regras. Quem consome pode parar na primeira violação.
     """
-    errors = []
-    
     # Verificar estrutura básica
     if 'particles' not in molecule:
-        errors.append('Molécula não possui partículas')
-        return False, errors
+        yield 'Molécula não possui partículas'
+        return
     
     if 'bonds' not in molecule:
-        errors.append('Molécula não possui ligações')
-        return False, errors
+        yield 'Molécula não possui ligações'
+        return
     
     particles = molecule['particles']
     bonds = molecule['bonds']
     
     # Verificar se há partículas
     if len(particles) == 0:
-        errors.append('Molécula vazia: uma molécula válida deve ter pelo menos 2 partículas')
-        return False, errors
+        yield 'Molécula vazia: uma molécula válida deve ter pelo menos 2 partículas'
+        return
     
     # Verificar se há pelo menos 2 partículas (molécula válida)
     if len(particles) == 1:
-        errors.append('Molécula inválida: uma molécula válida deve ter pelo menos 2 partículas')
-        return False, errors
+        yield 'Molécula inválida: uma molécula válida deve ter pelo menos 2 partículas'
+        return
     
     # Verificar cada partícula
+    has_basic_errors = False
     for particle in particles:
         if 'id' not in particle:
-            errors.append('Partícula sem ID')
+            has_basic_errors = True
+            yield 'Partícula sem ID'
             continue
         
         if 'type' not in particle:
-            errors.append(f'Partícula {particle["id"]} sem tipo')
+            has_basic_errors = True
+            yield f'Partícula {particle["id"]} sem tipo'
             continue
         
         if particle['type'] not in PARTICLE_TYPES:
-            errors.append(f'Partícula {particle["id"]} com tipo inválido: {particle["type"]}')
+            has_basic_errors = True
+            yield f'Partícula {particle["id"]} com tipo inválido: {particle["type"]}'
             continue
         
         if 'polarity' not in particle:
-            errors.append(f'Partícula {particle["id"]} sem polaridade')
+            has_basic_errors = True
+            yield f'Partícula {particle["id"]} sem polaridade'
             continue
         
         if particle['polarity'] not in ['+', '-']:
-            errors.append(f'Partícula {particle["id"]} com polaridade inválida: {particle["polarity"]}')
+            has_basic_errors = True
+            yield f'Partícula {particle["id"]} com polaridade inválida: {particle["polarity"]}'
     
-    # Se já há erros básicos, retornar
-    if errors:
-        return False, errors
+    # Se já há erros básicos, parar
+    if has_basic_errors:
+        return
     
     # Verificar regra: partículas do mesmo tipo devem ter a mesma polaridade
-    consistency_errors = _check_same_type_polarity_consistency(particles)
-    errors.extend(consistency_errors)
-    
-    # Se há erros de consistência, continuar validando mas já sabemos que é inválida
-    # (não retornar aqui para coletar todos os erros)
+    # (não para aqui: as demais regras continuam sendo verificadas)
+    yield from _check_same_type_polarity_consistency(particles)
     
     # Verificar ligações
-    particle_ids = {p['id'] for p in particles}
+    particle_map = {p['id']: p for p in particles}
     
     for bond in bonds:
         if 'from' not in bond or 'to' not in bond:
-            errors.append('Ligação sem origem/destino')
+            yield 'Ligação sem origem/destino'
             continue
         
-        if bond['from'] not in particle_ids:
-            errors.append(f'Ligação referencia partícula inexistente: {bond["from"]}')
+        if bond['from'] not in particle_map:
+            yield f'Ligação referencia partícula inexistente: {bond["from"]}'
         
-        if bond['to'] not in particle_ids:
-            errors.append(f'Ligação referencia partícula inexistente: {bond["to"]}')
+        if bond['to'] not in particle_map:
+            yield f'Ligação referencia partícula inexistente: {bond["to"]}'
         
         if 'multiplicity' not in bond:
-            errors.append(f'Ligação entre {bond["from"]} e {bond["to"]} sem multiplicidade')
+            yield f'Ligação entre {bond["from"]} e {bond["to"]} sem multiplicidade'
         elif bond['multiplicity'] < 1:
-            errors.append(f'Ligação com multiplicidade inválida: {bond["multiplicity"]}')
+            yield f'Ligação com multiplicidade inválida: {bond["multiplicity"]}'
+    
+    # Ligações entre partículas existentes (as demais já foram reportadas)
+    linked_bonds = [
+        bond for bond in bonds
+        if bond.get('from') in particle_map and bond.get('to') in particle_map
+    ]
     
     # Verificar conexões (cada partícula deve respeitar seu limite)
     connection_count = {p['id']: 0 for p in particles}
     
-    for bond in bonds:
-        if 'from' in bond and 'to' in bond and 'multiplicity' in bond:
+    for bond in linked_bonds:
+        if 'multiplicity' in bond:
             connection_count[bond['from']] += bond['multiplicity']
             connection_count[bond['to']] += bond['multiplicity']
     
+    # Conexões faltantes por tipo e polaridade (usadas na regra de estabilização)
+    total_needed = 0
+    positive_by_type = {}
+    negative_by_type = {}
+    
     for particle in particles:
         pid = particle['id']
         ptype = particle['type']
@@ -170,104 +174,126 @@ def validate_molecule(molecule):
         actual_connections = connection_count[pid]
         
         if actual_connections > max_connections:
-            errors.append(
+            yield (
                 f'Partícula {pid} ({ptype}) excede limite de conexões: '
                 f'{actual_connections}/{max_connections}'
             )
         elif actual_connections < max_connections:
-            errors.append(
+            needed = max_connections - actual_connections
+            total_needed += needed
+            if particle['polarity'] == '+':
+                positive_by_type[ptype] = positive_by_type.get(ptype, 0) + needed
+            else:
+                negative_by_type[ptype] = negative_by_type.get(ptype, 0) + needed
+            yield (
                 f'Partícula {pid} ({ptype}) não está estável: '
                 f'{actual_connections}/{max_connections} conexões'
             )
     
     # Verificar regras de ligação
-    particle_map = {p['id']: p for p in particles}
-    
-    for bond in bonds:
-        if 'from' in bond and 'to' in bond:
-            p_from = particle_map.get(bond['from'])
-            p_to = particle_map.get(bond['to'])
-            
-            if p_from and p_to:
-                # Regra: partículas do mesmo tipo não podem se ligar
-                if p_from['type'] == p_to['type']:
-                    errors.append(
-                        f'Ligação inválida: partículas do mesmo tipo '
-                        f'({p_from["type"]}) não podem se ligar diretamente'
-                    )
-                
-                # Regra: partículas só se ligam com polaridades opostas
-                if p_from['polarity'] == p_to['polarity']:
-                    errors.append(
-                        f'Ligação inválida: partículas com mesma polaridade '
-                        f'({p_from["polarity"]}) não podem se ligar'
-                    )
+    for bond in linked_bonds:
+        p_from = particle_map[bond['from']]
+        p_to = particle_map[bond['to']]
+        
+        # Regra: partículas do mesmo tipo não podem se ligar
+        if p_from['type'] == p_to['type']:
+            yield (
+                f'Ligação inválida: partículas do mesmo tipo '
+                f'({p_from["type"]}) não podem se ligar diretamente'
+            )
+        
+        # Regra: partículas só se ligam com polaridades opostas
+        if p_from['polarity'] == p_to['polarity']:
+            yield (
+                f'Ligação inválida: partículas com mesma polaridade '
+                f'({p_from["polarity"]}) não podem se ligar'
+            )
     
     # Verificar conectividade (todas as partículas devem estar conectadas)
-    if len(particles) > 1:
-        # Construir grafo de adjacências
-        adjacency = {p['id']: [] for p in particles}
-        for bond in bonds:
-            if 'from' in bond and 'to' in bond:
-                adjacency[bond['from']].append(bond['to'])
-                adjacency[bond['to']].append(bond['from'])
-        
-        if not _is_fully_connected(adjacency, particles):
-            errors.append('Molécula não está conectada: há partículas isoladas')
+    adjacency = build_adjacency(particles, linked_bonds)
     
-    # Verificar se é possível estabilizar todas as partículas
-    # A soma das conexões necessárias deve ser par (cada ligação conecta 2 partículas)
-    total_needed = 0
-    for particle in particles:
-        pid = particle['id']
-        ptype = particle['type']
-        max_connections = PARTICLE_TYPES[ptype]['connections']
-        actual_connections = connection_count.get(pid, 0)
-        needed = max_connections - actual_connections
-        if needed > 0:
-            total_needed += needed
+    if not _is_fully_connected(adjacency, particles):
+        yield 'Molécula não está conectada: há partículas isoladas'
     
-    # Se há conexões faltando, verificar se é possível criar
+    # Se há conexões faltando, verificar se há partículas de tipos diferentes
+    # e polaridades opostas que podem se ligar
     if total_needed > 0:
-        # Contar partículas por tipo e polaridade
-        positive_by_type = {}
-        negative_by_type = {}
-        
-        for particle in particles:
-            ptype = particle['type']
-            polarity = particle['polarity']
-            actual = connection_count.get(particle['id'], 0)
-            max_conn = PARTICLE_TYPES[ptype]['connections']
-            needed = max_conn - actual
-            
-            if needed > 0:
-                if polarity == '+':
-                    positive_by_type[ptype] = positive_by_type.get(ptype, 0) + needed
-                else:
-                    negative_by_type[ptype] = negative_by_type.get(ptype, 0) + needed
+        can_stabilize = any(
+            pos_type != neg_type
+            for pos_type in positive_by_type
+            for neg_type in negative_by_type
+        )
         
-        # Verificar se há partículas de tipos opostos que podem se ligar
-        can_stabilize = False
-        for pos_type, pos_needed in positive_by_type.items():
-            for neg_type, neg_needed in negative_by_type.items():
-                if pos_type != neg_type:  # Tipos diferentes podem se ligar
-                    can_stabilize = True
-                    break
-            if can_stabilize:
-                break
-        
-        if not can_stabilize and total_needed > 0:
-            errors.append(
+        if not can_stabilize:
+            yield (
                 f'Impossível estabilizar: faltam {total_needed} conexões, '
                 f'mas não há partículas compatíveis para criar ligações'
             )
+
+
+def validate_molecule(molecule):
+    """
+    Valida uma molécula completa (coleta todos os erros)
     
-    is_valid = len(errors) == 0
-    return is_valid, errors
+    Returns: (is_valid, errors)
+    """
+    errors = list(_violations(molecule))
+    return len(errors) == 0, errors
+
+
+def first_violation(molecule):
+    """Primeira violação encontrada (para na primeira) ou None se a molécula é válida"""
+    return next(_violations(molecule), None)
 
 
 def quick_validate(molecule):
-    """Validação rápida (só retorna True/False)"""
-    is_valid, _ = validate_molecule(molecule)
-    return is_valid
+    """Validação rápida: para na primeira violação (só retorna True/False)"""
+    return first_violation(molecule) is None
+
 
+def _validate_entry(molecule, mode):
+    if not isinstance(molecule, dict):
+        return {'valid': False, 'errors': ['Molécula deve ser um objeto']}
+    
+    # Uma entrada malformada (partículas que não são objetos, multiplicidade
+    # em texto...) invalida só ela, não o lote inteiro
+    try:
+        if mode == VALIDATION_MODE_QUICK:
+            violation = first_violation(molecule)
+            return {'valid': violation is None, 'errors': [violation] if violation else []}
+        
+        is_valid, errors = validate_molecule(molecule)
+        return {'valid': is_valid, 'errors': errors}
+    except Exception as e:
+        return {'valid': False, 'errors': [f'Molécula malformada ({type(e).__name__}: {e})']}
+
+
+def validate_chunk(job):
+    """Valida um trecho do lote (executado nos processos do pool). job: (moléculas, modo)"""
+    molecules, mode = job
+    return [_validate_entry(molecule, mode) for molecule in molecules]
+
+
+def validate_batch(molecules, mode=VALIDATION_MODE_FULL, workers=1):
+    """
+    Valida várias moléculas.
+    
+    Args:
+        mode: 'full' (todos os erros) ou 'quick' (para na primeira violação)
+        workers: Trechos de lotes grandes validados no pool dos jobs (None = número de CPUs)
+    
+    Returns: [{'valid': bool, 'errors': [str]}] na ordem das moléculas
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"mode deve ser um de: {', '.join(VALIDATION_MODES)}")
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    if workers <= 1 or len(molecules) < POOL_BATCH_THRESHOLD:
+        return validate_chunk((molecules, mode))
+    
+    # Trechos contíguos (a ordem do resultado é a do lote)
+    size = -(-len(molecules) // workers)
+    jobs = [(molecules[start:start + size], mode) for start in range(0, len(molecules), size)]
+    return [entry for chunk in map_in_pool(validate_chunk, jobs) for entry in chunk]
@@ -3,89 +3,238 @@ Gerencia moléculas descobertas pelos jogadores
 Cada save tem suas próprias descobertas
 """
 
-import json
 import os
+import re
 import uuid
 from datetime import datetime
-from core.molecule_comparison import are_molecules_identical
+from core.canonical import CANONICAL_KEY, attach_canonical_key, canonical_key
+from core.molecule_features import attach_molecule_features
+from .storage import read_json, write_json, file_lock
 
 DISCOVERIES_FILE = 'data/discovered_molecules.json'
 
+DEFAULT_NAME_PREFIX = 'Descoberta #'
+_DEFAULT_NAME_PATTERN = re.compile(r'^Descoberta #(\d+)$')
+
+# Estado em memória (por processo)
+# O conteúdo do arquivo fica em cache enquanto o arquivo não for alterado
+# (mtime/tamanho), e cada save mantém:
+#   'name_counter': próximo número para nomes padrão (monotônico)
+#   'by_mass' / 'by_canonical_key': índices secundários
+#       valor -> {discovery_id: True} (dict como conjunto ordenado por inserção)
+#       by_canonical_key também responde às verificações de duplicata em O(1)
+_discoveries_cache = None
+_discoveries_stamp = None
+_discoveries_generation = 0
+_save_states = {}
+
+def _file_stamp():
+    """Identifica a versão do arquivo em disco (mtime, tamanho) ou None se não existe"""
+    try:
+        stat = os.stat(DISCOVERIES_FILE)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
 def load_discoveries():
-    """Carrega todas as descobertas de todos os saves"""
-    if not os.path.exists(DISCOVERIES_FILE):
-        return {}
+    """Carrega todas as descobertas de todos os saves (relê o arquivo apenas se mudou)"""
+    global _discoveries_cache, _discoveries_stamp, _discoveries_generation
     
-    try:
-        with open(DISCOVERIES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+    stamp = _file_stamp()
+    if _discoveries_cache is not None and stamp == _discoveries_stamp:
+        return _discoveries_cache
+    
+    discoveries = read_json(DISCOVERIES_FILE) if stamp is not None else {}
+    
+    # Chave canônica calculada uma vez por leitura (arquivos antigos não a têm)
+    for save_discoveries in discoveries.values():
+        for discovery in save_discoveries.values():
+            if discovery.get('molecule'):
+                attach_canonical_key(discovery['molecule'])
+    
+    # Arquivo mudou externamente - estado por save precisa ser reconstruído
+    _discoveries_cache = discoveries
+    _discoveries_stamp = _file_stamp()
+    _discoveries_generation += 1
+    _save_states.clear()
+    
+    return discoveries
 
-def save_discoveries(discoveries):
-    """Salva as descobertas no arquivo JSON"""
-    os.makedirs('data', exist_ok=True)
-    with open(DISCOVERIES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(discoveries, f, indent=2, ensure_ascii=False)
+def get_discoveries_generation():
+    """
+    Versão do conteúdo carregado: muda sempre que o arquivo é relido (inclusive
+    quando outro processo o alterou). Índices derivados comparam este valor
+    para saber quando se reconstruir.
+    """
+    return _discoveries_generation
 
-def get_next_discovery_name_count(save_id):
-    """Obtém o próximo número para nomes padrão (Descoberta #1, #2, etc)"""
-    discoveries = load_discoveries()
-    save_discoveries = discoveries.get(save_id, {})
+def save_discoveries(discoveries):
+    """Salva as descobertas no arquivo JSON (escrita atômica)"""
+    global _discoveries_cache, _discoveries_stamp, _discoveries_generation
     
-    count = 1
-    while True:
-        name = f"Descoberta #{count}"
-        exists = any(d.get('name') == name for d in save_discoveries.values())
-        if not exists:
-            return count
-        count += 1
-
-def molecule_exists_in_discoveries(save_id, molecule):
-    """Verifica se uma molécula já existe nas descobertas de um save"""
-    discoveries = get_all_discoveries(save_id)
-    for discovery in discoveries:
-        if are_molecules_identical(molecule, discovery.get('molecule')):
-            return True
-    return False
+    write_json(DISCOVERIES_FILE, discoveries)
+    
+    if discoveries is not _discoveries_cache:
+        _discoveries_generation += 1
+        _save_states.clear()
+    _discoveries_cache = discoveries
+    _discoveries_stamp = _file_stamp()
 
-def add_discovery(save_id, molecule, formula=None, name=None):
+def _parse_default_name_count(name):
+    """Extrai N de 'Descoberta #N' (ou None se não for um nome padrão)"""
+    match = _DEFAULT_NAME_PATTERN.match(name or '')
+    return int(match.group(1)) if match else None
+
+def _get_save_state(save_id):
     """
-    Adiciona uma nova descoberta para um save específico
-    
-    Returns: discovery_id ou None se já existe
+    Obtém o estado em memória das descobertas de um save,
+    construindo-o (uma vez) a partir das descobertas carregadas
     """
-    # Verificar se já existe
-    if molecule_exists_in_discoveries(save_id, molecule):
-        return None
-    
     discoveries = load_discoveries()
     
-    # Garantir que existe dicionário para este save
-    if save_id not in discoveries:
-        discoveries[save_id] = {}
+    state = _save_states.get(save_id)
+    if state is not None:
+        return state
     
-    # Gerar ID único
-    discovery_id = f"disc_{uuid.uuid4().hex[:8]}"
+    state = {
+        'name_counter': 1,
+        'by_mass': {},
+        'by_canonical_key': {}
+    }
     
-    # Gerar nome padrão se não fornecido
-    if not name:
-        count = get_next_discovery_name_count(save_id)
-        name = f"Descoberta #{count}"
+    highest_count = 0
+    for discovery in discoveries.get(save_id, {}).values():
+        _index_discovery(state, discovery)
+        
+        count = _parse_default_name_count(discovery.get('name'))
+        if count and count > highest_count:
+            highest_count = count
     
-    # Criar descoberta
-    discovery = {
-        'id': discovery_id,
-        'molecule': molecule,
-        'formula': formula or '',
-        'name': name,
-        'discovered_at': datetime.now().isoformat()
-    }
+    state['name_counter'] = highest_count + 1
+    _save_states[save_id] = state
+    return state
+
+def _index_keys(discovery):
+    """Chaves dos índices secundários de uma descoberta: (massa, chave canônica)"""
+    molecule = discovery.get('molecule')
+    if not molecule:
+        return None
+    return (len(molecule.get('particles', [])), molecule[CANONICAL_KEY])
+
+def _index_discovery(state, discovery):
+    """Adiciona uma descoberta aos índices secundários do save"""
+    keys = _index_keys(discovery)
+    if keys is None:
+        return
+    mass, key = keys
+    state['by_mass'].setdefault(mass, {})[discovery['id']] = True
+    state['by_canonical_key'].setdefault(key, {})[discovery['id']] = True
+
+def _unindex_discovery(state, discovery):
+    """Remove uma descoberta dos índices secundários do save"""
+    keys = _index_keys(discovery)
+    if keys is None:
+        return
+    for index, value in zip(('by_mass', 'by_canonical_key'), keys):
+        ids = state[index].get(value)
+        if ids is not None:
+            ids.pop(discovery['id'], None)
+            if not ids:
+                del state[index][value]
+
+def _discoveries_from_index(save_id, index, value):
+    state = _get_save_state(save_id)
+    save_discoveries = load_discoveries().get(save_id, {})
+    return [
+        save_discoveries[discovery_id]
+        for discovery_id in state[index].get(value, {})
+        if discovery_id in save_discoveries
+    ]
+
+def get_discoveries_by_mass(save_id, mass):
+    """Descobertas de um save com a massa dada (via índice, sem varrer o save)"""
+    return _discoveries_from_index(save_id, 'by_mass', mass)
+
+def get_next_discovery_name_count(save_id):
+    """Obtém o próximo número para nomes padrão (Descoberta #1, #2, etc)"""
+    return _get_save_state(save_id)['name_counter']
+
+def molecule_exists_in_discoveries(save_id, molecule, key=None):
+    """
+    Verifica se uma molécula já existe nas descobertas de um save (comparação
+    por chave canônica: invariante à numeração das partículas)
+    
+    Args:
+        key: Chave canônica já calculada pelo servidor (opcional); a chave
+             enviada pelo cliente na molécula nunca é usada
+    """
+    if not molecule or not isinstance(molecule, dict):
+        return False
+    if key is None:
+        key = canonical_key(molecule)
+    return key in _get_save_state(save_id)['by_canonical_key']
+
+def add_discovery(save_id, molecule, formula=None, name=None):
+    """
+    Adiciona uma nova descoberta para um save específico
     
-    discoveries[save_id][discovery_id] = discovery
-    save_discoveries(discoveries)
+    Duplicatas e nome padrão são resolvidos pelo estado em memória do save;
+    a única operação de disco é a escrita final.
     
-    return discovery_id
+    Returns: discovery_id ou None se já existe
+    """
+    with file_lock(DISCOVERIES_FILE):
+        state = _get_save_state(save_id)
+        
+        # Verificar se já existe (chave recalculada: a do cliente não é confiável)
+        key = canonical_key(molecule)
+        if key in state['by_canonical_key']:
+            return None
+        
+        discoveries = load_discoveries()
+        
+        # Garantir que existe dicionário para este save
+        if save_id not in discoveries:
+            discoveries[save_id] = {}
+        
+        # Gerar ID único
+        discovery_id = f"disc_{uuid.uuid4().hex[:8]}"
+        
+        # Gerar nome padrão se não fornecido
+        if not name:
+            name = f"{DEFAULT_NAME_PREFIX}{state['name_counter']}"
+        
+        # Pré-computar características estruturais (topologia, ciclos, multiplicidades)
+        attach_molecule_features(molecule)
+        molecule[CANONICAL_KEY] = key
+        
+        # Criar descoberta
+        discovery = {
+            'id': discovery_id,
+            'molecule': molecule,
+            'formula': formula or '',
+            'name': name,
+            'discovered_at': datetime.now().isoformat()
+        }
+        
+        discoveries[save_id][discovery_id] = discovery
+        save_discoveries(discoveries)
+        
+        # Atualizar estado do save (contador nunca volta atrás)
+        _index_discovery(state, discovery)
+        count = _parse_default_name_count(name)
+        if count and count >= state['name_counter']:
+            state['name_counter'] = count + 1
+        
+        # Atualizar índice em memória
+        from .molecule_registry import register_discovery
+        register_discovery(save_id, discovery)
+        
+        # Rede de reações do save atualizada em segundo plano
+        from .network_updater import schedule_update
+        schedule_update(save_id)
+        
+        return discovery_id
 
 def get_discovery(save_id, discovery_id):
     """Obtém uma descoberta específica"""
@@ -101,21 +250,43 @@ def get_all_discoveries(save_id):
 
 def clear_discoveries(save_id):
     """Limpa todas as descobertas de um save"""
-    discoveries = load_discoveries()
-    if save_id in discoveries:
-        discoveries[save_id] = {}
-        save_discoveries(discoveries)
+    with file_lock(DISCOVERIES_FILE):
+        discoveries = load_discoveries()
+        if save_id in discoveries:
+            discoveries[save_id] = {}
+            save_discoveries(discoveries)
+        _save_states.pop(save_id, None)
+        
+        # Atualizar índice em memória
+        from .molecule_registry import unregister_save
+        unregister_save(save_id)
+        
+        from .network_updater import schedule_update
+        schedule_update(save_id)
 
 def delete_discovery(save_id, discovery_id):
     """Deleta uma descoberta específica"""
-    discoveries = load_discoveries()
-    
-    if save_id in discoveries and discovery_id in discoveries[save_id]:
-        del discoveries[save_id][discovery_id]
-        save_discoveries(discoveries)
-        return True
-    
-    return False
+    with file_lock(DISCOVERIES_FILE):
+        discoveries = load_discoveries()
+        
+        if save_id in discoveries and discovery_id in discoveries[save_id]:
+            discovery = discoveries[save_id].pop(discovery_id)
+            save_discoveries(discoveries)
+            
+            # Liberar índices (o contador de nomes é mantido)
+            state = _save_states.get(save_id)
+            if state is not None:
+                _unindex_discovery(state, discovery)
+            
+            # Atualizar índice em memória
+            from .molecule_registry import unregister_molecule
+            unregister_molecule(discovery_id)
+            
+            from .network_updater import schedule_update
+            schedule_update(save_id)
+            return True
+        
+        return False
 
 def get_stats(save_id):
     """Retorna estatísticas sobre descobertas de um save"""
@@ -127,12 +298,6 @@ def get_stats(save_id):
     }
 
 def find_discovery_by_id(discovery_id):
-    """Busca uma descoberta por ID em todos os saves"""
-    discoveries = load_discoveries()
-    
-    for save_id, save_discoveries in discoveries.items():
-        if discovery_id in save_discoveries:
-            return save_discoveries[discovery_id]
-    
-    return None
-
+    """Busca uma descoberta por ID em todos os saves (O(1), via registro em memória)"""
+    from .molecule_registry import lookup_discovery
+    return lookup_discovery(discovery_id)
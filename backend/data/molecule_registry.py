@@ -0,0 +1,160 @@
+"""
+Registro unificado de moléculas
+
+Mantém um índice em memória (dict) de todas as moléculas por ID:
+- Moléculas base (MOLECULES_DATABASE)
+- Descobertas de todos os saves
+
+As moléculas base são indexadas uma única vez na importação do módulo. O
+índice das descobertas é atualizado pelas mutações locais (adicionar,
+deletar, limpar save) e reconstruído quando o arquivo de descobertas é
+relido - inclusive quando outro processo o alterou -, de modo que as buscas
+por ID são O(1) e não leem o disco (apenas conferem a versão do arquivo).
+"""
+
+from core.canonical import canonical_key
+from .molecules import MOLECULES_DATABASE
+from .discovered_molecules import load_discoveries, get_discoveries_generation
+
+SOURCE_BASE = 'base'
+SOURCE_DISCOVERY = 'discovery'
+
+# molecule_id -> {'molecule': dict, 'source': str, 'save_id': str|None, 'discovery': dict|None}
+_base_registry = {}
+_discovery_registry = {}
+
+# Versão das descobertas carregadas refletida em _discovery_registry
+_discovery_generation = None
+
+# Chaves canônicas das moléculas base (classificação 'Base' em O(1))
+_base_keys = set()
+
+
+def build_registry():
+    """(Re)constrói o índice completo a partir do banco base e do arquivo de descobertas"""
+    _base_registry.clear()
+    _base_keys.clear()
+
+    for mass, molecules in MOLECULES_DATABASE.items():
+        for molecule in molecules:
+            _base_registry[molecule['id']] = {
+                'molecule': molecule,
+                'source': SOURCE_BASE,
+                'save_id': None,
+                'discovery': None
+            }
+            _base_keys.add(canonical_key(molecule))
+
+    _rebuild_discoveries()
+
+
+def _rebuild_discoveries():
+    """Reconstrói o índice das descobertas (troca o dict inteiro: buscas concorrentes não veem meio índice)"""
+    global _discovery_registry, _discovery_generation
+
+    discoveries = load_discoveries()
+    generation = get_discoveries_generation()
+
+    registry = {}
+    for save_id, save_discoveries in discoveries.items():
+        for discovery in save_discoveries.values():
+            registry[discovery['id']] = _discovery_entry(save_id, discovery)
+
+    _discovery_registry = registry
+    _discovery_generation = generation
+
+
+def _sync_discoveries():
+    """Reconstrói o índice das descobertas se o arquivo foi relido desde a última vez"""
+    load_discoveries()
+    if get_discoveries_generation() != _discovery_generation:
+        _rebuild_discoveries()
+
+
+def _discovery_entry(save_id, discovery):
+    return {
+        'molecule': discovery.get('molecule'),
+        'source': SOURCE_DISCOVERY,
+        'save_id': save_id,
+        'discovery': discovery
+    }
+
+
+def register_discovery(save_id, discovery):
+    """Adiciona (ou substitui) uma descoberta no índice"""
+    _sync_discoveries()
+    _discovery_registry[discovery['id']] = _discovery_entry(save_id, discovery)
+
+
+def unregister_molecule(molecule_id):
+    """Remove uma descoberta do índice (moléculas base nunca são removidas)"""
+    _sync_discoveries()
+    _discovery_registry.pop(molecule_id, None)
+
+
+def unregister_save(save_id):
+    """Remove do índice todas as descobertas de um save"""
+    _sync_discoveries()
+    to_remove = [
+        molecule_id for molecule_id, entry in _discovery_registry.items()
+        if entry['save_id'] == save_id
+    ]
+    for molecule_id in to_remove:
+        del _discovery_registry[molecule_id]
+
+
+def lookup(molecule_id):
+    """
+    Busca a entrada completa do registro por ID
+
+    Returns: {'molecule', 'source', 'save_id', 'discovery'} ou None
+    """
+    entry = _base_registry.get(molecule_id)
+    if entry is not None:
+        return entry
+    _sync_discoveries()
+    return _discovery_registry.get(molecule_id)
+
+
+def lookup_molecule(molecule_id, source=None):
+    """
+    Busca uma molécula por ID (O(1), sem acesso a disco)
+
+    Args:
+        molecule_id: ID da molécula base ou da descoberta
+        source: Restringe a busca a SOURCE_BASE ou SOURCE_DISCOVERY (opcional)
+
+    Returns: molecule dict ou None
+    """
+    if source == SOURCE_BASE:
+        entry = _base_registry.get(molecule_id)
+    elif source == SOURCE_DISCOVERY:
+        _sync_discoveries()
+        entry = _discovery_registry.get(molecule_id)
+    else:
+        entry = lookup(molecule_id)
+    return entry['molecule'] if entry else None
+
+
+def is_base_molecule(molecule, key=None):
+    """
+    Verifica se a molécula é estruturalmente idêntica a uma molécula base
+
+    Args:
+        key: Chave canônica já calculada pelo servidor (opcional)
+    """
+    if not molecule or not isinstance(molecule, dict):
+        return False
+    if key is None:
+        key = canonical_key(molecule)
+    return key in _base_keys
+
+
+def lookup_discovery(discovery_id):
+    """Busca uma descoberta (registro completo) por ID"""
+    _sync_discoveries()
+    entry = _discovery_registry.get(discovery_id)
+    return entry['discovery'] if entry else None
+
+
+build_registry()
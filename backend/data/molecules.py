@@ -348,12 +348,9 @@ def get_all_molecules():
 
 
 def get_molecule_by_id(molecule_id):
-    """Busca uma molécula específica por ID"""
-    for mass, molecules in MOLECULES_DATABASE.items():
-        for molecule in molecules:
-            if molecule['id'] == molecule_id:
-                return molecule
-    return None
+    """Busca uma molécula específica por ID (apenas banco predefinido, O(1))"""
+    from .molecule_registry import lookup_molecule, SOURCE_BASE
+    return lookup_molecule(molecule_id, source=SOURCE_BASE)
 
 
 def calculate_molecule_properties(molecule):
@@ -441,20 +438,27 @@ def find_molecule(molecule_id):
     """
     Busca uma molécula por ID tanto no banco predefinido quanto nas descobertas
     
+    Usa o registro unificado (índice em memória): O(1), sem acesso a disco.
+    
     Returns: molecule dict ou None
     """
-    # Buscar nas moléculas predefinidas
-    for mass, molecules in MOLECULES_DATABASE.items():
-        for mol in molecules:
-            if mol['id'] == molecule_id:
-                return mol
-    
-    # Buscar nas descobertas
-    from .discovered_molecules import find_discovery_by_id
-    discovery = find_discovery_by_id(molecule_id)
-    
-    if discovery:
-        return discovery['molecule']
+    from .molecule_registry import lookup_molecule
+    return lookup_molecule(molecule_id)
+
+
+def _precompute_database_features():
+    """
+    Anexa as características estruturais pré-computadas (topologia, ciclos,
+    sequência de graus, multiplicidades) e a chave canônica a todas as
+    moléculas do banco. Executado uma única vez na importação do módulo.
+    """
+    from core.canonical import attach_canonical_key
+    from core.molecule_features import attach_molecule_features
     
-    return None
+    for mass, molecules in MOLECULES_DATABASE.items():
+        for molecule in molecules:
+            attach_molecule_features(molecule)
+            attach_canonical_key(molecule)
+
 
+_precompute_database_features()
@@ -0,0 +1,218 @@
+"""
+Atualizador incremental das redes de reações por save
+
+Cada alteração nas descobertas de um save (nova descoberta, remoção, limpeza)
+coloca o save em uma fila; uma thread de fundo reconcilia a rede do save com
+o conjunto conhecido (moléculas base + descobertas do save):
+- a rede do save parte de uma cópia da rede base compartilhada (fecho do
+  banco base, ver core.reaction_network), com a mesma massa máxima: os pares
+  base x base já estão nela e nunca são sintetizados de novo
+- moléculas novas são sintetizadas apenas contra o conjunto conhecido
+  (nova x conhecidas e conhecidas x nova - a síntese não é comutativa)
+- os resultados vão para o cache de sínteses com as mesmas chaves usadas
+  pela síntese automática (save_id:A+B), que já encontra a tela aquecida
+- as reações com sucesso são registradas na rede do save (produtos acima da
+  massa máxima são descartados, como no fecho base)
+- moléculas removidas perdem o ID de origem (as reações continuam na rede)
+
+Um save que já está na fila não é enfileirado de novo: a reconciliação
+cobre todas as alterações acumuladas até ela começar.
+"""
+
+import copy
+import queue
+import threading
+import time
+
+_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_worker = None
+
+_stats = {
+    'processed': 0,
+    'syntheses': 0,
+    'cache_hits': 0,
+    'errors': 0,
+    'last_error': None
+}
+
+def schedule_update(save_id):
+    """Enfileira a reconciliação da rede de um save (não bloqueia)"""
+    if not save_id:
+        return
+
+    with _pending_lock:
+        if save_id in _pending:
+            return
+        _pending.add(save_id)
+        _ensure_worker()
+
+    _queue.put(save_id)
+
+def _ensure_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run, name='network-updater', daemon=True)
+        _worker.start()
+
+def _run():
+    while True:
+        save_id = _queue.get()
+
+        # Alterações a partir daqui reenfileiram o save
+        with _pending_lock:
+            _pending.discard(save_id)
+
+        try:
+            update_save_network(save_id)
+            _stats['processed'] += 1
+        except Exception as e:
+            _stats['errors'] += 1
+            _stats['last_error'] = f'{save_id}: {e}'
+            print(f"⚠️ Erro ao atualizar a rede do save {save_id}: {e}")
+        finally:
+            _queue.task_done()
+
+def get_base_network():
+    """
+    Rede base compartilhada (fecho de MOLECULES_DATABASE), calculada e
+    persistida na primeira vez em que falta (sem pool: roda na thread de fundo)
+    """
+    from core.reaction_network import compute_reaction_network
+    from .molecules import get_all_molecules
+    from .reaction_networks import get_network, save_network, BASE_NETWORK
+
+    network = get_network(BASE_NETWORK)
+    if network is None:
+        sources = [(molecule['id'], molecule) for molecule in get_all_molecules()]
+        network = compute_reaction_network(sources, workers=0)
+        save_network(network, BASE_NETWORK)
+    return network
+
+def _start_network(base):
+    """Rede inicial de um save: cópia da rede base (as rodadas base ficam no histórico)"""
+    network = copy.deepcopy(base)
+    network.pop('complete', None)
+    return network
+
+def update_save_network(save_id):
+    """
+    Reconcilia (de forma síncrona) a rede do save com o conjunto conhecido.
+
+    Returns: rede atualizada ou None se o save não existe mais
+    """
+    from core.reaction_network import source_index, add_source, remove_source, record_synthesis
+    from core.synthesis import synthesize
+    from .discovered_molecules import get_all_discoveries
+    from .molecules import get_all_molecules
+    from .reaction_networks import get_network, save_network, delete_network, save_scope
+    from .saves import get_save
+    from .synthesis_results import get_cache_key, get_or_compute_syntheses
+
+    scope = save_scope(save_id)
+    if get_save(save_id) is None:
+        delete_network(scope)
+        return None
+
+    known = [(molecule['id'], molecule) for molecule in get_all_molecules()]
+    known.extend(
+        (discovery['id'], discovery['molecule'])
+        for discovery in get_all_discoveries(save_id)
+        if discovery.get('molecule')
+    )
+    known_ids = {source_id for source_id, _ in known}
+
+    # Redes sem a massa máxima da base (antigas ou de outra base) recomeçam da base
+    base = get_base_network()
+    network = get_network(scope)
+    fresh = network is None or network.get('max_mass') != base['max_mass']
+    if fresh:
+        network = _start_network(base)
+    indexed = source_index(network)
+    started = time.perf_counter()
+
+    removed = [source_id for source_id in indexed if source_id not in known_ids]
+    for source_id in removed:
+        remove_source(network, source_id)
+
+    present = [(source_id, molecule) for source_id, molecule in known if source_id in indexed]
+    added = [(source_id, molecule) for source_id, molecule in known if source_id not in indexed]
+
+    if not added and not removed:
+        if fresh:
+            save_network(network, scope)
+        return network
+
+    round_number = len(network['rounds']) + 1
+    keys = {source_id: indexed[source_id] for source_id, _ in present}
+    for source_id, molecule in added:
+        keys[source_id] = add_source(network, source_id, molecule, round_number)
+
+    # Cada molécula nova contra as conhecidas e as novas anteriores (e ela mesma)
+    pairs = []
+    for position, (new_id, new_molecule) in enumerate(added):
+        for other_id, other in present + added[:position + 1]:
+            pairs.append((new_id, new_molecule, other_id, other))
+            if other_id != new_id:
+                pairs.append((other_id, other, new_id, new_molecule))
+
+    # Mesmas chaves e mesmo single-flight das rotas de síntese: um par que
+    # um pedido ou job do save está calculando é esperado, não recalculado
+    cache_keys = [get_cache_key(id_a, id_b, save_id) for id_a, _, id_b, _ in pairs]
+    molecules_by_key = {
+        cache_key: (molecule_a, molecule_b)
+        for (_, molecule_a, _, molecule_b), cache_key in zip(pairs, cache_keys)
+    }
+    results, computed = get_or_compute_syntheses(cache_keys, lambda missing: {
+        cache_key: synthesize(*molecules_by_key[cache_key]) for cache_key in missing
+    })
+
+    recorded = {(reaction['a'], reaction['b']) for reaction in network['reactions']}
+    successful = 0
+    new_molecules = 0
+    dropped = 0
+
+    for (id_a, _, id_b, _), cache_key in zip(pairs, cache_keys):
+        result = results[cache_key]
+        if not result.get('success'):
+            continue
+        successful += 1
+
+        reaction = (keys[id_a], keys[id_b])
+        if reaction in recorded:
+            continue
+        recorded.add(reaction)
+        created, discarded = record_synthesis(network, reaction[0], reaction[1], result, round_number)
+        new_molecules += len(created)
+        dropped += discarded
+
+    network['rounds'].append({
+        'round': round_number,
+        'pairs': len(pairs),
+        'reactions': successful,
+        'dropped_products': dropped,
+        'new_molecules': new_molecules,
+        'added_sources': len(added),
+        'removed_sources': len(removed),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+    save_network(network, scope)
+
+    _stats['syntheses'] += len(computed)
+    _stats['cache_hits'] += len(pairs) - len(computed)
+    return network
+
+def wait_for_updates():
+    """Bloqueia até a fila esvaziar (scripts e verificações)"""
+    _queue.join()
+
+def get_updater_stats():
+    """Estatísticas do atualizador (fila, sínteses executadas, acertos de cache)"""
+    with _pending_lock:
+        pending = len(_pending)
+    return {
+        **_stats,
+        'pending': pending,
+        'running': _worker is not None and _worker.is_alive()
+    }
@@ -0,0 +1,46 @@
+"""
+Gerencia as redes de reações persistidas (ver core.reaction_network)
+
+Arquivo único com uma rede por escopo:
+- 'base': fecho a partir de MOLECULES_DATABASE
+- 'save:<save_id>': rede incremental do save (ver data.network_updater)
+"""
+
+from .storage import read_json, write_json, file_lock
+
+NETWORKS_FILE = 'data/reaction_networks.json'
+
+BASE_NETWORK = 'base'
+
+def save_scope(save_id):
+    """Escopo da rede incremental de um save"""
+    return f'save:{save_id}'
+
+def load_networks():
+    """Carrega todas as redes do arquivo"""
+    return read_json(NETWORKS_FILE)
+
+def save_networks(networks):
+    """Salva as redes no arquivo (escrita atômica)"""
+    write_json(NETWORKS_FILE, networks)
+
+def get_network(scope=BASE_NETWORK):
+    """Retorna a rede de um escopo ou None se ainda não foi calculada"""
+    return load_networks().get(scope)
+
+def save_network(network, scope=BASE_NETWORK):
+    """Persiste (substitui) a rede de um escopo"""
+    with file_lock(NETWORKS_FILE):
+        networks = load_networks()
+        networks[scope] = network
+        save_networks(networks)
+
+def delete_network(scope):
+    """Remove a rede de um escopo. Returns: True se existia"""
+    with file_lock(NETWORKS_FILE):
+        networks = load_networks()
+        if scope not in networks:
+            return False
+        del networks[scope]
+        save_networks(networks)
+    return True
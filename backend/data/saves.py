@@ -2,10 +2,9 @@
 Gerencia saves dos jogadores
 """
 
-import json
-import os
 import uuid
 from datetime import datetime
+from .storage import read_json, write_json, file_lock
 
 SAVES_FILE = 'data/saves.json'
 
@@ -14,28 +13,19 @@ _active_save_id = None
 
 def load_saves():
     """Carrega todos os saves do arquivo JSON"""
-    if not os.path.exists(SAVES_FILE):
-        return {'saves': {}, 'active_save': None}
-    
-    try:
-        with open(SAVES_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # Compatibilidade com formato antigo - garantir estrutura correta
-            if 'saves' not in data:
-                data['saves'] = {}
-            if 'active_save' not in data:
-                data['active_save'] = None
-            
-            return data
-    except:
-        return {'saves': {}, 'active_save': None}
+    data = read_json(SAVES_FILE, default=lambda: {'saves': {}, 'active_save': None})
+    
+    # Compatibilidade com formato antigo - garantir estrutura correta
+    if 'saves' not in data:
+        data['saves'] = {}
+    if 'active_save' not in data:
+        data['active_save'] = None
+    
+    return data
 
 def save_saves(data):
-    """Salva os saves no arquivo JSON"""
-    os.makedirs('data', exist_ok=True)
-    with open(SAVES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Salva os saves no arquivo JSON (escrita atômica)"""
+    write_json(SAVES_FILE, data)
 
 def create_save(player_name):
     """
@@ -43,24 +33,25 @@ def create_save(player_name):
     
     Returns: save_id
     """
-    data = load_saves()
-    
-    # Gerar ID único
-    save_id = f"save_{uuid.uuid4().hex[:8]}"
-    
-    # Criar save
-    new_save = {
-        'id': save_id,
-        'player_name': player_name,
-        'created_at': datetime.now().isoformat(),
-        'last_played': datetime.now().isoformat(),
-        'money': 1000,
-        'discoveries_count': 0,
-        'syntheses_count': 0
-    }
-    
-    data['saves'][save_id] = new_save
-    save_saves(data)
+    with file_lock(SAVES_FILE):
+        data = load_saves()
+        
+        # Gerar ID único
+        save_id = f"save_{uuid.uuid4().hex[:8]}"
+        
+        # Criar save
+        new_save = {
+            'id': save_id,
+            'player_name': player_name,
+            'created_at': datetime.now().isoformat(),
+            'last_played': datetime.now().isoformat(),
+            'money': 1000,
+            'discoveries_count': 0,
+            'syntheses_count': 0
+        }
+        
+        data['saves'][save_id] = new_save
+        save_saves(data)
     
     return save_id
 
@@ -78,9 +69,12 @@ def delete_save(save_id):
     """Deleta um save"""
     global _active_save_id
     
-    data = load_saves()
-    
-    if save_id in data['saves']:
+    with file_lock(SAVES_FILE):
+        data = load_saves()
+        
+        if save_id not in data['saves']:
+            return False
+        
         del data['saves'][save_id]
         
         # Se era o save ativo, desativar
@@ -89,31 +83,31 @@ def delete_save(save_id):
             _active_save_id = None
         
         save_saves(data)
-        
-        # Limpar descobertas deste save
-        from .discovered_molecules import clear_discoveries
-        clear_discoveries(save_id)
-        
-        return True
     
-    return False
+    # Limpar descobertas deste save
+    from .discovered_molecules import clear_discoveries
+    clear_discoveries(save_id)
+    
+    return True
 
 def set_active_save(save_id):
     """Define qual save está ativo"""
     global _active_save_id
     
-    data = load_saves()
-    
-    if save_id not in data['saves']:
-        return False
-    
-    # Atualizar last_played
-    data['saves'][save_id]['last_played'] = datetime.now().isoformat()
-    
-    data['active_save'] = save_id
-    _active_save_id = save_id
+    with file_lock(SAVES_FILE):
+        data = load_saves()
+        
+        if save_id not in data['saves']:
+            return False
+        
+        # Atualizar last_played
+        data['saves'][save_id]['last_played'] = datetime.now().isoformat()
+        
+        data['active_save'] = save_id
+        _active_save_id = save_id
+        
+        save_saves(data)
     
-    save_saves(data)
     return True
 
 def get_active_save_id():
@@ -139,25 +133,27 @@ def get_active_save():
 
 def update_save_stats(save_id, money_increment=0, discoveries_increment=0, syntheses_increment=0):
     """Atualiza estatísticas de um save"""
-    data = load_saves()
-    
-    if save_id not in data['saves']:
-        return False
-    
-    save = data['saves'][save_id]
-    
-    if money_increment:
-        save['money'] = save.get('money', 0) + money_increment
-    
-    if discoveries_increment:
-        save['discoveries_count'] = save.get('discoveries_count', 0) + discoveries_increment
-    
-    if syntheses_increment:
-        save['syntheses_count'] = save.get('syntheses_count', 0) + syntheses_increment
-    
-    save['last_played'] = datetime.now().isoformat()
+    with file_lock(SAVES_FILE):
+        data = load_saves()
+        
+        if save_id not in data['saves']:
+            return False
+        
+        save = data['saves'][save_id]
+        
+        if money_increment:
+            save['money'] = save.get('money', 0) + money_increment
+        
+        if discoveries_increment:
+            save['discoveries_count'] = save.get('discoveries_count', 0) + discoveries_increment
+        
+        if syntheses_increment:
+            save['syntheses_count'] = save.get('syntheses_count', 0) + syntheses_increment
+        
+        save['last_played'] = datetime.now().isoformat()
+        
+        save_saves(data)
     
-    save_saves(data)
     return True
 
 def add_discovery_to_save(save_id, molecule, formula=None, name=None):
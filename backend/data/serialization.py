@@ -0,0 +1,94 @@
+"""
+Codecs de serialização dos stores
+
+Abstração usada pelo pacote data/ para serializar os arquivos:
+- 'json': usa orjson quando instalado (muito mais rápido) e cai para o
+  json da biblioteca padrão caso contrário. Sempre compacto e UTF-8.
+- 'msgpack': formato binário compacto (MessagePack), opcional, indicado
+  para os caches. Disponível apenas se o pacote msgpack estiver instalado.
+
+Todos os codecs trabalham com bytes: dumps(obj) -> bytes, loads(bytes) -> obj.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CODEC_JSON = 'json'
+CODEC_MSGPACK = 'msgpack'
+
+# Backend efetivamente usado para JSON ('orjson' ou 'json')
+JSON_BACKEND = 'orjson' if orjson else 'json'
+
+# Erros que indicam arquivo corrompido/ilegível (independente do codec)
+DECODE_ERRORS = (ValueError, UnicodeDecodeError)
+if msgpack:
+    DECODE_ERRORS = DECODE_ERRORS + (msgpack.UnpackException,)
+
+
+def dumps_json(obj):
+    """Serializa para JSON compacto (bytes UTF-8)"""
+    if orjson:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # Tipos não suportados pelo orjson (ex: chaves não-string) - usar stdlib
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads_json(data):
+    """Desserializa JSON a partir de bytes"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def dumps_msgpack(obj):
+    """Serializa para MessagePack (bytes)"""
+    if not msgpack:
+        raise RuntimeError('Codec msgpack indisponível: instale o pacote "msgpack"')
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+def loads_msgpack(data):
+    """Desserializa MessagePack a partir de bytes"""
+    if not msgpack:
+        raise RuntimeError('Codec msgpack indisponível: instale o pacote "msgpack"')
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+CODECS = {
+    CODEC_JSON: {'dumps': dumps_json, 'loads': loads_json, 'extension': '.json'},
+    CODEC_MSGPACK: {'dumps': dumps_msgpack, 'loads': loads_msgpack, 'extension': '.msgpack'}
+}
+
+
+def is_codec_available(name):
+    """Verifica se um codec pode ser usado neste ambiente"""
+    if name == CODEC_JSON:
+        return True
+    if name == CODEC_MSGPACK:
+        return msgpack is not None
+    return False
+
+
+def get_codec(name):
+    """
+    Retorna o codec pelo nome.
+
+    Returns: {'dumps': callable, 'loads': callable, 'extension': str}
+    Raises: ValueError se o codec não existir
+    """
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f'Codec desconhecido: {name}')
+    return codec
@@ -0,0 +1,255 @@
+"""
+Armazenamento seguro dos arquivos JSON
+
+Utilitário compartilhado por todos os stores (saves, descobertas, cache de
+sínteses, perfis de propriedades):
+
+- Escrita atômica: serializa para um arquivo temporário no mesmo diretório,
+  faz fsync e substitui o arquivo final com os.replace. Uma queda no meio da
+  escrita nunca deixa o arquivo pela metade.
+- Serialização compacta (sem indentação), que reduz o volume escrito,
+  via data.serialization (orjson quando instalado, MessagePack opcional).
+- Lock de arquivo (arquivo '<nome>.lock') para múltiplos workers/processos.
+- Leitura que NÃO apaga dados: um arquivo corrompido é movido para
+  '<nome>.corrupt-<timestamp>' em vez de ser sobrescrito silenciosamente.
+- Estatísticas de escrita, incluindo a amplificação de escrita evitada em
+  relação ao formato antigo (json.dump com indent=2).
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from .serialization import CODEC_JSON, DECODE_ERRORS, dumps_json, get_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+# Locks entre threads do mesmo processo (o lock de arquivo cobre processos)
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+# Stores cujo lock já é mantido pela thread atual (permite aninhar file_lock)
+_held_locks = threading.local()
+
+# path -> {'writes', 'bytes_written', 'indented_ratio'}
+_write_stats = {}
+
+LEGACY_INDENT = 2
+
+
+def _get_thread_lock(path):
+    key = os.path.abspath(path)
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _thread_locks[key] = lock
+        return lock
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Lock exclusivo sobre um store, válido entre threads e entre processos.
+
+    Pode envolver um ciclo completo de leitura-modificação-escrita:
+
+        with file_lock(SAVES_FILE):
+            data = load_saves()
+            ...
+            save_saves(data)
+    """
+    key = os.path.abspath(path)
+    held = getattr(_held_locks, 'paths', None)
+    if held is None:
+        held = _held_locks.paths = set()
+
+    # Reentrante: escrita dentro de um ciclo leitura-modificação-escrita já protegido
+    if key in held:
+        yield
+        return
+
+    with _get_thread_lock(path):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        with open(f'{path}.lock', 'a+') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            elif msvcrt:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            held.add(key)
+            try:
+                yield
+            finally:
+                held.discard(key)
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                elif msvcrt:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _quarantine_corrupt_file(path, error):
+    """Move um arquivo corrompido para o lado, preservando os dados para recuperação"""
+    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    corrupt_path = f'{path}.corrupt-{timestamp}'
+    try:
+        os.replace(path, corrupt_path)
+        print(f"⚠️ Arquivo corrompido {path} movido para {corrupt_path}: {error}")
+    except OSError as move_error:
+        print(f"⚠️ Arquivo corrompido {path} (não foi possível movê-lo: {move_error}): {error}")
+
+
+def read_store(path, default=None, codec=CODEC_JSON):
+    """
+    Lê um store.
+
+    Args:
+        path: Caminho do arquivo
+        default: Função que cria o valor padrão (arquivo ausente ou corrompido)
+        codec: Nome do codec (ver data.serialization)
+
+    Returns: Conteúdo do arquivo ou default()
+    """
+    make_default = default or dict
+
+    if not os.path.exists(path):
+        return make_default()
+
+    try:
+        with open(path, 'rb') as f:
+            return get_codec(codec)['loads'](f.read())
+    except DECODE_ERRORS as e:
+        # Nunca devolver {} por cima de dados existentes: preservar o arquivo
+        _quarantine_corrupt_file(path, e)
+        return make_default()
+
+
+def read_json(path, default=None):
+    """Lê um store JSON (ver read_store)"""
+    return read_store(path, default, CODEC_JSON)
+
+
+def _fsync_directory(directory):
+    """Garante que o rename foi persistido (não suportado no Windows)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_store(path, data, codec=CODEC_JSON):
+    """
+    Escreve um store de forma atômica e compacta (temp + fsync + rename),
+    sob lock de arquivo.
+
+    Returns: Número de bytes escritos
+    """
+    payload = get_codec(codec)['dumps'](data)
+    directory = os.path.dirname(path) or '.'
+
+    with file_lock(path):
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory,
+            prefix=f'.{os.path.basename(path)}.',
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        _fsync_directory(directory)
+
+    _record_write(path, data, len(payload), codec)
+    return len(payload)
+
+
+def write_json(path, data):
+    """Escreve um store JSON (ver write_store)"""
+    return write_store(path, data, CODEC_JSON)
+
+
+# ============================================================================
+# ESTATÍSTICAS DE ESCRITA
+# ============================================================================
+
+def _indent_overhead(obj, depth=1):
+    """
+    Calcula quantos bytes o formato antigo (indent=2) acrescentaria
+    à serialização compacta de obj: quebras de linha, indentação e o espaço
+    após ':' de cada chave.
+    """
+    if isinstance(obj, dict):
+        if not obj:
+            return 0
+        # '\n' + indentação antes de cada item, ' ' após ':' e '\n' + indentação no fechamento
+        overhead = len(obj) * (1 + LEGACY_INDENT * depth + 1) + 1 + LEGACY_INDENT * (depth - 1)
+        for value in obj.values():
+            overhead += _indent_overhead(value, depth + 1)
+        return overhead
+    if isinstance(obj, list):
+        if not obj:
+            return 0
+        overhead = len(obj) * (1 + LEGACY_INDENT * depth) + 1 + LEGACY_INDENT * (depth - 1)
+        for value in obj:
+            overhead += _indent_overhead(value, depth + 1)
+        return overhead
+    return 0
+
+
+def _record_write(path, data, bytes_written, codec=CODEC_JSON):
+    stats = _write_stats.get(path)
+    if stats is None:
+        # Mede a razão formato antigo/atual uma única vez por store
+        compact_json = bytes_written if codec == CODEC_JSON else len(dumps_json(data))
+        indented = compact_json + _indent_overhead(data)
+        stats = {
+            'writes': 0,
+            'bytes_written': 0,
+            'indented_ratio': indented / bytes_written if bytes_written else 1.0
+        }
+        _write_stats[path] = stats
+
+    stats['writes'] += 1
+    stats['bytes_written'] += bytes_written
+
+
+def get_write_stats():
+    """
+    Retorna estatísticas de escrita por store desde o início do processo.
+
+    'legacy_bytes_estimate' é o volume que o formato antigo (JSON com indent=2) teria
+    escrito, estimado pela razão medida na primeira escrita de cada store;
+    'bytes_avoided' é a diferença.
+    """
+    report = {}
+    for path, stats in _write_stats.items():
+        legacy = round(stats['bytes_written'] * stats['indented_ratio'])
+        report[path] = {
+            'writes': stats['writes'],
+            'bytes_written': stats['bytes_written'],
+            'legacy_bytes_estimate': legacy,
+            'bytes_avoided': legacy - stats['bytes_written'],
+            'write_amplification_avoided': round(stats['indented_ratio'], 2)
+        }
+    return report
@@ -1,29 +1,207 @@
 """
 Gerencia o cache de resultados de síntese
+
+O formato do arquivo pode ser escolhido pela variável de ambiente
+SYNTHESIS_CACHE_FORMAT ('json' - padrão - ou 'msgpack', se instalado).
+
+Os produtos são internados: cada estrutura é armazenada uma única vez em uma
+tabela de produtos e os resultados guardam apenas os metadados (success,
+details, multiple...) e as referências aos produtos:
+
+    {
+        'version': 3,
+        'products': {'<chave canônica>.<variante>': molécula},
+        'results': {cache_key: {..., 'products': id | [ids] | None}}
+    }
+
+A síntese depende da ordem das partículas e ligações, então cada produto é
+guardado exatamente como saiu de synthesize (mesma ordem e mesmos IDs, sem
+coordenadas): um resultado lido do cache reage igual ao recém-calculado. A
+chave canônica serve só de índice de deduplicação - estruturas isomorfas em
+ordens diferentes são variantes da mesma chave.
+
+Os resultados são reidratados (cópias das moléculas, marcadas com layout
+pendente) ao serem lidos. Caches no formato antigo (cache_key -> resultado
+completo) são convertidos uma única vez, na primeira leitura, e gravados no
+novo formato imediatamente.
+
+O conteúdo do arquivo fica em memória enquanto o arquivo não for alterado
+(mtime/tamanho): as leituras compartilham o cache carregado e as escritas
+releem o arquivo sob o lock e substituem o cache pelo que gravaram.
 """
 
-import json
+import copy
 import os
+from core.single_flight import SingleFlight
 from .saves import get_active_save_id
+from .serialization import CODEC_JSON, get_codec, is_codec_available
+from .storage import read_json, read_store, write_store, file_lock
+
+# Sínteses da mesma chave em andamento (um cálculo e uma escrita por chave)
+_synthesis_flights = SingleFlight('synthesis')
 
-CACHE_FILE = 'data/synthesis_cache.json'
+LEGACY_CACHE_FILE = 'data/synthesis_cache.json'
+
+CACHE_FORMAT = os.environ.get('SYNTHESIS_CACHE_FORMAT', CODEC_JSON)
+if not is_codec_available(CACHE_FORMAT):
+    print(f"⚠️ Formato de cache '{CACHE_FORMAT}' indisponível - usando JSON")
+    CACHE_FORMAT = CODEC_JSON
+
+CACHE_FILE = 'data/synthesis_cache' + get_codec(CACHE_FORMAT)['extension']
+
+STORE_VERSION = 3
+
+# Cache em memória (por processo): conteúdo do último arquivo lido ou
+# gravado e a versão em disco correspondente (ver _file_stamp)
+_store_cache = None
+_store_stamp = None
+
+def _empty_store():
+    return {'version': STORE_VERSION, 'products': {}, 'results': {}}
+
+def _cache_source():
+    # Cache ainda só existe em JSON (formato configurado é outro): ler o JSON
+    if CACHE_FILE != LEGACY_CACHE_FILE and not os.path.exists(CACHE_FILE):
+        return LEGACY_CACHE_FILE
+    return CACHE_FILE
+
+def _file_stamp(path):
+    """Identifica a versão do arquivo em disco (arquivo, inode, mtime, tamanho) ou None se não existe"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def _read_cache_file(path):
+    if path == LEGACY_CACHE_FILE:
+        return read_json(LEGACY_CACHE_FILE, default=_empty_store)
+    return read_store(CACHE_FILE, default=_empty_store, codec=CACHE_FORMAT)
+
+def _read_for_update():
+    """
+    Cópia própria do cache, lida do arquivo (chamada sob o lock do cache):
+    quem grava não altera o cache compartilhado pelas leituras.
+    """
+    store = _read_cache_file(_cache_source())
+    if store.get('version') != STORE_VERSION:
+        store = _migrate_flat_cache(store)
+    return store
 
 def load_cache():
-    """Carrega o cache de sínteses do arquivo JSON"""
-    if not os.path.exists(CACHE_FILE):
-        return {}
+    """
+    Carrega o cache de sínteses (sempre no formato internado). O arquivo só
+    é relido se mudou; o resultado é compartilhado e não deve ser alterado
+    (para escrever: _read_for_update + save_cache, sob o lock do cache).
     
-    try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+    Arquivos antigos são convertidos uma única vez: a conversão roda sob o
+    lock do cache e o resultado é gravado na hora, no formato configurado.
+    """
+    global _store_cache, _store_stamp
+    
+    path = _cache_source()
+    stamp = _file_stamp(path)
+    if _store_cache is not None and stamp == _store_stamp:
+        return _store_cache
+    
+    store = _read_cache_file(path)
+    if store.get('version') != STORE_VERSION:
+        with file_lock(CACHE_FILE):
+            # Outro processo pode ter convertido enquanto esperávamos o lock
+            store = _read_cache_file(_cache_source())
+            if store.get('version') != STORE_VERSION:
+                store = _migrate_flat_cache(store)
+                save_cache(store)
+        return store
+    
+    # Versão anterior à leitura: uma escrita concorrente força nova leitura
+    _store_cache = store
+    _store_stamp = stamp
+    return store
 
 def save_cache(cache):
-    """Salva o cache no arquivo JSON"""
-    os.makedirs('data', exist_ok=True)
-    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cache, f, indent=2, ensure_ascii=False)
+    """Salva o cache no arquivo (escrita atômica) e o mantém em memória"""
+    global _store_cache, _store_stamp
+    
+    # Versão lida ainda sob o lock: nenhum outro processo escreveu no meio
+    with file_lock(CACHE_FILE):
+        try:
+            write_store(CACHE_FILE, cache, CACHE_FORMAT)
+        except BaseException:
+            _store_cache = None
+            raise
+        _store_cache = cache
+        _store_stamp = _file_stamp(CACHE_FILE)
+
+def _migrate_flat_cache(flat_cache):
+    """Converte o formato antigo (cache_key -> resultado completo) no internado"""
+    store = _empty_store()
+    for key, result in flat_cache.items():
+        _store_result(store, key, result)
+    return store
+
+def _intern_product(store, molecule):
+    """Adiciona o produto à tabela (se essa estrutura exata ainda não existe) e retorna seu ID"""
+    from core.canonical import CANONICAL_KEY, canonical_key
+    from core.synthesis import LAYOUT_PENDING_KEY
+    
+    product = {
+        key: value for key, value in molecule.items()
+        if key not in (LAYOUT_PENDING_KEY, CANONICAL_KEY, 'particles', 'bonds')
+    }
+    product['particles'] = [
+        {key: value for key, value in p.items() if key not in ('x', 'y')}
+        for p in molecule['particles']
+    ]
+    product['bonds'] = [dict(bond) for bond in molecule['bonds']]
+    
+    key = molecule.get(CANONICAL_KEY) or canonical_key(molecule)
+    variant = 0
+    while True:
+        product_id = f'{key}.{variant}'
+        existing = store['products'].get(product_id)
+        if existing is None:
+            store['products'][product_id] = product
+            return product_id
+        if existing == product:
+            return product_id
+        variant += 1
+
+def _product_canonical_key(product_id):
+    return product_id.rsplit('.', 1)[0]
+
+def _store_result(store, key, result):
+    """Grava um resultado: metadados no resultado, moléculas na tabela de produtos"""
+    entry = {k: v for k, v in result.items() if k != 'result'}
+    products = result.get('result')
+    if isinstance(products, list):
+        entry['products'] = [_intern_product(store, molecule) for molecule in products]
+    elif isinstance(products, dict):
+        entry['products'] = _intern_product(store, products)
+    else:
+        entry['products'] = None
+    store['results'][key] = entry
+
+def _rehydrate(store, entry):
+    """Reconstrói o resultado completo a partir dos metadados e da tabela de produtos"""
+    from core.canonical import CANONICAL_KEY
+    from core.synthesis import mark_layout_pending
+    
+    def product(product_id):
+        molecule = copy.deepcopy(store['products'][product_id])
+        molecule[CANONICAL_KEY] = _product_canonical_key(product_id)
+        return mark_layout_pending(molecule)
+    
+    # Metadados copiados: o resultado não compartilha nada com o cache
+    result = copy.deepcopy({k: v for k, v in entry.items() if k != 'products'})
+    references = entry.get('products')
+    if isinstance(references, list):
+        result['result'] = [product(product_id) for product_id in references]
+    elif references is not None:
+        result['result'] = product(references)
+    else:
+        result['result'] = None
+    return result
 
 def get_cache_key(mol_a_id, mol_b_id, save_id):
     """Gera chave única para o cache (incluindo save_id)"""
@@ -39,40 +217,142 @@ def get_synthesis_result(key):
         if save_id:
             key = f"{save_id}:{key}"
     
-    return cache.get(key)
+    entry = cache['results'].get(key)
+    if entry is None:
+        return None
+    return _rehydrate(cache, entry)
 
 def save_synthesis_result(key, result):
-    """Salva resultado de síntese no cache"""
-    cache = load_cache()
-    
+    """
+    Salva resultado de síntese no cache.
+    Os produtos vão para a tabela deduplicada, sem coordenadas
+    (recalculadas ao servir, via cache de layouts).
+    """
     # Adicionar save_id à chave se não tiver
     if ':' not in key:
         save_id = get_active_save_id()
         if save_id:
             key = f"{save_id}:{key}"
     
-    cache[key] = result
-    save_cache(cache)
+    with file_lock(CACHE_FILE):
+        cache = _read_for_update()
+        _store_result(cache, key, result)
+        save_cache(cache)
+
+def get_or_compute_synthesis(key, compute):
+    """
+    Resultado do cache ou compute() (salvo no cache). Pedidos simultâneos da
+    mesma chave compartilham um único cálculo e uma única escrita no cache.
+    
+    Returns: (resultado, calculado_agora) - False para quem leu do cache ou
+             esperou o cálculo de outro pedido
+    """
+    # Mesma chave completa de get/save_synthesis_result
+    if ':' not in key:
+        save_id = get_active_save_id()
+        if save_id:
+            key = f"{save_id}:{key}"
+    
+    # Os grupos publicam só o resultado (como os jobs); calculado_agora fica aqui
+    computed = []
+    
+    def load_or_compute():
+        cached = get_synthesis_result(key)
+        if cached:
+            return cached
+        result = compute()
+        save_synthesis_result(key, result)
+        computed.append(key)
+        return result
+    
+    result, _ = _synthesis_flights.run(key, load_or_compute)
+    return result, bool(computed)
+
+def get_synthesis_results(keys):
+    """Obtém vários resultados com uma única leitura do cache. Returns: {key: resultado} (só os encontrados)"""
+    cache = load_cache()
+    return {
+        key: _rehydrate(cache, cache['results'][key])
+        for key in keys
+        if key in cache['results']
+    }
+
+def save_synthesis_results(results):
+    """Salva vários resultados ({key completa: resultado}) com uma única escrita"""
+    if not results:
+        return
+    with file_lock(CACHE_FILE):
+        cache = _read_for_update()
+        for key, result in results.items():
+            _store_result(cache, key, result)
+        save_cache(cache)
+
+def get_or_compute_syntheses(keys, compute):
+    """
+    Versão em lote de get_or_compute_synthesis (chaves completas): uma leitura
+    do cache, compute(chaves_faltantes) -> {chave: resultado} uma única vez para
+    as chaves que nenhum outro pedido está calculando e uma única escrita.
+    Chaves em andamento em outro pedido (ou job) são esperadas.
+    
+    Returns: ({chave: resultado}, chaves calculadas agora)
+    """
+    computed = set()
+    
+    def load_or_compute(led_keys):
+        cached = get_synthesis_results(led_keys)
+        missing = [key for key in led_keys if not cached.get(key)]
+        fresh = compute(missing) if missing else {}
+        save_synthesis_results(fresh)
+        computed.update(fresh)
+        return {key: fresh[key] if key in fresh else cached[key] for key in led_keys}
+    
+    results, _ = _synthesis_flights.run_many(keys, load_or_compute)
+    return results, computed
+
+def claim_syntheses(keys):
+    """
+    Reserva as chaves (completas) que ninguém está calculando, para um
+    cálculo fora do pedido (jobs): pedidos simultâneos dessas chaves esperam
+    complete_syntheses ou, se o job for cancelado, release_syntheses (e então
+    calculam por conta própria). Chaves já em andamento não são reservadas.
+    
+    Returns: {chave: chamada} das chaves reservadas
+    """
+    claimed, _ = _synthesis_flights.begin(keys, join=False)
+    return claimed
+
+def complete_syntheses(claimed, results):
+    """Salva os resultados ({chave: resultado}) das chaves reservadas e os publica"""
+    save_synthesis_results({key: results[key] for key in claimed if key in results})
+    _synthesis_flights.finish(claimed, results)
+
+def release_syntheses(claimed):
+    """Libera as chaves reservadas sem resultado (job cancelado ou com falha)"""
+    _synthesis_flights.abandon(claimed)
 
 def get_all_results():
-    """Retorna todos os resultados de síntese"""
-    return load_cache()
+    """Retorna todos os resultados de síntese (reidratados)"""
+    cache = load_cache()
+    return {key: _rehydrate(cache, entry) for key, entry in cache['results'].items()}
 
 def get_stats():
     """Retorna estatísticas sobre sínteses"""
     cache = load_cache()
+    results = cache['results']
     
-    total = len(cache)
-    successful = sum(1 for r in cache.values() if r.get('success'))
+    total = len(results)
+    successful = sum(1 for r in results.values() if r.get('success'))
     failed = total - successful
     
     return {
         'total': total,
         'successful': successful,
-        'failed': failed
+        'failed': failed,
+        'unique_products': len({_product_canonical_key(product_id) for product_id in cache['products']}),
+        'stored_products': len(cache['products'])
     }
 
 def clear_cache():
     """Limpa todo o cache de sínteses"""
-    save_cache({})
+    save_cache(_empty_store())
 
@@ -0,0 +1,121 @@
+"""
+Benchmark dos engines de layout (heurístico x stress majorization).
+
+Gera moléculas sintéticas com 6, 20 e 100 partículas (árvore, ciclo com
+ramificações e grafo denso) e mede, para cada engine:
+- tempo de cálculo (cache de layouts limpo a cada execução)
+- sobreposições (pares de partículas a menos de 2 unidades)
+- variação do comprimento das ligações (desvio padrão / média)
+
+Uso (a partir de backend/):
+    python scripts/benchmark_layout.py [repetições]
+"""
+
+import sys
+import os
+import copy
+import math
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.synthesis import (
+    reorganize_positions, clear_layout_cache, is_layout_engine_available,
+    LAYOUT_ENGINE_HEURISTIC, LAYOUT_ENGINE_STRESS
+)
+
+SIZES = [6, 20, 100]
+TYPES = ['circle', 'square', 'triangle', 'pentagon']
+MIN_DISTANCE = 2.0
+
+
+def _particle(i, rng):
+    return {'id': f'p{i}', 'type': rng.choice(TYPES), 'polarity': rng.choice('+-'), 'x': 0, 'y': 0}
+
+
+def _bond(a, b):
+    return {'from': f'p{a}', 'to': f'p{b}', 'multiplicity': 1}
+
+
+def make_tree(n, rng):
+    """Árvore aleatória"""
+    particles = [_particle(i, rng) for i in range(n)]
+    bonds = [_bond(i, rng.randrange(i)) for i in range(1, n)]
+    return {'particles': particles, 'bonds': bonds}
+
+
+def make_ring(n, rng):
+    """Ciclo com metade das partículas, demais como ramificações"""
+    ring_size = max(3, n // 2)
+    particles = [_particle(i, rng) for i in range(n)]
+    bonds = [_bond(i, (i + 1) % ring_size) for i in range(ring_size)]
+    bonds += [_bond(i, rng.randrange(i)) for i in range(ring_size, n)]
+    return {'particles': particles, 'bonds': bonds}
+
+
+def make_dense(n, rng):
+    """Árvore aleatória com n/2 ligações extras (vários ciclos)"""
+    molecule = make_tree(n, rng)
+    existing = {(b['from'], b['to']) for b in molecule['bonds']}
+    while len(molecule['bonds']) < n - 1 + n // 2:
+        a, b = rng.sample(range(n), 2)
+        if (f'p{a}', f'p{b}') in existing or (f'p{b}', f'p{a}') in existing:
+            continue
+        existing.add((f'p{a}', f'p{b}'))
+        molecule['bonds'].append(_bond(a, b))
+    return molecule
+
+
+def layout_quality(molecule):
+    """Retorna (sobreposições, variação do comprimento das ligações)"""
+    positions = {p['id']: (p['x'], p['y']) for p in molecule['particles']}
+    points = list(positions.values())
+    
+    overlaps = 0
+    for i in range(len(points)):
+        for j in range(i + 1, len(points)):
+            if math.dist(points[i], points[j]) < MIN_DISTANCE:
+                overlaps += 1
+    
+    lengths = [math.dist(positions[b['from']], positions[b['to']]) for b in molecule['bonds']]
+    mean = sum(lengths) / len(lengths)
+    std = math.sqrt(sum((l - mean) ** 2 for l in lengths) / len(lengths))
+    return overlaps, (std / mean if mean else 0)
+
+
+def benchmark(molecule, engine, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        candidate = copy.deepcopy(molecule)
+        clear_layout_cache()
+        start = time.perf_counter()
+        reorganize_positions(candidate, engine)
+        best = min(best, time.perf_counter() - start)
+    overlaps, variation = layout_quality(candidate)
+    return best * 1000, overlaps, variation
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rng = random.Random(42)
+    
+    engines = [LAYOUT_ENGINE_HEURISTIC]
+    if is_layout_engine_available(LAYOUT_ENGINE_STRESS):
+        engines.append(LAYOUT_ENGINE_STRESS)
+    else:
+        print("⚠️ NumPy não instalado - engine 'stress' indisponível")
+    
+    print(f"📊 Benchmark de layout (melhor de {repeat} execuções)")
+    print(f"  {'molécula':<14}{'engine':<12}{'tempo (ms)':>12}{'sobreposições':>16}{'var. ligação':>14}")
+    
+    for size in SIZES:
+        for name, make in (('árvore', make_tree), ('ciclo', make_ring), ('denso', make_dense)):
+            molecule = make(size, rng)
+            for engine in engines:
+                ms, overlaps, variation = benchmark(molecule, engine, repeat)
+                print(f"  {f'{name} {size}':<14}{engine:<12}{ms:>12.2f}{overlaps:>16}{variation:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
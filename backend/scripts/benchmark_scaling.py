@@ -0,0 +1,153 @@
+"""
+Benchmark de escalabilidade dos motores com moléculas grandes.
+
+Gera moléculas sintéticas estáveis de massa crescente (ciclo e cadeia de
+quadrados/triângulos com círculos pendentes) e mede o tempo de cada etapa:
+validação, análises estruturais, componentes, rebond, síntese completa e
+layout. Ao final, estima o expoente de crescimento (inclinação log-log) de
+cada etapa e falha se alguma não for aproximadamente linear.
+
+Uso (a partir de backend/):
+    python scripts/benchmark_scaling.py [repetições]
+"""
+
+import sys
+import os
+import copy
+import math
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.synthesis import synthesize, rebond_molecule, find_connected_components, reorganize_positions
+from core.validator import validate_molecule
+from core.analyzer import analyze_molecule
+from core.molecule_analyzer import analyze_molecule_structure
+
+SIZES = [150, 300, 600, 1200, 2400]
+
+# Inclinação log-log máxima aceita (n log n ~ 1.1; quadrático = 2)
+MAX_EXPONENT = 1.35
+
+
+def _molecule(units, ring):
+    """
+    Ciclo (ou cadeia) alternando quadrado+ e triângulo-, com um círculo+
+    pendente em cada triângulo. Na cadeia, os triângulos das pontas recebem
+    um segundo círculo. Massa = 3 * units (+1 na cadeia).
+    """
+    particles = []
+    bonds = []
+    
+    def add(ptype, polarity):
+        pid = f'p{len(particles)}'
+        particles.append({'id': pid, 'type': ptype, 'polarity': polarity, 'x': 0, 'y': 0})
+        return pid
+    
+    def bond(a, b):
+        bonds.append({'from': a, 'to': b, 'multiplicity': 1})
+    
+    backbone = []
+    for _ in range(units):
+        backbone.append(add('triangle', '-'))
+        backbone.append(add('square', '+'))
+    if not ring:
+        # Cadeia termina em triângulo para fechar as valências
+        backbone.append(add('triangle', '-'))
+    
+    for a, b in zip(backbone, backbone[1:]):
+        bond(a, b)
+    if ring:
+        bond(backbone[-1], backbone[0])
+    
+    for index, pid in enumerate(backbone):
+        if index % 2 == 0:
+            bond(pid, add('circle', '+'))
+            if not ring and index in (0, len(backbone) - 1):
+                bond(pid, add('circle', '+'))
+    
+    return {'particles': particles, 'bonds': bonds}
+
+
+def _reactant():
+    """Molécula pequena que anula um círculo+ da molécula grande"""
+    return {
+        'particles': [
+            {'id': 'p0', 'type': 'circle', 'polarity': '-', 'x': 0, 'y': 0},
+            {'id': 'p1', 'type': 'square', 'polarity': '+', 'x': 0, 'y': 0},
+            {'id': 'p2', 'type': 'circle', 'polarity': '-', 'x': 0, 'y': 0}
+        ],
+        'bonds': [
+            {'from': 'p0', 'to': 'p1', 'multiplicity': 1},
+            {'from': 'p1', 'to': 'p2', 'multiplicity': 1}
+        ]
+    }
+
+
+def _strip_bonds(molecule):
+    stripped = copy.deepcopy(molecule)
+    stripped['bonds'] = []
+    return stripped
+
+
+STAGES = {
+    'validação': lambda m: validate_molecule(m),
+    'analyzer': lambda m: analyze_molecule(m),
+    'mol_analyzer': lambda m: analyze_molecule_structure(m),
+    'componentes': lambda m: find_connected_components(m),
+    'rebond': lambda m: rebond_molecule(_strip_bonds(m)),
+    'síntese': lambda m: synthesize(m, _reactant()),
+    'layout': lambda m: reorganize_positions(copy.deepcopy(m))
+}
+
+
+def _best_time(func, molecule, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(molecule)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _exponent(sizes, times):
+    """Inclinação da regressão linear de log(tempo) x log(n)"""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    den = sum((x - mean_x) ** 2 for x in xs)
+    return num / den
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    failures = []
+    
+    print(f"📊 Benchmark de escalabilidade (melhor de {repeat} execuções, tempos em ms)")
+    
+    for shape, ring in (('ciclo', True), ('cadeia', False)):
+        molecules = [_molecule(size // 3, ring) for size in SIZES]
+        masses = [len(m['particles']) for m in molecules]
+        
+        for molecule in molecules:
+            assert validate_molecule(molecule)[0], 'molécula sintética inválida'
+        
+        print(f"\n🧪 {shape}")
+        print(f"  {'etapa':<14}" + ''.join(f'{m:>10}' for m in masses) + f"{'expoente':>10}")
+        
+        for stage, func in STAGES.items():
+            times = [_best_time(func, molecule, repeat) for molecule in molecules]
+            exponent = _exponent(masses, times)
+            flag = '' if exponent <= MAX_EXPONENT else '  ❌'
+            print(f"  {stage:<14}" + ''.join(f'{t * 1000:>10.2f}' for t in times) + f"{exponent:>10.2f}{flag}")
+            if exponent > MAX_EXPONENT:
+                failures.append(f'{shape}/{stage}: expoente {exponent:.2f}')
+    
+    assert not failures, 'Crescimento super-linear: ' + ', '.join(failures)
+    print(f"\n✅ Todas as etapas com crescimento ~linear (expoente <= {MAX_EXPONENT})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark dos codecs de serialização sobre os arquivos de dados reais.
+
+Mede, para cada store em data/, o tamanho e o tempo de load/dump de:
+- formato antigo (json da stdlib com indent=2)
+- JSON compacto (orjson se instalado, senão stdlib)
+- MessagePack (se instalado)
+
+Uso (a partir de backend/):
+    python scripts/benchmark_serialization.py [repetições]
+"""
+
+import sys
+import os
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.serialization import (
+    JSON_BACKEND, CODEC_JSON, CODEC_MSGPACK, get_codec, is_codec_available
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+DATA_FILES = [
+    'synthesis_cache.json',
+    'discovered_molecules.json',
+    'property_profiles.json',
+    'saves.json'
+]
+
+
+def _legacy_dumps(obj):
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _legacy_loads(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def _best_time(func, arg, repeat):
+    """Menor tempo (ms) entre as repetições"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def benchmark_file(path, repeat):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = _legacy_loads(raw)
+
+    formats = [('json indent=2 (antigo)', _legacy_dumps, _legacy_loads)]
+
+    codec = get_codec(CODEC_JSON)
+    formats.append((f'json compacto ({JSON_BACKEND})', codec['dumps'], codec['loads']))
+
+    if is_codec_available(CODEC_MSGPACK):
+        codec = get_codec(CODEC_MSGPACK)
+        formats.append(('msgpack', codec['dumps'], codec['loads']))
+
+    rows = []
+    for name, dumps, loads in formats:
+        payload = dumps(data)
+        # Garantir que o formato preserva os dados
+        assert loads(payload) == data, f'{name} não preserva os dados de {path}'
+
+        rows.append({
+            'format': name,
+            'size_kb': len(payload) / 1024,
+            'dump_ms': _best_time(dumps, data, repeat),
+            'load_ms': _best_time(loads, payload, repeat)
+        })
+    return rows
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"📊 Benchmark de serialização (melhor de {repeat} execuções)")
+    print(f"   JSON backend: {JSON_BACKEND} | msgpack: "
+          f"{'disponível' if is_codec_available(CODEC_MSGPACK) else 'não instalado'}")
+
+    for filename in DATA_FILES:
+        path = os.path.join(DATA_DIR, filename)
+        if not os.path.exists(path):
+            continue
+
+        rows = benchmark_file(path, repeat)
+        baseline = rows[0]
+
+        print(f"\n📁 {filename}")
+        print(f"  {'formato':<28}{'tamanho (KB)':>14}{'dump (ms)':>12}{'load (ms)':>12}{'load x':>9}")
+        for row in rows:
+            speedup = baseline['load_ms'] / row['load_ms'] if row['load_ms'] else 0
+            print(f"  {row['format']:<28}{row['size_kb']:>14.1f}{row['dump_ms']:>12.2f}"
+                  f"{row['load_ms']:>12.2f}{speedup:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Calcula e persiste a rede de reações (fecho por síntese) do banco base.
+
+Imprime, por rodada semi-ingênua, os pares avaliados, as reações com
+sucesso, os produtos descartados por massa e as moléculas novas.
+
+Uso (a partir de backend/):
+    python scripts/build_reaction_network.py [massa_máxima] [workers]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.reaction_network import compute_reaction_network, summarize_network, DEFAULT_MAX_MASS
+from data.molecules import get_all_molecules
+from data.reaction_networks import save_network, BASE_NETWORK, NETWORKS_FILE
+
+
+def main():
+    max_mass = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_MASS
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    sources = [(molecule['id'], molecule) for molecule in get_all_molecules()]
+    print(f'Fecho a partir de {len(sources)} moléculas base (massa máxima {max_mass})')
+
+    started = time.perf_counter()
+    network = compute_reaction_network(sources, max_mass=max_mass, workers=workers)
+    elapsed = time.perf_counter() - started
+
+    print(f'{"rodada":>6} {"pares":>8} {"reações":>8} {"descart.":>8} {"novas":>6} {"ms":>10}')
+    for stats in network['rounds']:
+        print(f'{stats["round"]:>6} {stats["pairs"]:>8} {stats["reactions"]:>8} '
+              f'{stats["dropped_products"]:>8} {stats["new_molecules"]:>6} {stats["elapsed_ms"]:>10.1f}')
+
+    summary = summarize_network(network)
+    print(f'\n{summary["molecules"]} moléculas, {summary["reactions"]} reações '
+          f'em {summary["rounds"]} rodadas ({elapsed:.1f}s)')
+    print('Por massa: ' + ', '.join(f'{mass}: {count}' for mass, count in summary['by_mass'].items()))
+
+    save_network(network, BASE_NETWORK)
+    print(f'Rede salva em {NETWORKS_FILE} (escopo "{BASE_NETWORK}")')
+
+
+if __name__ == '__main__':
+    main()
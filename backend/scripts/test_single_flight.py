@@ -0,0 +1,228 @@
+"""
+Testes da coalescência de pedidos (core.single_flight) com threads:
+run/run_many, etapas separadas (begin/finish/fail/abandon/wait), repasse
+de exceções e recálculo depois de abandon.
+
+    python scripts/test_single_flight.py   (ou pytest scripts/test_single_flight.py)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+
+from core.single_flight import SingleFlight
+
+WAITERS = 8
+TIMEOUT = 5
+
+
+def _wait_until(predicate):
+    deadline = time.monotonic() + TIMEOUT
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('condição não atingida a tempo')
+        time.sleep(0.005)
+
+
+def _start(target, *args):
+    """Thread com o retorno (ou a exceção) de target em 'result'/'error'"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = target(*args)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.outcome = outcome
+    thread.start()
+    return thread
+
+
+def _join(threads):
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive(), 'thread presa esperando a chave'
+
+
+def _joined(flights, count):
+    """Espera count pedidos entrarem em chaves em andamento"""
+    _wait_until(lambda: flights.get_stats()['shared'] >= count)
+
+
+def test_run_computes_once_and_copies_for_waiters():
+    flights = SingleFlight('test_run')
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(TIMEOUT)
+        return {'value': [1, 2]}
+
+    leader = _start(flights.run, 'k', compute)
+    _wait_until(lambda: calls)
+    waiters = [_start(flights.run, 'k', compute) for _ in range(WAITERS)]
+    _joined(flights, WAITERS)
+    release.set()
+    _join([leader] + waiters)
+
+    assert len(calls) == 1
+    result, computed = leader.outcome['result']
+    assert computed and result == {'value': [1, 2]}
+    shared = [waiter.outcome['result'] for waiter in waiters]
+    assert all(value == result and not computed for value, computed in shared)
+    # Cada pedido que esperou recebe a própria cópia
+    assert len({id(value) for value, _ in shared} | {id(result)}) == WAITERS + 1
+    assert flights.get_stats() == {'calls': WAITERS + 1, 'computed': 1, 'shared': WAITERS, 'in_flight': 0}
+
+
+def test_exception_propagates_to_joiners_and_frees_the_key():
+    flights = SingleFlight('test_error')
+    release = threading.Event()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(TIMEOUT)
+        raise ValueError('falhou')
+
+    leader = _start(flights.run, 'k', failing)
+    started.wait(TIMEOUT)
+    waiters = [_start(flights.run, 'k', failing) for _ in range(WAITERS)]
+    _joined(flights, WAITERS)
+    release.set()
+    _join([leader] + waiters)
+
+    errors = [thread.outcome.get('error') for thread in [leader] + waiters]
+    assert all(isinstance(error, ValueError) for error in errors)
+    # A chave saiu do registro: o próximo pedido calcula de novo
+    assert flights.run('k', lambda: 42) == (42, True)
+
+
+def test_abandon_makes_waiters_recompute():
+    flights = SingleFlight('test_abandon')
+    led, joined = flights.begin(['k'])
+    assert list(led) == ['k'] and not joined
+
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'recalculado'
+
+    waiters = [_start(flights.run, 'k', compute) for _ in range(WAITERS)]
+    _joined(flights, WAITERS)
+    flights.abandon(led)
+    _join(waiters)
+
+    # Sem erro para quem esperava: um deles calcula, os demais esperam por ele
+    results = [waiter.outcome['result'] for waiter in waiters]
+    assert all(value == 'recalculado' for value, _ in results)
+    assert sum(computed for _, computed in results) == len(calls)
+    assert 1 <= len(calls) <= WAITERS
+    assert flights.get_stats()['in_flight'] == 0
+
+
+def test_finish_without_a_key_abandons_it():
+    flights = SingleFlight('test_partial')
+    led, _ = flights.begin(['a', 'b'])
+    _, joined = flights.begin(['a', 'b'])
+    assert set(joined) == {'a', 'b'}
+
+    flights.finish(led, {'a': 1})
+    results, abandoned = flights.wait(joined)
+    assert results == {'a': 1} and abandoned == ['b']
+
+
+def test_wait_raises_the_leader_error():
+    flights = SingleFlight('test_fail')
+    led, _ = flights.begin(['k'])
+    _, joined = flights.begin(['k'])
+    flights.fail(led, KeyError('k'))
+    try:
+        flights.wait(joined)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError('wait deveria repassar a exceção de quem calculava')
+
+
+def test_begin_without_join_skips_keys_in_flight():
+    flights = SingleFlight('test_claim')
+    led, _ = flights.begin(['a'])
+    claimed, joined = flights.begin(['a', 'b'], join=False)
+    assert list(claimed) == ['b'] and not joined
+    flights.finish(led, {'a': 1})
+    flights.finish(claimed, {'b': 2})
+    assert flights.get_stats() == {'calls': 2, 'computed': 2, 'shared': 0, 'in_flight': 0}
+
+
+def test_closing_a_finished_call_keeps_the_newer_one():
+    flights = SingleFlight('test_close')
+    first, _ = flights.begin(['k'])
+    flights.finish(first, {'k': 1})
+    second, _ = flights.begin(['k'])
+
+    # Encerrar de novo a chamada antiga não remove a reserva atual
+    flights.abandon(first)
+    assert flights.get_stats()['in_flight'] == 1
+    _, joined = flights.begin(['k'])
+    flights.finish(second, {'k': 2})
+    assert flights.wait(joined) == ({'k': 2}, [])
+
+
+def test_run_many_computes_each_key_once():
+    flights = SingleFlight('test_many')
+    lock = threading.Lock()
+    computed_keys = []
+    barrier = threading.Barrier(WAITERS)
+
+    def compute(keys):
+        with lock:
+            computed_keys.extend(keys)
+        time.sleep(0.01)
+        return {key: key * 2 for key in keys}
+
+    def batch(keys):
+        barrier.wait(TIMEOUT)
+        return flights.run_many(keys, compute)
+
+    # Lotes sobrepostos (e com chaves repetidas)
+    batches = [[index, index + 1, index + 2, index] for index in range(WAITERS)]
+    threads = [_start(batch, keys) for keys in batches]
+    _join(threads)
+
+    assert sorted(computed_keys) == sorted(set(key for keys in batches for key in keys))
+    owners = []
+    for thread, keys in zip(threads, batches):
+        results, computed = thread.outcome['result']
+        assert results == {key: key * 2 for key in keys}
+        owners.extend(computed)
+    # Cada chave foi calculada por exatamente um dos lotes
+    assert sorted(owners) == sorted(computed_keys)
+    assert flights.get_stats()['in_flight'] == 0
+
+
+def test_run_many_recomputes_keys_abandoned_by_a_job():
+    flights = SingleFlight('test_many_abandon')
+    led, _ = flights.begin(['a'])
+
+    thread = _start(flights.run_many, ['a', 'b'], lambda keys: {key: key.upper() for key in keys})
+    _joined(flights, 1)
+    flights.abandon(led)
+    _join([thread])
+
+    results, computed = thread.outcome['result']
+    assert results == {'a': 'A', 'b': 'B'} and computed == {'a', 'b'}
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f'✅ {name}')
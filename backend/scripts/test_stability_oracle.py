@@ -0,0 +1,171 @@
+"""
+Testes do oráculo de estabilização (core.stability) contra a enumeração
+exaustiva das ligações em composições pequenas.
+
+- Sem exigir conectividade o oráculo é exato: mesmo veredicto da força bruta.
+- Com conectividade as condições são apenas necessárias: toda composição que
+  a força bruta estabiliza em uma molécula conectada precisa ser aceita (um
+  False indevido podaria moléculas válidas no synthesize, rebond e gerador).
+
+    python scripts/test_stability_oracle.py   (ou pytest scripts/test_stability_oracle.py)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from itertools import combinations_with_replacement
+
+from data.molecules import PARTICLE_TYPES
+from core.stability import (
+    MAX_BOND_MULTIPLICITY,
+    can_complete_bonding,
+    is_stable_bonding_feasible
+)
+
+# Com 6 partículas já há moléculas estáveis com mais de um componente
+MAX_PARTICLES = 6
+RANDOM_MOLECULES = 2000
+
+PARTICLE_CLASSES = [(ptype, polarity) for ptype in PARTICLE_TYPES for polarity in '+-']
+
+
+def _brute_force(demands, max_multiplicity=None, connected=False):
+    """
+    Procura multiplicidades para todos os pares compatíveis (tipos diferentes,
+    polaridades opostas) que completem exatamente as demandas.
+
+    Args:
+        demands: [(tipo, polaridade, conexões faltantes)]
+    """
+    n = len(demands)
+    pairs = [
+        (i, j) for i in range(n) for j in range(i + 1, n)
+        if demands[i][0] != demands[j][0] and demands[i][1] != demands[j][1]
+    ]
+    remaining = [demand for _, _, demand in demands]
+    bonded = []
+
+    def is_connected():
+        if n < 2:
+            return False
+        neighbors = {i: set() for i in range(n)}
+        for i, j in bonded:
+            neighbors[i].add(j)
+            neighbors[j].add(i)
+        seen = {0}
+        stack = [0]
+        while stack:
+            for other in neighbors[stack.pop()] - seen:
+                seen.add(other)
+                stack.append(other)
+        return len(seen) == n
+
+    def search(index):
+        if index == len(pairs):
+            return not any(remaining) and (not connected or is_connected())
+        i, j = pairs[index]
+        limit = min(remaining[i], remaining[j])
+        if max_multiplicity is not None:
+            limit = min(limit, max_multiplicity)
+        for multiplicity in range(limit, -1, -1):
+            remaining[i] -= multiplicity
+            remaining[j] -= multiplicity
+            if multiplicity:
+                bonded.append((i, j))
+            found = search(index + 1)
+            if multiplicity:
+                bonded.pop()
+            remaining[i] += multiplicity
+            remaining[j] += multiplicity
+            if found:
+                return True
+        return False
+
+    return search(0)
+
+
+def _compositions():
+    for size in range(1, MAX_PARTICLES + 1):
+        yield from combinations_with_replacement(PARTICLE_CLASSES, size)
+
+
+def _counts(composition):
+    counts = {}
+    for particle_class in composition:
+        counts[particle_class] = counts.get(particle_class, 0) + 1
+    return counts
+
+
+def _demands(composition):
+    return [(ptype, polarity, PARTICLE_TYPES[ptype]['connections']) for ptype, polarity in composition]
+
+
+def test_unconnected_verdict_is_exact():
+    for composition in _compositions():
+        expected = _brute_force(_demands(composition), MAX_BOND_MULTIPLICITY)
+        verdict = is_stable_bonding_feasible(_counts(composition), connected=False)
+        assert verdict == expected, (composition, verdict, expected)
+
+
+def test_connected_verdict_never_prunes_stable_molecules():
+    for composition in _compositions():
+        expected = _brute_force(_demands(composition), MAX_BOND_MULTIPLICITY, connected=True)
+        verdict = is_stable_bonding_feasible(_counts(composition))
+        assert verdict or not expected, (composition, 'molécula estável rejeitada')
+
+
+def test_connected_known_cases():
+    # ○+ ○- não têm tipos diferentes; □+ ○- ○- forma a cadeia ○-□-○
+    assert not is_stable_bonding_feasible({('circle', '+'): 1, ('circle', '-'): 1})
+    assert is_stable_bonding_feasible({('square', '+'): 1, ('circle', '-'): 2})
+    # Duas ligações simples ○-□ separadas: estável, mas não conectada
+    counts = {('square', '+'): 2, ('circle', '-'): 4}
+    assert is_stable_bonding_feasible(counts, connected=False)
+    assert not is_stable_bonding_feasible(counts)
+
+
+def _random_molecule(rng, prefix):
+    """Molécula com ligações parciais (às vezes com excesso de conexões)"""
+    size = rng.randint(1, 4)
+    particles = [
+        {'id': f'{prefix}{index}', 'type': ptype, 'polarity': polarity}
+        for index, (ptype, polarity) in enumerate(rng.choice(PARTICLE_CLASSES) for _ in range(size))
+    ]
+    bonds = []
+    for a in range(size):
+        for b in range(a + 1, size):
+            pa, pb = particles[a], particles[b]
+            if pa['type'] != pb['type'] and pa['polarity'] != pb['polarity'] and rng.random() < 0.5:
+                bonds.append({'from': pa['id'], 'to': pb['id'], 'multiplicity': rng.randint(1, 3)})
+    return {'particles': particles, 'bonds': bonds}
+
+
+def _residual_demands(molecules):
+    demands = []
+    for molecule in molecules:
+        connections = {p['id']: 0 for p in molecule['particles']}
+        for bond in molecule['bonds']:
+            connections[bond['from']] += bond['multiplicity']
+            connections[bond['to']] += bond['multiplicity']
+        for particle in molecule['particles']:
+            missing = PARTICLE_TYPES[particle['type']]['connections'] - connections[particle['id']]
+            if missing > 0:
+                demands.append((particle['type'], particle['polarity'], missing))
+    return demands
+
+
+def test_can_complete_bonding_matches_brute_force():
+    rng = random.Random(35)
+    for _ in range(RANDOM_MOLECULES):
+        molecules = [_random_molecule(rng, 'a'), _random_molecule(rng, 'b')][:rng.randint(1, 2)]
+        expected = _brute_force(_residual_demands(molecules))
+        assert can_complete_bonding(*molecules) == expected, molecules
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f'✅ {name}')
@@ -0,0 +1,135 @@
+"""
+Testes do armazenamento (data.storage): quarentena de stores corrompidos e
+substituição atômica sob file_lock.
+
+    python scripts/test_storage.py   (ou pytest scripts/test_storage.py)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import multiprocessing
+import tempfile
+import threading
+from unittest import mock
+
+from data.storage import file_lock, read_json, write_json
+
+WRITERS = 8
+INCREMENTS = 25
+
+
+def _increment(path, times):
+    """Ciclo leitura-modificação-escrita protegido (também usado pelos processos)"""
+    for _ in range(times):
+        with file_lock(path):
+            data = read_json(path)
+            data['counter'] = data.get('counter', 0) + 1
+            write_json(path, data)
+
+
+def test_corrupt_store_is_quarantined():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'saves.json')
+        with open(path, 'wb') as f:
+            f.write(b'{"saves": [1, 2')
+
+        assert read_json(path, default=lambda: {'saves': []}) == {'saves': []}
+
+        # O arquivo original não é sobrescrito: vai para o lado, intacto
+        assert not os.path.exists(path)
+        quarantined = glob.glob(f'{path}.corrupt-*')
+        assert len(quarantined) == 1
+        with open(quarantined[0], 'rb') as f:
+            assert f.read() == b'{"saves": [1, 2'
+
+        # A próxima escrita cria um store novo sem tocar na cópia preservada
+        write_json(path, {'saves': [3]})
+        assert read_json(path) == {'saves': [3]}
+        assert glob.glob(f'{path}.corrupt-*') == quarantined
+
+
+def test_missing_store_returns_default():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'missing.json')
+        assert read_json(path) == {}
+        assert read_json(path, default=list) == []
+        assert not os.listdir(directory)
+
+
+def test_failed_replace_keeps_previous_content():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'store.json')
+        write_json(path, {'version': 1})
+
+        with mock.patch('data.storage.os.replace', side_effect=OSError('disco cheio')):
+            try:
+                write_json(path, {'version': 2})
+            except OSError:
+                pass
+            else:
+                raise AssertionError('a falha do os.replace deveria ser propagada')
+
+        # Conteúdo anterior intacto e nenhum temporário esquecido no diretório
+        assert read_json(path) == {'version': 1}
+        assert sorted(os.listdir(directory)) == ['store.json', 'store.json.lock']
+
+
+def test_readers_never_see_partial_writes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'store.json')
+        payload = {'items': list(range(20000))}
+        write_json(path, payload)
+
+        stop = threading.Event()
+        seen = []
+
+        def reader():
+            while not stop.is_set():
+                seen.append(read_json(path, default=lambda: None))
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for version in range(30):
+            write_json(path, {**payload, 'version': version})
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        # Sem leituras de arquivo pela metade (que seriam postas em quarentena)
+        assert seen and all(data is not None and len(data['items']) == 20000 for data in seen)
+        assert not glob.glob(f'{path}.corrupt-*')
+
+
+def test_file_lock_serializes_threads():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'counter.json')
+        threads = [threading.Thread(target=_increment, args=(path, INCREMENTS)) for _ in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert read_json(path)['counter'] == WRITERS * INCREMENTS
+
+
+def test_file_lock_serializes_processes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'counter.json')
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=_increment, args=(path, INCREMENTS)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert all(process.exitcode == 0 for process in processes)
+        assert read_json(path)['counter'] == 4 * INCREMENTS
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f'✅ {name}')
@@ -0,0 +1,62 @@
+/**
+ * Builder Session - Validação incremental do construtor via Socket.IO
+ *
+ * A molécula fica no servidor; cada edição envia apenas o delta e recebe
+ * apenas o estado de validação que mudou (partículas, ligações e resumo).
+ */
+
+import { io } from 'socket.io-client'
+
+const SOCKET_URL = 'http://localhost:5000'
+
+export function createBuilderSession({ onState, onDelta, onSnapshot, onError } = {}) {
+  const socket = io(SOCKET_URL)
+
+  if (onState) socket.on('builder_state', onState)
+  if (onDelta) socket.on('builder_delta', onDelta)
+  if (onSnapshot) socket.on('builder_snapshot', onSnapshot)
+  if (onError) socket.on('builder_error', onError)
+
+  return {
+    // Inicia a sessão (vazia ou com uma molécula existente)
+    start(molecule = null) {
+      socket.emit('builder_start', molecule ? { molecule } : {})
+    },
+
+    // Envia uma ou mais edições: { op: 'add_particle' | 'remove_particle' |
+    // 'update_particle' | 'add_bond' | 'remove_bond' | 'load', ... }
+    edit(edits) {
+      socket.emit('builder_edit', { edits: Array.isArray(edits) ? edits : [edits] })
+    },
+
+    addParticle(type, polarity, id = null, x = null, y = null) {
+      this.edit({ op: 'add_particle', type, polarity, id, x, y })
+    },
+
+    removeParticle(id) {
+      this.edit({ op: 'remove_particle', id })
+    },
+
+    updateParticle(id, { type = null, polarity = null } = {}) {
+      this.edit({ op: 'update_particle', id, type, polarity })
+    },
+
+    addBond(from, to, multiplicity = 1) {
+      this.edit({ op: 'add_bond', from, to, multiplicity })
+    },
+
+    removeBond(from, to, multiplicity = null) {
+      this.edit({ op: 'remove_bond', from, to, multiplicity })
+    },
+
+    // Molécula completa com as mensagens detalhadas do validador
+    snapshot() {
+      socket.emit('builder_snapshot')
+    },
+
+    close() {
+      socket.emit('builder_end')
+      socket.disconnect()
+    }
+  }
+}
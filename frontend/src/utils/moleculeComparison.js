@@ -6,10 +6,17 @@
 /**
  * Compara duas moléculas verificando se são idênticas estruturalmente
  * Considera: tipos de partículas, polaridades E estrutura de ligações
+ * Usa a chave canônica do backend quando presente nas duas moléculas;
+ * o fingerprint abaixo é apenas o fallback para moléculas montadas no cliente
  */
 export function areMoleculesIdentical(mol1, mol2) {
   if (!mol1 || !mol2) return false
   
+  // Moléculas servidas pela API trazem a chave canônica: comparação direta
+  if (mol1.canonical_key && mol2.canonical_key) {
+    return mol1.canonical_key === mol2.canonical_key
+  }
+  
   // Verificar quantidade de partículas
   if (mol1.particles.length !== mol2.particles.length) return false
   